@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Approximate Nearest-Neighbour Index
+Inverted-file (IVF) index in pure NumPy: chunk vectors are grouped by spherical
+k-means around coarse centroids, and a query only scores the vectors of its
+nprobe closest lists. Higher nprobe = better recall, slower queries.
+"""
+
+import os
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+CENTROIDS_FILE = "ivf_centroids.npy"
+ORDER_FILE = "ivf_order.npy"
+LIST_OFFSETS_FILE = "ivf_list_offsets.npy"
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+                     sample_size: int = 50000, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids for already normalized vectors (trained on a sample)"""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))],
+                            dtype=np.float32)
+    else:
+        sample = np.asarray(vectors, dtype=np.float32)
+
+    n_clusters = min(n_clusters, len(sample))
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        # Re-seed empty clusters with random points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids
+
+
+def assign_in_blocks(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 65536) -> np.ndarray:
+    """Closest centroid of every vector, without materializing the full score matrix"""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """Coarse-quantized inverted lists over the rows of a normalized embedding matrix"""
+
+    def __init__(self, nprobe: int = 8):
+        self.nprobe = nprobe
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.order = np.empty(0, dtype=np.int64)          # row ids grouped by list
+        self.list_offsets = np.zeros(1, dtype=np.int64)   # list i = order[offsets[i]:offsets[i+1]]
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def build(self, vectors: np.ndarray, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Train centroids and fill the inverted lists"""
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(len(vectors))))
+        self.centroids = spherical_kmeans(vectors, n_lists, iterations=iterations, seed=seed)
+        assignments = assign_in_blocks(vectors, self.centroids)
+        self.order = np.argsort(assignments, kind='stable').astype(np.int64)
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Row ids in the nprobe lists closest to a normalized query"""
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        coarse = self.centroids @ query
+        if nprobe < self.n_lists:
+            lists = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        else:
+            lists = np.arange(self.n_lists)
+        return np.concatenate([self.order[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists])
+
+    def search(self, vectors: np.ndarray, queries: np.ndarray, top_k: int, nprobe: Optional[int] = None,
+               scorer: Optional[Callable[[np.ndarray, int], np.ndarray]] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(row ids, scores) best first for each normalized query; scorer(rows, query index) replaces
+        vectors[rows] @ query, e.g. for compressed vectors"""
+        results = []
+        for i, query in enumerate(queries):
+            rows = self.candidates(query, nprobe)
+            if len(rows) == 0:
+                results.append((rows, np.empty(0, dtype=np.float32)))
+                continue
+            rows = np.sort(rows)  # sequential access into the (possibly memory-mapped) matrix
+            scores = vectors[rows] @ query if scorer is None else scorer(rows, i)
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-scores[best], kind='stable')]
+            results.append((rows[best], scores[best]))
+        return results
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Files to store next to embeddings.npy"""
+        return {
+            CENTROIDS_FILE: self.centroids,
+            ORDER_FILE: self.order,
+            LIST_OFFSETS_FILE: self.list_offsets
+        }
+
+    @classmethod
+    def load(cls, index_dir: str, nprobe: int = 8) -> Optional['IVFIndex']:
+        """Open a saved IVF index (memory-mapped), or None if the directory has none"""
+        if not os.path.exists(os.path.join(index_dir, CENTROIDS_FILE)):
+            return None
+        ivf = cls(nprobe=nprobe)
+        ivf.centroids = np.load(os.path.join(index_dir, CENTROIDS_FILE), allow_pickle=False)
+        ivf.order = np.load(os.path.join(index_dir, ORDER_FILE), mmap_mode='r', allow_pickle=False)
+        ivf.list_offsets = np.load(os.path.join(index_dir, LIST_OFFSETS_FILE), allow_pickle=False)
+        return ivf
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Multi-Session Assistant Server
+One process holds a single Whisper model, embedding model and index, and serves
+many students over a local HTTP API. Each session has its own VAD state and ring
+buffer; finished utterances from all sessions are decoded together in small
+Whisper batches, their retrieval queries share one encoder pass, and the LLM calls
+run on a thread pool. When Whisper falls behind or a session has too many
+unanswered turns, audio uploads are refused with 429 so clients slow down.
+
+    POST   /sessions                     -> {"session_id": ...}
+    POST   /sessions/<id>/audio          raw 16 kHz mono int16 PCM; 202, or 429 + Retry-After
+    GET    /sessions/<id>/events?wait=5  long-poll for transcript/reply events
+    DELETE /sessions/<id>
+    GET    /stats
+
+    python assistant_server.py --port 8770
+"""
+
+import argparse
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import webrtcvad
+
+import config
+import french_vad_assistant as assistant
+from response_cache import context_id
+
+
+class Session:
+    def __init__(self, session_id: str, max_events: int = 256):
+        self.id = session_id
+        # webrtcvad keeps state between frames, so every stream gets its own detector
+        self.buffer = assistant.AudioBuffer(config.SAMPLE_RATE, config.FRAME_DURATION,
+                                            vad_instance=webrtcvad.Vad(2))
+        self.frame_bytes = self.buffer.frame_bytes
+        self.leftover = b""
+        self.audio_lock = threading.Lock()
+        self.events = deque(maxlen=max_events)
+        self.events_ready = threading.Condition()
+        self.in_flight = 0  # turns between endpoint and reply
+        self.turns = 0
+        self.last_active = time.monotonic()
+        self._count_lock = threading.Lock()
+
+    def begin_turn(self) -> int:
+        with self._count_lock:
+            self.turns += 1
+            self.in_flight += 1
+            return self.turns
+
+    def end_turn(self):
+        with self._count_lock:
+            self.in_flight -= 1
+
+    def push_event(self, event: Dict):
+        with self.events_ready:
+            self.events.append(event)
+            self.events_ready.notify_all()
+
+    def wait_events(self, timeout: float) -> List[Dict]:
+        with self.events_ready:
+            if not self.events and timeout > 0:
+                self.events_ready.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+
+class MicroBatcher:
+    """Collects work items from all sessions and hands them to process_batch in groups"""
+
+    def __init__(self, name: str, process_batch: Callable[[List], None], max_batch: int,
+                 max_wait: float, max_queue: int = 0):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.items = 0
+        threading.Thread(target=self._run, name=f"batch-{name}", daemon=True).start()
+
+    def submit(self, item) -> bool:
+        """Queue an item; False when the queue is full"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                self.process_batch(batch)
+            except Exception as e:
+                print(f"{self.name} batch failed: {e}")
+
+    def stats(self) -> Dict:
+        return {'queued': self.queue.qsize(), 'batches': self.batches,
+                'mean_batch': self.items / self.batches if self.batches else 0.0}
+
+
+def decode_batch(model, audios: List[np.ndarray]) -> List[str]:
+    """Transcribe several utterances in one Whisper forward pass.
+    Utterances are capped at RECORD_SECONDS, so each fits Whisper's single 30 s window."""
+    import torch
+    import whisper
+
+    if len(audios) == 1:
+        return [model.transcribe(audios[0], language="fr", fp16=False)["text"].strip()]
+
+    n_mels = getattr(model.dims, 'n_mels', 80)
+    mels = torch.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), n_mels=n_mels)
+                        for audio in audios]).to(model.device)
+    options = whisper.DecodingOptions(language="fr", fp16=False, without_timestamps=True)
+    return [result.text.strip() for result in whisper.decode(model, mels, options)]
+
+
+class AssistantServer:
+    def __init__(self):
+        self.sessions: Dict[str, Session] = {}
+        self.sessions_lock = threading.Lock()
+        # Counters are updated from handler, batcher and LLM threads
+        self.counters_lock = threading.Lock()
+        self.rejected_uploads = 0
+        self.turns_completed = 0
+        self.context_tokens = 0  # prompt tokens of retrieved context sent, and saved by budgeting
+        self.context_tokens_saved = 0
+        self.latencies = deque(maxlen=1000)  # endpoint -> reply seconds
+
+        wait = config.SERVER_BATCH_WAIT_MS / 1000
+        self.decoder = MicroBatcher("whisper", self._decode, config.SERVER_DECODE_BATCH, wait,
+                                    max_queue=config.SERVER_MAX_PENDING)
+        self.retriever = MicroBatcher("retrieval", self._retrieve, max_batch=32, max_wait=wait / 2)
+        self.llm_pool = ThreadPoolExecutor(max_workers=config.SERVER_LLM_WORKERS, thread_name_prefix="llm")
+        threading.Thread(target=self._reap_idle_sessions, name="session-reaper", daemon=True).start()
+
+    # Sessions
+    def create_session(self) -> Optional[Session]:
+        with self.sessions_lock:
+            if len(self.sessions) >= config.SERVER_MAX_SESSIONS:
+                return None
+            session = Session(uuid.uuid4().hex[:12])
+            self.sessions[session.id] = session
+            return session
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        with self.sessions_lock:
+            session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_active = time.monotonic()
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        with self.sessions_lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def _reap_idle_sessions(self):
+        while True:
+            time.sleep(30)
+            cutoff = time.monotonic() - config.SERVER_SESSION_TIMEOUT
+            with self.sessions_lock:
+                for session_id in [s.id for s in self.sessions.values() if s.last_active < cutoff]:
+                    del self.sessions[session_id]
+
+    # Audio in
+    def accept_audio(self, session: Session, pcm: bytes) -> bool:
+        """Run VAD over the uploaded frames; False (nothing consumed) when we are overloaded"""
+        if session.in_flight >= config.SERVER_SESSION_IN_FLIGHT or self.decoder.queue.full():
+            with self.counters_lock:
+                self.rejected_uploads += 1
+            return False
+
+        with session.audio_lock:
+            data = session.leftover + pcm
+            usable = len(data) - len(data) % session.frame_bytes
+            session.leftover = data[usable:]
+            view = memoryview(data)
+            for offset in range(0, usable, session.frame_bytes):
+                if not session.buffer.add_frame(view[offset:offset + session.frame_bytes]):
+                    continue
+                audio = session.buffer.get_audio_data()
+                if audio is None:
+                    continue
+                turn = {'session': session, 'turn': session.begin_turn(), 'audio': audio,
+                        'endpoint_at': time.perf_counter()}
+                if not self.decoder.submit(turn):
+                    session.end_turn()
+                    session.push_event({'type': 'error', 'turn': turn['turn'],
+                                        'message': "server overloaded, utterance dropped"})
+        return True
+
+    # Pipeline stages
+    def _decode(self, turns: List[Dict]):
+        model = assistant.whisper_model.get()
+        started = time.perf_counter()
+        try:
+            with assistant.model_lock:
+                texts = decode_batch(model, [turn['audio'] for turn in turns])
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            texts = [None] * len(turns)
+        decode_seconds = time.perf_counter() - started
+
+        for turn, text in zip(turns, texts):
+            session = turn['session']
+            del turn['audio']
+            if not text:
+                session.end_turn()
+                session.push_event({'type': 'error', 'turn': turn['turn'], 'message': "could not understand"})
+                continue
+            turn['text'] = text
+            turn['asr_seconds'] = time.perf_counter() - turn['endpoint_at']
+            session.push_event({'type': 'transcript', 'turn': turn['turn'], 'text': text,
+                                'latency': turn['asr_seconds'], 'batch_size': len(turns),
+                                'decode_seconds': decode_seconds})
+            self.retriever.submit(turn)
+
+    def _retrieve(self, turns: List[Dict]):
+        contexts = [""] * len(turns)
+        try:
+            rag = assistant.rag_system.get()
+            if rag:
+                texts = [turn['text'] for turn in turns]
+                results = rag.search_batch(texts, top_k=config.RAG_TOP_K)
+                embeddings = rag.embed_queries(texts) if config.RESPONSE_CACHE_ENABLED else None
+                for i, (turn, chunks) in enumerate(zip(turns, results)):
+                    contexts[i], context_stats = assistant.build_cultural_context(turn['text'], chunks, rag)
+                    with self.counters_lock:
+                        self.context_tokens += context_stats['tokens']
+                        self.context_tokens_saved += context_stats['tokens_saved']
+                    if embeddings is not None:
+                        turn['cache_key'] = (embeddings[i], context_id(chunks))
+        except Exception as e:
+            print(f"Error getting cultural context: {e}")
+        for turn, context in zip(turns, contexts):
+            turn['context'] = context
+            self.llm_pool.submit(self._respond, turn)
+
+    def _respond(self, turn: Dict):
+        session = turn['session']
+        try:
+            cache_key = turn.get('cache_key')
+            reply = assistant.cached_response(turn['text'], cache_key)
+            timing = {'complete': True, 'cached': True} if reply is not None else None
+            if reply is None:
+                reply, timing = assistant.get_ai_response(turn['text'], turn['context'], stream=False)
+                if timing['complete']:
+                    assistant.remember_response(turn['text'], cache_key, reply)
+            latency = time.perf_counter() - turn['endpoint_at']
+            with self.counters_lock:
+                self.latencies.append(latency)
+                self.turns_completed += 1
+            session.push_event({'type': 'reply', 'turn': turn['turn'], 'text': reply, 'latency': latency,
+                                'llm_seconds': timing.get('total')})
+        finally:
+            session.end_turn()
+
+    def _response_cache_stats(self) -> Optional[Dict]:
+        cache = assistant.response_cache.get_if_ready() if config.RESPONSE_CACHE_ENABLED else None
+        return cache.stats() if cache is not None else None
+
+    def _llm_stats(self) -> Optional[Dict]:
+        gateway = assistant.llm_gateway.get_if_ready()
+        return gateway.stats() if gateway is not None else None
+
+    def stats(self) -> Dict:
+        with self.counters_lock:
+            latencies = np.asarray(self.latencies) if self.latencies else None
+            counters = {'turns_completed': self.turns_completed, 'context_tokens': self.context_tokens,
+                        'context_tokens_saved': self.context_tokens_saved,
+                        'rejected_uploads': self.rejected_uploads}
+        with self.sessions_lock:
+            sessions = len(self.sessions)
+        return {
+            'sessions': sessions,
+            **counters,
+            'whisper': self.decoder.stats(),
+            'retrieval': self.retriever.stats(),
+            'response_cache': self._response_cache_stats(),
+            'llm': self._llm_stats(),
+            'reply_latency_p50': float(np.percentile(latencies, 50)) if latencies is not None else None,
+            'reply_latency_p95': float(np.percentile(latencies, 95)) if latencies is not None else None,
+            'models_ready': {resource.name: resource.is_ready
+                             for resource in (assistant.whisper_model, assistant.rag_system)}
+        }
+
+
+class AssistantRequestHandler(BaseHTTPRequestHandler):
+    server_state: AssistantServer = None
+    protocol_version = "HTTP/1.1"
+
+    SESSION_PATH = re.compile(r"^/sessions/([0-9a-f]+)(/audio|/events)?$")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _session(self, match) -> Optional[Session]:
+        session = self.server_state.get_session(match.group(1))
+        if session is None:
+            self._send_json(404, {'error': "unknown session"})
+        return session
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        if path == "/sessions":
+            session = self.server_state.create_session()
+            if session is None:
+                self._send_json(503, {'error': "too many sessions"}, {'Retry-After': "5"})
+            else:
+                self._send_json(201, {'session_id': session.id, 'sample_rate': config.SAMPLE_RATE,
+                                      'frame_bytes': session.frame_bytes})
+            return
+
+        match = self.SESSION_PATH.match(path)
+        if not match or match.group(2) != "/audio":
+            self._send_json(404, {'error': "not found"})
+            return
+        session = self._session(match)
+        if session is None:
+            return
+        if not self.server_state.accept_audio(session, body):
+            self._send_json(429, {'error': "busy, retry this chunk"}, {'Retry-After': "0.2"})
+            return
+        self._send_json(202, {'in_flight': session.in_flight})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self._send_json(200, self.server_state.stats())
+            return
+
+        match = self.SESSION_PATH.match(url.path)
+        if not match or match.group(2) != "/events":
+            self._send_json(404, {'error': "not found"})
+            return
+        session = self._session(match)
+        if session is None:
+            return
+        try:
+            wait = float(parse_qs(url.query).get('wait', ['0'])[0])
+        except ValueError:
+            wait = float('nan')
+        if not 0 <= wait < float('inf'):
+            self._send_json(400, {'error': "wait must be a number of seconds >= 0"})
+            return
+        wait = min(wait, 30.0)
+        self._send_json(200, {'events': session.wait_events(wait)})
+
+    def do_DELETE(self):
+        match = self.SESSION_PATH.match(urlparse(self.path).path)
+        if not match or match.group(2):
+            self._send_json(404, {'error': "not found"})
+            return
+        closed = self.server_state.close_session(match.group(1))
+        self._send_json(200 if closed else 404, {'closed': closed})
+
+
+def start_server(host: str, port: int) -> ThreadingHTTPServer:
+    state = AssistantServer()
+    handler = type('ConfiguredAssistantRequestHandler', (AssistantRequestHandler,), {'server_state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the voice assistant to many sessions with shared models")
+    parser.add_argument('--host', default=config.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT)
+    args = parser.parse_args()
+
+    if not config.OPENAI_API_KEY or config.OPENAI_API_KEY == "YOUR_API_KEY_HERE":
+        print("Error: Please set your OpenAI API key in config.py or as environment variable")
+        return
+
+    assistant.start_background_loading()
+    server = start_server(args.host, args.port)
+    print(f"Assistant server on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("Startup times:")
+        assistant.print_startup_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Audio File Replay
+Reads recorded audio as 16-bit mono PCM at the assistant's sample rate and feeds it
+frame by frame through the same AudioBuffer/VAD endpointing the microphone uses.
+"""
+
+import wave
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+
+
+def load_pcm16(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Mono int16 samples at sample_rate (WAV via the wave module, anything else via ffmpeg/whisper)"""
+    if path.lower().endswith('.wav'):
+        with wave.open(path, 'rb') as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            raw = wav.readframes(wav.getnframes())
+        if width != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        samples = np.frombuffer(raw, dtype=np.int16)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        if rate != sample_rate:
+            from math import gcd
+            from scipy.signal import resample_poly
+            divisor = gcd(rate, sample_rate)
+            resampled = resample_poly(samples.astype(np.float32), sample_rate // divisor, rate // divisor)
+            samples = np.clip(resampled, -32768, 32767).astype(np.int16)
+        return samples
+
+    import whisper  # decodes and resamples any format through ffmpeg
+    audio = whisper.load_audio(path, sr=sample_rate)
+    return np.clip(audio * 32768.0, -32768, 32767).astype(np.int16)
+
+
+def iter_frames(samples: np.ndarray, frame_size: int) -> Iterator[bytes]:
+    """Consecutive full frames as raw bytes (a trailing partial frame is dropped)"""
+    for start in range(0, len(samples) - frame_size + 1, frame_size):
+        yield samples[start:start + frame_size].tobytes()
+
+
+def replay_utterances(samples: np.ndarray, new_buffer: Callable[[], object], frame_size: int,
+                      sample_rate: int = 16000, trailing_silence_ms: int = 1500
+                      ) -> Iterator[Tuple[float, float, np.ndarray]]:
+    """Yield (start seconds, endpoint seconds, float32 audio) for every utterance the VAD finds;
+    silence is appended so a final utterance still reaches its endpoint"""
+    buffer = new_buffer()
+    silence = np.zeros(int(sample_rate * trailing_silence_ms / 1000), dtype=np.int16)
+    padded = np.concatenate([samples, silence])
+    frame_seconds = frame_size / sample_rate
+
+    for index, frame in enumerate(iter_frames(padded, frame_size)):
+        if buffer.add_frame(frame):
+            audio = buffer.get_audio_data()
+            if audio is None:
+                continue
+            end = (index + 1) * frame_seconds
+            start = max(0.0, end - len(audio) / sample_rate)
+            yield start, end, np.array(audio, dtype=np.float32, copy=True)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Batch Transcription
+Runs the assistant's speech path over a directory of recordings: each file is split
+into utterances with the same AudioBuffer/webrtcvad endpointing as the microphone,
+then transcribed with Whisper in a process pool (one model per worker process).
+Utterances are written as JSON lines; a file is only recorded as done once all of
+its utterances are on disk, so an interrupted run picks up where it stopped.
+
+    python batch_transcribe.py recordings/ --output transcripts.jsonl --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+import config
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg', '.webm')
+
+# Per-worker Whisper model, created by the pool initializer
+_worker_model = None
+
+
+def init_worker(model_size: str, threads: int):
+    """Load Whisper once per worker process"""
+    global _worker_model
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    import torch
+    import whisper
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_size, device="cpu")
+
+
+def transcribe_file(path: str, rel_path: str, fingerprint: Dict) -> Dict:
+    """Segment one recording and transcribe every utterance; returns all records for the file"""
+    from audio_replay import load_pcm16, replay_utterances
+    from french_vad_assistant import AudioBuffer
+
+    started = time.perf_counter()
+    sample_rate = config.SAMPLE_RATE
+    frame_size = config.FRAME_DURATION * sample_rate // 1000
+    samples = load_pcm16(path, sample_rate)
+    new_buffer = lambda: AudioBuffer(sample_rate, config.FRAME_DURATION)
+
+    utterances = []
+    decode_seconds = 0.0
+    for index, (start, end, audio) in enumerate(replay_utterances(samples, new_buffer, frame_size, sample_rate)):
+        decode_started = time.perf_counter()
+        result = _worker_model.transcribe(audio, language="fr", fp16=False)
+        elapsed = time.perf_counter() - decode_started
+        decode_seconds += elapsed
+        utterances.append({
+            'file': rel_path,
+            'utterance': index,
+            'start': round(start, 3),
+            'end': round(end, 3),
+            'text': result["text"].strip(),
+            'decode_seconds': round(elapsed, 3)
+        })
+
+    return {
+        'utterances': utterances,
+        'done': {
+            'file': rel_path,
+            'done': True,
+            **fingerprint,
+            'utterance_count': len(utterances),
+            'audio_seconds': round(len(samples) / sample_rate, 3),
+            'decode_seconds': round(decode_seconds, 3),
+            'wall_seconds': round(time.perf_counter() - started, 3),
+            'worker': os.getpid()
+        }
+    }
+
+
+def find_audio_files(input_dir: str) -> List[Path]:
+    return sorted(p for p in Path(input_dir).rglob('*') if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS)
+
+
+def file_fingerprint(path: Path) -> Dict:
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def load_completed(output_path: str, current: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Done records of a previous run. Records of files that never finished or have changed
+    since (per current fingerprints), and a torn last line from a crash, are dropped by
+    rewriting the file."""
+    if not os.path.exists(output_path):
+        return {}
+
+    records = []
+    damaged = False
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                damaged = True
+
+    completed = {}
+    for record in records:
+        if not record.get('done'):
+            continue
+        fingerprint = current.get(record['file'])
+        if fingerprint is None or all(record.get(key) == value for key, value in fingerprint.items()):
+            completed[record['file']] = record
+    kept = [record for record in records if record['file'] in completed]
+    if damaged or len(kept) != len(records):
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in kept:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, output_path)
+        print(f"Dropped {len(records) - len(kept)} records of unfinished or changed files from {output_path}")
+    return completed
+
+
+def write_file_records(out, result: Dict):
+    """Append a file's utterances followed by its done marker, then flush to disk"""
+    lines = [json.dumps(record, ensure_ascii=False) for record in result['utterances']]
+    lines.append(json.dumps(result['done'], ensure_ascii=False))
+    out.write("\n".join(lines) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Transcribe a directory of French recordings with VAD segmentation")
+    parser.add_argument('input_dir')
+    parser.add_argument('--output', default="transcripts.jsonl")
+    parser.add_argument('--workers', type=int, default=cpu_count, help="worker processes, one Whisper model each")
+    parser.add_argument('--threads', type=int, default=None, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument('--model', default=config.MODEL_SIZE, help="Whisper model size")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, cpu_count // workers)
+
+    files = {str(path.relative_to(args.input_dir)): path for path in find_audio_files(args.input_dir)}
+    fingerprints = {rel_path: file_fingerprint(path) for rel_path, path in files.items()}
+    completed = load_completed(args.output, fingerprints)
+    pending = [(str(path), rel_path, fingerprints[rel_path])
+               for rel_path, path in files.items() if rel_path not in completed]
+
+    print(f"{len(files)} audio files, {len(files) - len(pending)} already done, {len(pending)} to transcribe "
+          f"with {workers} workers x {threads} threads")
+    if not pending:
+        return
+
+    started = time.perf_counter()
+    audio_seconds = 0.0
+    failures = 0
+    with open(args.output, 'a', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                initargs=(args.model, threads)) as executor:
+        # Longest files first keeps the workers busy until the end
+        pending.sort(key=lambda item: item[2]['size'], reverse=True)
+        futures = {executor.submit(transcribe_file, *item): item[1] for item in pending}
+        try:
+            for count, future in enumerate(as_completed(futures), 1):
+                rel_path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures += 1
+                    print(f"[{count}/{len(pending)}] {rel_path}: failed: {e}")
+                    continue
+                write_file_records(out, result)
+                done = result['done']
+                audio_seconds += done['audio_seconds']
+                print(f"[{count}/{len(pending)}] {rel_path}: {done['utterance_count']} utterances, "
+                      f"{done['audio_seconds']:.0f}s audio in {done['wall_seconds']:.1f}s")
+        except KeyboardInterrupt:
+            print("\nInterrupted; finished files are saved, rerun to continue")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    elapsed = time.perf_counter() - started
+    print(f"Transcribed {audio_seconds / 60:.1f} min of audio in {elapsed / 60:.1f} min "
+          f"({audio_seconds / max(elapsed, 1e-9):.1f}x real time)"
+          + (f", {failures} files failed" if failures else ""))
+
+
+if __name__ == "__main__":
+    main()
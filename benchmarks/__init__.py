@@ -0,0 +1 @@
+"""Offline benchmarks for the French voice assistant (run with python -m benchmarks.<name>)"""
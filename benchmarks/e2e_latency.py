@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+End-to-End Voice Loop Latency Benchmark
+Replays recorded French WAV files through AudioBuffer/VAD, transcribe_audio,
+get_cultural_context and get_ai_response, with the LLM served by the local mock
+OpenAI server, and writes per-stage and end-to-end p50/p95/p99 as JSON.
+Runs offline on a CPU-only box once the Whisper and sentence-transformers models
+are in the local cache. Without recordings in --wav-dir (or with --synthetic) it
+generates deterministic speech-like fixtures (benchmarks/synthetic_speech.py) whose
+utterances stand in for fixed French questions.
+
+    python -m benchmarks.e2e_latency --wav-dir benchmarks/fixtures --runs 3 --output e2e.json
+    python -m benchmarks.e2e_latency --compare e2e_before.json e2e.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+STAGES = ["vad", "asr", "retrieval", "llm_ttft", "llm_total", "e2e_first_token", "e2e_total"]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """count/mean/p50/p95/p99/max of a list of seconds"""
+    if not values:
+        return {'count': 0}
+    data = np.asarray(values, dtype=np.float64)
+    return {
+        'count': int(len(data)),
+        'mean': float(data.mean()),
+        'p50': float(np.percentile(data, 50)),
+        'p95': float(np.percentile(data, 95)),
+        'p99': float(np.percentile(data, 99)),
+        'max': float(data.max())
+    }
+
+
+def compare(old_path: str, new_path: str):
+    """Print p50/p95 of two result files side by side"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)['stages']
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)['stages']
+    print(f"{'stage':<18}{'p50 old':>10}{'p50 new':>10}{'p95 old':>10}{'p95 new':>10}{'p95 ratio':>11}")
+    for stage in STAGES:
+        a, b = old.get(stage, {}), new.get(stage, {})
+        if not a.get('count') or not b.get('count'):
+            continue
+        print(f"{stage:<18}{a['p50']:>10.3f}{b['p50']:>10.3f}{a['p95']:>10.3f}{b['p95']:>10.3f}"
+              f"{b['p95'] / a['p95'] if a['p95'] else float('nan'):>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark for the voice loop")
+    parser.add_argument('--wav-dir', default=str(Path(__file__).parent / "fixtures"))
+    parser.add_argument('--synthetic', action='store_true',
+                        help="use generated speech-like fixtures even if --wav-dir has recordings")
+    parser.add_argument('--runs', type=int, default=3, help="passes over all fixtures")
+    parser.add_argument('--warmup', type=int, default=1, help="utterances decoded before measuring")
+    parser.add_argument('--llm-ttft-ms', type=float, default=300.0)
+    parser.add_argument('--llm-token-ms', type=float, default=20.0)
+    parser.add_argument('--llm-jitter-ms', type=float, default=50.0)
+    parser.add_argument('--llm-tail-rate', type=float, default=0.0, help="share of LLM requests that are slow")
+    parser.add_argument('--llm-tail-ms', type=float, default=3000.0, help="extra first-token delay of slow requests")
+    parser.add_argument('--no-rag', action='store_true', help="skip loading the cultural knowledge index")
+    parser.add_argument('--keep-caches', action='store_true', help="don't clear RAG query caches between turns")
+    parser.add_argument('--output', default="e2e_latency.json")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    wav_files = [] if args.synthetic else sorted(str(p) for p in Path(args.wav_dir).glob('*.wav'))
+    if not wav_files and not args.synthetic:
+        print(f"No .wav fixtures found in {args.wav_dir}, using synthetic speech "
+              f"(see benchmarks/fixtures/README.md)")
+
+    import config
+    import french_vad_assistant as assistant
+    from audio_replay import load_pcm16, replay_utterances
+    from benchmarks.synthetic_speech import synthetic_fixtures
+    from lazy_loader import LazyResource
+    from mock_openai_server import MockSettings, start_mock_server
+
+    # LLM calls go through the assistant's gateway to the local stand-in
+    settings = MockSettings(args.llm_ttft_ms, args.llm_token_ms, args.llm_jitter_ms, seed=0,
+                            tail_rate=args.llm_tail_rate, tail_ms=args.llm_tail_ms)
+    server, base_url = start_mock_server(settings=settings)
+    config.OPENAI_API_KEY = "mock"
+    config.OPENAI_BASE_URL = base_url
+    if args.no_rag:
+        assistant.rag_system = LazyResource("cultural knowledge", lambda: None)
+
+    assistant.start_background_loading()
+    assistant.whisper_model.get()
+    rag = assistant.rag_system.get()
+    gateway = assistant.llm_gateway.get()
+
+    frame_size = config.FRAME_DURATION * config.SAMPLE_RATE // 1000
+    new_buffer = lambda: assistant.AudioBuffer(config.SAMPLE_RATE, config.FRAME_DURATION)
+    if wav_files:
+        # Real recordings: the transcript is what retrieval and the LLM see
+        fixtures = [(path, load_pcm16(path, config.SAMPLE_RATE), None) for path in wav_files]
+    else:
+        fixtures = synthetic_fixtures(sample_rate=config.SAMPLE_RATE)
+
+    samples = {stage: [] for stage in STAGES}
+    utterances = []
+    warmup_left = args.warmup
+
+    for run in range(args.runs):
+        for path, pcm, questions in fixtures:
+            replay = replay_utterances(pcm, new_buffer, frame_size, config.SAMPLE_RATE,
+                                       trailing_silence_ms=config.MAX_SILENCE_MS + 300)
+            for index in itertools.count():
+                started = time.perf_counter()
+                try:
+                    start_s, end_s, audio = next(replay)
+                except StopIteration:
+                    break
+                vad_seconds = time.perf_counter() - started
+
+                started = time.perf_counter()
+                transcript = assistant.transcribe_audio(audio)
+                asr_seconds = time.perf_counter() - started
+                # Synthetic audio has no words; its scripted question goes downstream instead
+                text = questions[index % len(questions)] if questions else transcript
+
+                if rag is not None and not args.keep_caches:
+                    rag.query_cache.clear()
+                    rag.result_cache.clear()
+                started = time.perf_counter()
+                context = assistant.get_cultural_context(text or "")
+                retrieval_seconds = time.perf_counter() - started
+
+                _, timing = assistant.get_ai_response(text or "", context, stream=True)
+
+                if warmup_left > 0:
+                    warmup_left -= 1
+                    continue
+
+                record = {
+                    'run': run,
+                    'file': os.path.basename(path),
+                    'start': start_s,
+                    'end': end_s,
+                    'audio_seconds': len(audio) / config.SAMPLE_RATE,
+                    'transcript': transcript,
+                    'question': text,
+                    'vad': vad_seconds,
+                    'asr': asr_seconds,
+                    'asr_rtf': asr_seconds / max(len(audio) / config.SAMPLE_RATE, 1e-9),
+                    'retrieval': retrieval_seconds,
+                    'llm_ttft': timing.get('ttft'),
+                    'llm_total': timing.get('total')
+                }
+                if record['llm_ttft'] is not None:
+                    record['e2e_first_token'] = asr_seconds + retrieval_seconds + record['llm_ttft']
+                    record['e2e_total'] = asr_seconds + retrieval_seconds + record['llm_total']
+                utterances.append(record)
+                for stage in STAGES:
+                    if record.get(stage) is not None:
+                        samples[stage].append(record[stage])
+                print(f"{record['file']} [{start_s:5.1f}-{end_s:5.1f}s] asr {asr_seconds:.2f}s "
+                      f"rag {retrieval_seconds * 1000:.0f}ms first token {record.get('e2e_first_token', 0):.2f}s")
+
+    server.shutdown()
+
+    result = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'whisper_model': config.MODEL_SIZE,
+            'endpoint_silence_ms': config.MAX_SILENCE_MS,
+            'rag': rag is not None,
+            'fixtures': [os.path.basename(path) for path, _, _ in fixtures],
+            'synthetic_fixtures': not wav_files,
+            'runs': args.runs,
+            'llm': {'ttft_ms': args.llm_ttft_ms, 'token_ms': args.llm_token_ms, 'jitter_ms': args.llm_jitter_ms,
+                    'tail_rate': args.llm_tail_rate, 'tail_ms': args.llm_tail_ms, 'hedge': config.LLM_HEDGE,
+                    'gateway': gateway.stats()},
+            'startup': {resource.name: resource.timing()
+                        for resource in (assistant.whisper_model, assistant.rag_system)}
+        },
+        'stages': {stage: summarize(values) for stage, values in samples.items()},
+        'utterances': utterances
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'stage':<18}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for stage in STAGES:
+        stats = result['stages'][stage]
+        if stats.get('count'):
+            print(f"{stage:<18}{stats['p50']:>8.3f}{stats['p95']:>8.3f}{stats['p99']:>8.3f}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
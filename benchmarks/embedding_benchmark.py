@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Ingestion Pipeline Benchmark
+Runs the IngestionPipeline that process_documents_folder uses on the documents folder
+for every combination of encoder batch size and bucket window, and reports chunks/s
+against the first combination. PDF text is extracted once into a scratch text cache,
+so the timings cover chunking and embedding; --cold re-parses the PDFs on every run.
+
+    python -m benchmarks.embedding_benchmark --batch-sizes 32 64 128 --bucket-windows 64 1024 0 --threads 4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import config
+from index_store import file_sha256
+from ingestion import IngestionPipeline, TextCache
+from model_registry import DEFAULT_EMBEDDING_MODEL, get_embedding_model
+
+
+def list_files(folder: str) -> List[Tuple[str, str]]:
+    """[(path, content hash)] of the supported files, as process_documents_folder passes them"""
+    return [(str(path), file_sha256(str(path))) for path in sorted(Path(folder).rglob('*'))
+            if path.is_file() and path.suffix.lower() in ('.pdf', '.txt')]
+
+
+def run_pipeline(model, files, batch_size: int, bucket_window: int, threads: Optional[int],
+                 cache_dir: str) -> IngestionPipeline:
+    pipeline = IngestionPipeline(model, config.RAG_CHUNK_SIZE, config.RAG_OVERLAP, workers=config.INGEST_WORKERS,
+                                 batch_size=batch_size, encoder_threads=threads, bucket_window=bucket_window,
+                                 text_cache=TextCache(cache_dir))
+    with contextlib.redirect_stdout(io.StringIO()):  # per-file progress lines
+        pipeline.run(files)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion pipeline's batch size and bucket window")
+    parser.add_argument('--folder', default=config.DOCUMENTS_FOLDER)
+    parser.add_argument('--model', default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32, 64, 128])
+    parser.add_argument('--bucket-windows', type=int, nargs='+', default=[64, 1024, 0],
+                        help="chunks gathered before length bucketing (0 = whole corpus)")
+    parser.add_argument('--threads', type=int, default=config.EMBED_THREADS or os.cpu_count())
+    parser.add_argument('--repeats', type=int, default=2)
+    parser.add_argument('--cold', action='store_true', help="extract PDF text again on every run")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    files = list_files(args.folder)
+    if not files:
+        print(f"No PDF or text files in '{args.folder}'")
+        return
+
+    model = get_embedding_model(args.model)
+    model.encode(["échauffement"])  # warm-up
+
+    work_dir = tempfile.mkdtemp(prefix="ingestion-benchmark-")
+    try:
+        warm_cache = os.path.join(work_dir, "text_cache")
+        started = time.perf_counter()
+        pipeline = run_pipeline(model, files, config.EMBED_BATCH_SIZE, config.EMBED_BUCKET_WINDOW,
+                                args.threads, warm_cache)
+        print(f"{len(files)} files, {pipeline.stats['pages']} pages, {pipeline.stats['chunks']} chunks "
+              f"(first run with extraction {time.perf_counter() - started:.2f}s)")
+
+        results = {'files': len(files), 'pages': pipeline.stats['pages'], 'chunks': pipeline.stats['chunks'],
+                   'threads': args.threads, 'cold': args.cold, 'runs': []}
+        baseline = None
+        for batch_size in args.batch_sizes:
+            for bucket_window in args.bucket_windows:
+                best = float('inf')
+                for repeat in range(args.repeats):
+                    cache_dir = os.path.join(work_dir, f"cold_{batch_size}_{bucket_window}_{repeat}") \
+                        if args.cold else warm_cache
+                    pipeline = run_pipeline(model, files, batch_size, bucket_window, args.threads, cache_dir)
+                    best = min(best, pipeline.stats['seconds'])
+                baseline = baseline or best
+                chunks_per_second = pipeline.stats['chunks'] / best
+                print(f"batch_size={batch_size:<4d} bucket_window={bucket_window:<6d} {best:7.2f}s  "
+                      f"{chunks_per_second:7.1f} chunks/s  x{baseline / best:.2f}")
+                results['runs'].append({'batch_size': batch_size, 'bucket_window': bucket_window, 'seconds': best,
+                                        'chunks_per_second': chunks_per_second, 'speedup': baseline / best})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Retrieval Benchmark
+Runs the labelled French query set (benchmarks/retrieval_queries.json, one or more
+relevant documents per question) against every retrieval mode of MultiDocumentRAG
+and writes recall@k, MRR, query latency p50/p95/p99, QPS, index build time and
+memory footprint as JSON. --synthetic-chunks adds generated distractor chunks
+(vectors near real ones, text sampled from the corpus vocabulary) to follow how
+quality and latency scale from 10k to 1M chunks.
+
+    python -m benchmarks.retrieval_benchmark --output retrieval.json
+    python -m benchmarks.retrieval_benchmark --synthetic-chunks 10000 100000 1000000 --modes exact ivf hybrid
+    python -m benchmarks.retrieval_benchmark --compare retrieval_before.json retrieval.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+QUERIES_FILE = Path(__file__).parent / "retrieval_queries.json"
+RECALL_AT = (1, 3, 5, 10)
+
+# name -> (search mode, BM25 fused in, keyword fast path)
+MODES = {
+    'exact': ("exact", False, False),
+    'ivf': ("ivf", False, False),
+    'hybrid': ("exact", True, False),
+    'hybrid_ivf': ("ivf", True, False),
+    'fast_path': ("exact", True, True),
+}
+
+
+def load_queries(path: str) -> List[Dict]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def metadata_documents(path: str = "document_metadata.json") -> List[str]:
+    """File names of the works listed in document_metadata.json (either format it has had)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        metadata = json.load(f)
+    entries = metadata.values() if isinstance(metadata, dict) else metadata
+    return [os.path.basename(entry.get('file_path') or entry.get('path', '')) for entry in entries]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean of a list of seconds, in milliseconds"""
+    if not values:
+        return {}
+    data = np.asarray(values, dtype=np.float64) * 1000
+    return {'mean_ms': float(data.mean()), 'p50_ms': float(np.percentile(data, 50)),
+            'p95_ms': float(np.percentile(data, 95)), 'p99_ms': float(np.percentile(data, 99))}
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / (1024 * 1024)
+
+
+def index_footprint(rag) -> Dict[str, int]:
+    """Bytes of the searched matrix, IVF lists, BM25 postings and chunk texts"""
+    ann = rag.index.ann.to_arrays() if rag.index.ann is not None else {}
+    return {
+        'vectors': rag.index.nbytes(),
+        'ivf': int(sum(np.asarray(array).nbytes for array in ann.values())),
+        'bm25': int(sum(np.asarray(array).nbytes for array in rag.lexical.to_arrays().values())),
+        'chunks': int(sum(doc_info['chunks'].nbytes() for doc_info in rag.documents.values()))
+    }
+
+
+def synthetic_documents(documents: Dict[str, Dict], total_chunks: int, words_per_chunk: int = 40,
+                        chunks_per_doc: int = 10000, noise: float = 0.05, seed: int = 0) -> Dict[str, Dict]:
+    """Distractor documents: vectors are perturbed copies of real chunk vectors, texts are words
+    drawn from the real chunks, so both retrievers see realistic score distributions"""
+    from chunking import ChunkSpans
+
+    rng = np.random.default_rng(seed)
+    real = [doc_info for doc_info in documents.values() if len(doc_info['chunks'])]
+    matrix = np.vstack([np.asarray(doc_info['embeddings'], dtype=np.float32) for doc_info in real])
+    vocabulary = np.array(sorted({word for doc_info in real for chunk in doc_info['chunks'] for word in chunk.split()}))
+
+    synthetic = {}
+    for n, start in enumerate(range(0, total_chunks, chunks_per_doc)):
+        count = min(chunks_per_doc, total_chunks - start)
+        vectors = matrix[rng.integers(0, len(matrix), count)]
+        vectors = vectors + rng.normal(0, noise, vectors.shape).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        words = vocabulary[rng.integers(0, len(vocabulary), (count, words_per_chunk))]
+        texts = [(" ".join(row)).encode('utf-8') for row in words]
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        ends = np.cumsum(lengths + 1) - 1
+        spans = np.stack([ends - lengths, ends], axis=1)
+        doc_id = f"synthetic-{n:04d}"
+        synthetic[doc_id] = {'title': doc_id, 'path': doc_id, 'embeddings': vectors,
+                             'chunks': ChunkSpans(b" ".join(texts), spans), 'chunk_count': count}
+    return synthetic
+
+
+def set_mode(rag, mode: str, hybrid_weight: float, fast_path: Optional[float]):
+    search_mode, hybrid, keyword_fast_path = MODES[mode]
+    rag.index.search_mode = search_mode
+    rag.hybrid_weight = hybrid_weight if hybrid else 0.0
+    rag.lexical_fast_path = fast_path if keyword_fast_path else None
+    rag.query_cache.clear()
+    rag.result_cache.clear()
+
+
+def run_queries(rag, queries: List[Dict], top_k: int, repeats: int) -> Dict:
+    """Quality and latency of one mode: every query searched alone with cold caches, then
+    the whole set as one batch for throughput. Queries without any result and batched
+    results that differ from the single searches are counted, as they point at a search bug
+    rather than a ranking trade-off."""
+    ranks = []
+    single = []
+    recalls = {k: [] for k in RECALL_AT}
+    latencies = []
+    for repeat in range(repeats):
+        for item in queries:
+            rag.query_cache.clear()
+            rag.result_cache.clear()
+            started = time.perf_counter()
+            results = rag.search(item['query'], top_k=top_k)
+            latencies.append(time.perf_counter() - started)
+            if repeat:
+                continue
+            relevant = set(item['relevant'])
+            found = [result['doc_id'] for result in results]
+            single.append([(result['doc_id'], result['chunk']) for result in results])
+            ranks.append(next((rank for rank, doc_id in enumerate(found, 1) if doc_id in relevant), None))
+            for k in RECALL_AT:
+                recalls[k].append(len(relevant & set(found[:k])) / len(relevant))
+
+    rag.query_cache.clear()
+    rag.result_cache.clear()
+    started = time.perf_counter()
+    batched = rag.search_batch([item['query'] for item in queries], top_k=top_k)
+    batch_seconds = time.perf_counter() - started
+
+    result = {f'recall@{k}': float(np.mean(values)) for k, values in recalls.items() if k <= top_k}
+    result['mrr'] = float(np.mean([1.0 / rank if rank else 0.0 for rank in ranks]))
+    result['empty'] = sum(1 for hits in single if not hits)
+    result['batch_mismatches'] = sum(1 for hits, results in zip(single, batched)
+                                     if hits != [(r['doc_id'], r['chunk']) for r in results])
+    result['latency'] = summarize(latencies)
+    result['qps'] = len(latencies) / sum(latencies) if latencies else 0.0
+    result['batch_qps'] = len(queries) / batch_seconds if batch_seconds else 0.0
+    return result
+
+
+def print_table(corpus: Dict, top_k: int):
+    print(f"\n{corpus['chunks']} chunks  (build {corpus['build_seconds']:.2f}s, "
+          f"index {sum(corpus['memory'].values()) / 1e6:.1f} MB)")
+    print(f"{'mode':<12}{'R@1':>7}{'R@' + str(min(top_k, 5)):>7}{'MRR':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'QPS':>8}{'empty':>7}")
+    for mode, stats in corpus['modes'].items():
+        print(f"{mode:<12}{stats['recall@1']:>7.3f}{stats[f'recall@{min(top_k, 5)}']:>7.3f}{stats['mrr']:>7.3f}"
+              f"{stats['latency']['p50_ms']:>9.2f}{stats['latency']['p95_ms']:>9.2f}"
+              f"{stats['latency']['p99_ms']:>9.2f}{stats['qps']:>8.1f}{stats.get('empty', 0):>7}")
+        if stats.get('batch_mismatches'):
+            print(f"  warning: {stats['batch_mismatches']} batched results differ from single searches")
+
+
+def compare(old_path: str, new_path: str):
+    """Print MRR and p95 latency per corpus size and mode of two result files side by side"""
+    with open(old_path, encoding='utf-8') as f:
+        old = {corpus['chunks']: corpus for corpus in json.load(f)['corpora']}
+    with open(new_path, encoding='utf-8') as f:
+        new = {corpus['chunks']: corpus for corpus in json.load(f)['corpora']}
+    print(f"{'chunks':>9} {'mode':<12}{'MRR old':>9}{'MRR new':>9}{'p95 old':>9}{'p95 new':>9}")
+    for chunks in sorted(old.keys() & new.keys()):
+        for mode in old[chunks]['modes']:
+            if mode not in new[chunks]['modes']:
+                continue
+            a, b = old[chunks]['modes'][mode], new[chunks]['modes'][mode]
+            print(f"{chunks:>9} {mode:<12}{a['mrr']:>9.3f}{b['mrr']:>9.3f}"
+                  f"{a['latency']['p95_ms']:>9.2f}{b['latency']['p95_ms']:>9.2f}")
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency over the cultural corpus")
+    parser.add_argument('--folder', default=config.DOCUMENTS_FOLDER)
+    parser.add_argument('--queries', default=str(QUERIES_FILE))
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3, help="passes over the query set for latency")
+    parser.add_argument('--synthetic-chunks', type=int, nargs='*', default=[],
+                        help="also run with this many generated distractor chunks added")
+    parser.add_argument('--synthetic-words', type=int, default=40, help="words per synthetic chunk")
+    parser.add_argument('--vector-dtype', default=config.RAG_VECTOR_DTYPE)
+    parser.add_argument('--vector-dim', type=int, default=config.RAG_VECTOR_DIM)
+    parser.add_argument('--output', default="retrieval_benchmark.json")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    from multi_document_rag import MultiDocumentRAG
+
+    queries = load_queries(args.queries)
+    labelled = {doc_id for item in queries for doc_id in item['relevant']}
+    missing = [name for name in metadata_documents() if name not in labelled]
+    if missing:
+        print(f"Warning: no labelled queries for {', '.join(missing)}")
+
+    # Build into a scratch directory so the assistant's index is left alone
+    work_dir = tempfile.mkdtemp(prefix="retrieval-benchmark-")
+    rag = MultiDocumentRAG(chunk_size=config.RAG_CHUNK_SIZE, overlap=config.RAG_OVERLAP,
+                           ingest_workers=config.INGEST_WORKERS, embed_batch_size=config.EMBED_BATCH_SIZE,
+                           embed_threads=config.EMBED_THREADS, bucket_window=config.EMBED_BUCKET_WINDOW,
+                           nprobe=config.RAG_ANN_NPROBE, lexical_min_score=config.RAG_LEXICAL_MIN_SCORE,
+                           lexical_fast_path_min_terms=config.RAG_LEXICAL_FAST_PATH_MIN_TERMS,
+                           vector_dtype=args.vector_dtype, vector_dimension=args.vector_dim)
+    rag.cache_dir = os.path.join(work_dir, "index")
+    rag.metadata_file = os.path.join(work_dir, "document_metadata.json")
+
+    corpora = []
+    try:
+        started = time.perf_counter()
+        rag.process_documents_folder(args.folder)
+        ingest_seconds = time.perf_counter() - started
+        if not rag.documents:
+            print(f"No documents indexed from {args.folder}")
+            sys.exit(1)
+        unknown = labelled - set(rag.documents)
+        if unknown:
+            print(f"Warning: labelled documents not in the index: {', '.join(sorted(unknown))}")
+        real_documents = dict(rag.documents)
+
+        for extra in [0] + sorted(args.synthetic_chunks):
+            documents = dict(real_documents)
+            if extra:
+                print(f"\nGenerating {extra} synthetic chunks...")
+                documents.update(synthetic_documents(real_documents, extra, args.synthetic_words))
+            rag.documents = documents
+            rag.index.search_mode = "exact"  # the IVF index is built and timed separately
+            started = time.perf_counter()
+            rag.build_index()
+            build_seconds = time.perf_counter() - started
+            ivf_seconds = None
+            if any(MODES[mode][0] == "ivf" for mode in args.modes):
+                started = time.perf_counter()
+                rag.index.build_ann()
+                ivf_seconds = time.perf_counter() - started
+
+            corpus = {
+                'chunks': len(rag.index),
+                'synthetic_chunks': extra,
+                'build_seconds': build_seconds,
+                'ivf_build_seconds': ivf_seconds,
+                'ingest_seconds': ingest_seconds if not extra else None,
+                'memory': index_footprint(rag),
+                'modes': {}
+            }
+            for mode in args.modes:
+                set_mode(rag, mode, config.RAG_HYBRID_WEIGHT, config.RAG_LEXICAL_FAST_PATH)
+                corpus['modes'][mode] = run_queries(rag, queries, args.top_k, args.repeats)
+            corpus['peak_rss_mb'] = peak_rss_mb()
+            corpora.append(corpus)
+            print_table(corpus, args.top_k)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'model': rag.model_name,
+            'chunk_size': rag.chunk_size,
+            'overlap': rag.overlap,
+            'vector_storage': {'dtype': args.vector_dtype, 'dimension': args.vector_dim},
+            'hybrid_weight': config.RAG_HYBRID_WEIGHT,
+            'nprobe': rag.index.nprobe,
+            'queries': len(queries),
+            'top_k': args.top_k,
+            'documents': sorted(real_documents)
+        },
+        'corpora': corpora
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
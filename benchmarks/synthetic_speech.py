@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Synthetic Speech Fixtures
+Deterministic speech-like recordings for the latency benchmarks when no real French
+recordings are available: voiced syllables (a glottal pulse train with a falling pitch
+contour, shaped by vowel formants) at a normal speaking rate, separated by silence, so
+webrtcvad and the endpointing see utterances of realistic length. Whisper decodes them at
+the same cost per second of audio as speech, but the transcripts are meaningless, so each
+utterance carries the French question that stands in for it downstream.
+"""
+
+import wave
+from typing import List, Tuple
+
+import numpy as np
+
+# First two formants (Hz) of French vowels
+VOWELS = {'a': (750, 1300), 'e': (400, 2200), 'i': (300, 2300), 'o': (450, 850),
+          'u': (320, 1650), 'ou': (320, 800), 'an': (650, 1050)}
+
+QUESTIONS = [
+    "Qui est le petit prince et d'où vient-il ?",
+    "Pourquoi le renard veut-il être apprivoisé ?",
+    "Comment Coco Chanel a-t-elle commencé sa carrière ?",
+    "Pourquoi Cyrano n'ose-t-il pas parler à Roxane ?",
+    "Que s'est-il passé pendant la trêve de Noël ?",
+    "Qui sont les femmes espagnoles du sixième étage ?",
+]
+
+
+def _resonate(signal: np.ndarray, frequency: float, bandwidth: float, sample_rate: int) -> np.ndarray:
+    """Two-pole resonator (one formant)"""
+    r = np.exp(-np.pi * bandwidth / sample_rate)
+    a1, a2 = 2 * r * np.cos(2 * np.pi * frequency / sample_rate), -r * r
+    out = np.zeros_like(signal)
+    y1 = y2 = 0.0
+    for i, x in enumerate(signal):
+        y = x + a1 * y1 + a2 * y2
+        out[i] = y
+        y1, y2 = y, y1
+    return out
+
+
+def syllable(rng: np.random.Generator, sample_rate: int, pitch: float) -> np.ndarray:
+    """One voiced syllable of 120-260 ms"""
+    length = int(sample_rate * rng.uniform(0.12, 0.26))
+    f0 = pitch * np.linspace(1.05, 0.95, length)
+    phase = np.cumsum(f0 / sample_rate)
+    pulses = (np.diff(np.floor(phase), prepend=0) > 0).astype(np.float64)
+    pulses += rng.normal(0, 0.02, length)  # a little breath noise
+    f1, f2 = VOWELS[rng.choice(list(VOWELS))]
+    voiced = _resonate(pulses, f1, 90, sample_rate) + 0.5 * _resonate(pulses, f2, 120, sample_rate)
+    envelope = np.sin(np.linspace(0, np.pi, length)) ** 0.5
+    return voiced * envelope
+
+
+def utterance(rng: np.random.Generator, sample_rate: int, seconds: float) -> np.ndarray:
+    """Syllables with short word gaps until the utterance is about `seconds` long"""
+    pitch = rng.uniform(110, 210)
+    parts, total = [], 0
+    while total < seconds * sample_rate:
+        parts.append(syllable(rng, sample_rate, pitch))
+        if rng.random() < 0.3:
+            parts.append(np.zeros(int(sample_rate * rng.uniform(0.05, 0.12))))
+        total = sum(len(part) for part in parts)
+        pitch *= 0.99
+    audio = np.concatenate(parts)
+    return audio / np.abs(audio).max()
+
+
+def synthetic_recording(seed: int, questions: List[str], sample_rate: int = 16000,
+                        gap_seconds: float = 2.0) -> np.ndarray:
+    """int16 mono recording with one speech-like utterance per question, 1.5-3.5 s each"""
+    rng = np.random.default_rng(seed)
+    silence = np.zeros(int(sample_rate * gap_seconds))
+    parts = [silence]
+    for question in questions:
+        seconds = min(3.5, max(1.5, len(question.split()) * 0.35))
+        parts += [utterance(rng, sample_rate, seconds) * 0.5, silence]
+    audio = np.concatenate(parts)
+    return np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+
+
+def synthetic_fixtures(count: int = 3, per_file: int = 2,
+                       sample_rate: int = 16000) -> List[Tuple[str, np.ndarray, List[str]]]:
+    """(name, int16 samples, question per utterance) for `count` recordings; same output every run"""
+    fixtures = []
+    for i in range(count):
+        questions = [QUESTIONS[(i * per_file + j) % len(QUESTIONS)] for j in range(per_file)]
+        fixtures.append((f"synthetic_{i + 1}.wav", synthetic_recording(i, questions, sample_rate), questions))
+    return fixtures
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = 16000):
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
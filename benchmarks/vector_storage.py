@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Vector Storage Report
+Compares compressed search matrices (float16, int8, PCA-projected) against exact
+float32 search on the built index: recall@k of the float32 top-k, per-query
+latency and matrix size. --synthetic-rows grows the matrix with perturbed copies
+of real chunk vectors to see how the trade-off scales.
+
+    python -m benchmarks.vector_storage --dtypes float16 int8 --dims 128 64 --top-k 10
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+DEFAULT_QUERIES = [
+    "Qui est le petit prince et d'où vient-il ?",
+    "Pourquoi le renard veut-il être apprivoisé ?",
+    "Que représente la rose pour le petit prince ?",
+    "Comment Coco Chanel a-t-elle commencé sa carrière ?",
+    "Pourquoi Cyrano n'ose-t-il pas parler à Roxane ?",
+    "Que s'est-il passé pendant la trêve de Noël en 1914 ?",
+    "Qui sont les femmes espagnoles du sixième étage ?",
+    "Comment dit-on bonjour poliment en français ?",
+    "Quels mots utilise-t-on pour parler de la famille ?",
+    "Quelle est la vie d'une bonne à Paris dans les années soixante ?",
+]
+
+
+def synthetic_rows(matrix: np.ndarray, count: int, noise: float = 0.05, seed: int = 0) -> np.ndarray:
+    """count unit vectors near randomly chosen real rows"""
+    rng = np.random.default_rng(seed)
+    base = np.asarray(matrix[rng.integers(0, len(matrix), count)], dtype=np.float32)
+    rows = base + rng.normal(0, noise, base.shape).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of compressed vector storage")
+    parser.add_argument('--index-dir', default="multi_document_index")
+    parser.add_argument('--queries', help="file with one question per line (default: built-in French questions)")
+    parser.add_argument('--dtypes', nargs='+', default=["float16", "int8"])
+    parser.add_argument('--dims', type=int, nargs='*', default=[128, 64], help="PCA dimensions to try")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--synthetic-rows', type=int, default=0, help="perturbed rows added to the index")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    from index_store import load_index
+    from model_registry import get_embedding_model
+    from vector_codec import storage_report
+
+    try:
+        header, matrix, _ = load_index(args.index_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Cannot open index: {e} (run the assistant or setup first)")
+        sys.exit(1)
+    if len(matrix) == 0:
+        print(f"Index in {args.index_dir} is empty")
+        sys.exit(1)
+    if args.synthetic_rows:
+        matrix = np.vstack([matrix, synthetic_rows(matrix, args.synthetic_rows)])
+
+    if args.queries:
+        with open(args.queries, encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = DEFAULT_QUERIES
+    queries = get_embedding_model(header['model_name']).encode(questions)
+
+    settings = [{'dtype': dtype, 'dimension': None} for dtype in args.dtypes if dtype != "float32"]
+    for dimension in args.dims:
+        if dimension < matrix.shape[1]:
+            settings += [{'dtype': dtype, 'dimension': dimension} for dtype in args.dtypes]
+    print(f"{len(matrix)} vectors of {matrix.shape[1]} dimensions, {len(questions)} queries, top {args.top_k}")
+
+    rows = storage_report(matrix, queries, settings, top_k=args.top_k, repeats=args.repeats)
+    recall_key = f'recall@{args.top_k}'
+    baseline = rows[0]
+    print(f"{'storage':<16}{'MB':>9}{'size':>7}{recall_key:>11}{'p50 ms':>9}{'p95 ms':>9}")
+    for row in rows:
+        name = f"{row['dtype']}x{row['dimension']}"
+        print(f"{name:<16}{row['bytes'] / 1e6:>9.2f}{row['bytes'] / baseline['bytes']:>7.2f}"
+              f"{row[recall_key]:>11.3f}{row['latency_p50_ms']:>9.3f}{row['latency_p95_ms']:>9.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'vectors': len(matrix), 'queries': len(questions), 'top_k': args.top_k,
+                       'results': rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
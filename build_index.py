@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-Time Index Build
+Extracts, chunks and embeds the documents folder into the index directory the assistant
+opens at startup, then verifies the result: file checksums, row counts, vector norms, and
+that the index matches the current embedding model, chunker settings and document files.
+With RAG_INDEX_POLICY = "prebuilt" the assistant never embeds documents itself; it opens
+this index or runs without cultural context.
+
+    python build_index.py            # build (incrementally) and verify
+    python build_index.py --verify   # only check the existing index
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import config
+
+
+def print_stats(rag, seconds=None):
+    header = rag.header
+    storage = header.get('vector_storage', {'dtype': "float32", 'dimension': None})
+    print(f"\nIndex: {rag.cache_dir}")
+    print(f"  model        {header['model_name']} ({header['dimension']} dimensions)")
+    print(f"  chunker      v{header.get('chunker', {}).get('version')}, {header['chunk_size']} words, "
+          f"{header['overlap']} overlap")
+    print(f"  corpus       {len(header['documents'])} documents, {header['chunk_count']} chunks, "
+          f"hash {header.get('corpus_hash', '-')[:12]}")
+    print(f"  search       {storage['dtype']} vectors"
+          + (f" at {storage['dimension']} dimensions" if storage.get('dimension') else "")
+          + (f", IVF with {header['ann']['n_lists']} lists" if 'ann' in header else "")
+          + f", {header.get('lexical', {}).get('terms', 0)} BM25 terms")
+    files = header.get('files', {})
+    print(f"  on disk      {sum(entry['bytes'] for entry in files.values()) / 1e6:.1f} MB in {len(files)} files")
+    if seconds is not None:
+        print(f"  build time   {seconds:.1f}s")
+    for doc in rag.get_document_stats():
+        print(f"    {doc['chunks']:>6}  {doc['title']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and verify the document index ahead of time")
+    parser.add_argument('--folder', default=config.DOCUMENTS_FOLDER)
+    parser.add_argument('--verify', action='store_true', help="check the existing index without building")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.folder):
+        print(f"Documents folder '{args.folder}' not found. Run 'python setup_documents.py' first.")
+        sys.exit(1)
+
+    from index_store import verify_index
+    from model_registry import configured_rag
+    rag = configured_rag()
+
+    seconds = None
+    if not args.verify:
+        started = time.perf_counter()
+        rag.process_documents_folder(args.folder)
+        seconds = time.perf_counter() - started
+
+    print("\nVerifying...")
+    problems = verify_index(rag.cache_dir) if os.path.exists(rag.cache_dir) else []
+    if not problems and not rag.open_prebuilt(args.folder):
+        problems.append("index does not match the current settings and documents")
+    if problems:
+        for problem in problems:
+            print(f"  - {problem}")
+        print("Index is NOT usable" + ("; run 'python build_index.py'" if args.verify else ""))
+        sys.exit(1)
+
+    print_stats(rag, seconds)
+    print("\nIndex OK")
+
+
+if __name__ == "__main__":
+    main()
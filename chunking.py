@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Sentence-Aware Chunking
+A document's text is kept once as UTF-8 bytes (whitespace collapsed to single spaces)
+and its chunks are (start, end) byte offsets into it, so the overlap between neighbouring chunks is never stored twice.
+Chunks end on a sentence boundary when there is one in the second half of the
+window, and the next chunk starts at the sentence beginning closest to the
+requested overlap. Chunk strings are only built when a chunk is read.
+"""
+
+import re
+import numpy as np
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+WORD = re.compile(rb"\S+")
+# Word ending a sentence: . ! ? or … followed by closing quotes/brackets (», ”, ", ), ])
+SENTENCE_END = re.compile(rb"(?:[.!?]|\xe2\x80\xa6)(?:[\"')\]]|\xc2\xbb|\xe2\x80\x9d)*$")
+PAGE_JOINER = b" "
+# Stored in index headers; bump whenever a change to this module moves chunk boundaries
+CHUNKER_VERSION = 1
+
+
+def span_text(text, start: int, end: int) -> str:
+    """Chunk string of a byte span"""
+    return bytes(text[int(start):int(end)]).decode('utf-8')
+
+
+class ChunkSpans(Sequence):
+    """Read-only list of chunk strings backed by one text buffer and an (n, 2) offset array"""
+
+    __slots__ = ('text', 'spans')
+
+    def __init__(self, text=b'', spans: Optional[np.ndarray] = None):
+        self.text = text  # bytes, or a memoryview into a memory-mapped index file
+        self.spans = np.empty((0, 2), dtype=np.int64) if spans is None else spans
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        start, end = self.spans[i]
+        return span_text(self.text, start, end)
+
+    def nbytes(self) -> int:
+        """Memory taken by the text buffer and offsets"""
+        return len(self.text) + self.spans.nbytes
+
+
+def _cut(words: List[Tuple[int, int, bool]], chunk_size: int, overlap: int) -> Tuple[int, int]:
+    """(words in this chunk, index where the next chunk starts) for a window of at least chunk_size words"""
+    end = chunk_size
+    for i in range(chunk_size - 1, chunk_size // 2 - 1, -1):
+        if words[i][2]:
+            end = i + 1
+            break
+
+    target = end - overlap
+    best = None
+    for i in range(max(1, end - 2 * overlap), end + 1):
+        if words[i - 1][2]:
+            if best is None or abs(i - target) < abs(best - target):
+                best = i
+    if best is None:
+        best = max(1, target)
+    return end, best
+
+
+def stream_chunk_spans(pages: Iterable[str], chunk_size: int = 300, overlap: int = 50,
+                       text: Optional[bytearray] = None) -> Iterator[Tuple[int, int]]:
+    """Append pages to text (UTF-8, single-spaced like the old word-joined chunks) and yield chunk
+    byte spans as soon as enough words have arrived. Chunks hold at most chunk_size words."""
+    text = bytearray() if text is None else text
+    words: List[Tuple[int, int, bool]] = []  # (start, end, ends a sentence) from the current chunk start on
+
+    for page in pages:
+        data = ' '.join(page.split()).encode('utf-8')
+        if not data:
+            continue
+        if text:
+            text += PAGE_JOINER
+        base = len(text)
+        text += data
+        for match in WORD.finditer(data):
+            words.append((base + match.start(), base + match.end(), SENTENCE_END.search(match.group()) is not None))
+        # Keep one spare word so a chunk can start exactly after its last sentence
+        while len(words) > chunk_size:
+            end, next_start = _cut(words, chunk_size, overlap)
+            yield words[0][0], words[end - 1][1]
+            del words[:next_start]
+
+    if words:
+        yield words[0][0], words[-1][1]
+
+
+def chunk_spans(pages: Iterable[str], chunk_size: int = 300, overlap: int = 50) -> ChunkSpans:
+    """Chunk a whole document (a string or its pages) into a ChunkSpans list"""
+    if isinstance(pages, str):
+        pages = [pages]
+    text = bytearray()
+    spans = list(stream_chunk_spans(pages, chunk_size, overlap, text))
+    return ChunkSpans(bytes(text), np.asarray(spans, dtype=np.int64).reshape(-1, 2))
@@ -3,22 +3,76 @@ import os
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "YOUR_API_KEY_HERE")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. http://127.0.0.1:8765/v1 for mock_openai_server.py
 
 # Audio Configuration
 FRAME_DURATION = 30  # in ms
 SAMPLE_RATE = 16000  # Keep at 16kHz for Whisper optimal performance
 CHANNELS = 1
-RECORD_SECONDS = 10  # Allow longer phrases
+RECORD_SECONDS = 10  # Maximum utterance length; longer speech is cut off and processed
 MAX_SILENCE_MS = 1200  # More patience - stop after 1.2s of silence
+PIPELINED_RUNTIME = True  # Keep the mic open and run VAD/Whisper/RAG/LLM as concurrent stages
+PIPELINE_QUEUE_SIZE = 4  # Bound of the queues between pipeline stages
 
 # Whisper Configuration
 MODEL_SIZE = "small"  # tiny, base, small, medium, large - small for speed/accuracy balance
+STREAMING_TRANSCRIPTION = True  # Decode while the user is speaking; final transcript is ready at endpoint
+STREAMING_INTERVAL = 1.0  # Seconds between background decodes of the growing utterance
+
+# LLM Configuration
+LLM_STREAMING = True  # Print the reply token by token instead of waiting for the whole answer
+LLM_CONNECT_TIMEOUT = 3.0  # Seconds to open a connection to the API before the attempt fails
+LLM_READ_TIMEOUT = 10.0  # Seconds without data from the API before the attempt fails
+LLM_MAX_RETRIES = 2  # Extra attempts after timeouts, connection errors, 429 and 5xx
+LLM_HEDGE = True  # Send a second request when the first token is later than usual
+LLM_HEDGE_INITIAL_DELAY = 1.5  # Hedge delay until enough replies were timed; then the p95 time to first token
+LLM_HEDGE_MIN_DELAY = 0.3  # Never hedge earlier than this
+LLM_BREAKER_FAILURES = 5  # Consecutive failed attempts before requests fail fast with the fallback reply
+LLM_BREAKER_RESET = 30  # Seconds before a single probe request is let through again
+LLM_MAX_CONNECTIONS = 16  # Pooled keep-alive connections to the API
+SHOW_LATENCY = False  # Print time-to-first-token and total generation time after each reply
+RESPONSE_CACHE_ENABLED = True  # Reuse replies to near-identical questions with the same retrieved context
+RESPONSE_CACHE_FILE = "response_cache.sqlite3"
+RESPONSE_CACHE_THRESHOLD = 0.92  # Cosine similarity of question embeddings needed for a hit
+RESPONSE_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached reply expires (None = never)
+RESPONSE_CACHE_MAX_ENTRIES = 2000  # Least recently used replies are evicted beyond this
+RESPONSE_CACHE_PERSONAL = False  # Also cache personal questions to Lucas ("Quand tu étais petit...")
+TRACE_ENABLED = False  # Record timed spans per turn (listen, ASR, retrieval, LLM) and print a summary on exit
+TRACE_FILE = "traces.jsonl"  # One JSON record per turn when tracing is enabled
+
+# Server Configuration (assistant_server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8770
+SERVER_MAX_SESSIONS = 32  # Concurrent sessions; further session requests get 503
+SERVER_DECODE_BATCH = 4  # Utterances from different sessions decoded in one Whisper call
+SERVER_BATCH_WAIT_MS = 50  # How long a batch waits for more work before running
+SERVER_MAX_PENDING = 16  # Utterances waiting for Whisper before audio uploads get 429
+SERVER_SESSION_IN_FLIGHT = 2  # Unanswered turns per session before its uploads get 429
+SERVER_LLM_WORKERS = 8  # Concurrent OpenAI requests
+SERVER_SESSION_TIMEOUT = 300  # Seconds of inactivity before a session is dropped
 
 # Multi-Document RAG Configuration
 DOCUMENTS_FOLDER = "Info for French"  # Folder containing all cultural documents
 RAG_CHUNK_SIZE = 300  # Words per chunk
 RAG_OVERLAP = 50  # Overlap between chunks
-RAG_MAX_CONTEXT = 600  # Max characters of context to include
+RAG_TOP_K = 3  # Chunks retrieved per question before the context is assembled
+RAG_CONTEXT_TOKENS = 200  # Prompt token budget for the retrieved context (None = send whole chunks)
+RAG_SEARCH_MODE = "auto"  # exact, ivf, or auto (IVF once the index reaches RAG_ANN_MIN_CHUNKS)
+RAG_ANN_MIN_CHUNKS = 20000  # Chunk count above which "auto" switches to approximate search
+RAG_ANN_NPROBE = 8  # IVF lists scanned per query (higher = better recall, slower)
+RAG_HYBRID_WEIGHT = 0.3  # Share of the BM25 keyword score in the ranking (0 = embeddings only)
+RAG_LEXICAL_MIN_SCORE = 0.6  # Keyword matches this strong are kept even below the embedding threshold
+RAG_LEXICAL_FAST_PATH = 0.9  # Answer from keywords alone, without encoding the query, above this score (None = off)
+RAG_LEXICAL_FAST_PATH_MIN_TERMS = 2  # Only for questions with at least this many keywords
+RAG_VECTOR_DTYPE = "float32"  # Searched vectors: float32, float16 (1/2 the memory) or int8 (1/4)
+RAG_VECTOR_DIM = None  # PCA-project searched vectors to this many dimensions, e.g. 128 (None = keep 384)
+RAG_INDEX_POLICY = "prebuilt"  # prebuilt: open the index from build_index.py, refuse a stale one; rebuild: embed at startup
+RAG_QUERY_CACHE_SIZE = 256  # Cached query embeddings (LRU)
+RAG_RESULT_CACHE_SIZE = 256  # Cached search results (LRU, cleared when the index is rebuilt)
+INGEST_WORKERS = None  # PDF extraction processes (None = one per CPU core)
+EMBED_BATCH_SIZE = 64  # Chunks per encoder call
+EMBED_THREADS = None  # Encoder CPU threads (None = library default)
+EMBED_BUCKET_WINDOW = 1024  # Chunks gathered across documents before length bucketing (0 = whole corpus)
 
 # Assistant Personality
 SYSTEM_PROMPT = """Tu es Lucas, un étudiant français de 21 ans. IMPORTANT: Utilise SEULEMENT un vocabulaire très simple et élémentaire.
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Context Builder
+Turns retrieved chunks into the cultural-context block of the prompt under a token
+budget. Overlapping or adjacent hits from one document are merged into a single
+passage so shared text is sent once, passages are split into sentences, and the
+sentences sharing the most (rare) words with the question are kept, in reading
+order, until the budget is spent.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from lexical_index import tokenize
+
+CONTEXT_HEADER = "\n\nCultural Context:\n"
+# Up to . ! ? or … (plus closing quotes) followed by a space, so "1.47" or "$87.4" stay whole
+SENTENCE = re.compile(r"\S.*?(?:[.!?…]+(?:\s?[\"'»”)\]])*(?=\s|$)|$)")
+ELLIPSIS = " […] "
+MIN_SENTENCE_WORDS = 3  # page numbers and headings left over from PDF extraction
+
+try:
+    import tiktoken
+    _encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of a text: exact with tiktoken installed, else ~4 characters per token"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def format_hits(hits: List[Dict]) -> str:
+    """The whole retrieved chunks with their sources, as they were sent before budgeting"""
+    if not hits:
+        return ""
+    context = "\n".join([f"Source: {hit['source']}\n{hit['text']}" for hit in hits])
+    return f"{CONTEXT_HEADER}{context}"
+
+
+def merge_hits(hits: List[Dict], rag=None) -> List[Dict]:
+    """One passage per run of overlapping/adjacent hits of a document, best passage first.
+    Without span information (or a rag to read the document text) every hit is its own passage."""
+    by_doc: Dict[str, List[Dict]] = {}
+    passages = []
+    for hit in hits:
+        if rag is None or 'span' not in hit:
+            passages.append({'source': hit['source'], 'text': hit['text'], 'score': hit['score'],
+                             'hits': 1})
+        else:
+            by_doc.setdefault(hit['doc_id'], []).append(hit)
+
+    for doc_id, doc_hits in by_doc.items():
+        doc_hits.sort(key=lambda hit: hit['span'][0])
+        runs = [[doc_hits[0]]]
+        for hit in doc_hits[1:]:
+            # Chunk texts are single-spaced, so "adjacent" means at most the one joining space apart
+            if hit['span'][0] <= max(h['span'][1] for h in runs[-1]) + 1:
+                runs[-1].append(hit)
+            else:
+                runs.append([hit])
+        for run in runs:
+            start, end = run[0]['span'][0], max(hit['span'][1] for hit in run)
+            passages.append({
+                'source': run[0]['source'],
+                'text': run[0]['text'] if len(run) == 1 else rag.passage_text(doc_id, start, end),
+                'score': max(hit['score'] for hit in run),
+                'hits': len(run)
+            })
+
+    passages.sort(key=lambda passage: passage['score'], reverse=True)
+    return passages
+
+
+def _term_weights(query: str, rag) -> Dict[str, float]:
+    """Query terms weighted by BM25 idf when the rag has a keyword index, else 1 each"""
+    terms = set(tokenize(query))
+    lexical = getattr(rag, 'lexical', None)
+    if lexical is None or not len(lexical):
+        return {term: 1.0 for term in terms}
+    return {term: lexical.term_idf(term) for term in terms}
+
+
+def build_context(query: str, hits: List[Dict], max_tokens: Optional[int] = 200, rag=None) -> Tuple[str, Dict]:
+    """(prompt suffix, stats) for the retrieved hits; max_tokens=None sends the hits unchanged.
+    stats: hits, passages, sentences kept, tokens, raw_tokens (whole chunks) and tokens_saved."""
+    raw = format_hits(hits)
+    raw_tokens = count_tokens(raw)
+    stats = {'hits': len(hits), 'passages': 0, 'sentences': 0, 'tokens': raw_tokens,
+             'raw_tokens': raw_tokens, 'tokens_saved': 0}
+    if not hits or max_tokens is None:
+        return raw, stats
+
+    passages = merge_hits(hits, rag)
+    weights = _term_weights(query, rag)
+    total_weight = sum(weights.values()) or 1.0
+
+    # (relevance, passage score, -reading position) ranks sentences; ties keep reading order
+    candidates = []
+    for p, passage in enumerate(passages):
+        for s, match in enumerate(SENTENCE.finditer(passage['text'])):
+            sentence = match.group().strip()
+            if len(sentence.split()) < MIN_SENTENCE_WORDS:
+                continue
+            matched = set(tokenize(sentence)) & weights.keys()
+            relevance = sum(weights[term] for term in matched) / total_weight
+            candidates.append(((relevance, passage['score'], -s), p, s, sentence))
+    candidates.sort(key=lambda item: item[0], reverse=True)
+
+    budget = max_tokens - count_tokens(CONTEXT_HEADER)
+    chosen: Dict[int, Dict[int, str]] = {}
+    for _, p, s, sentence in candidates:
+        cost = count_tokens(sentence) + 1
+        if p not in chosen:
+            cost += count_tokens(f"Source: {passages[p]['source']}\n")
+        if cost <= budget:
+            chosen.setdefault(p, {})[s] = sentence
+            budget -= cost
+    if not chosen and candidates:
+        # Even the best sentence is over budget: keep as many of its words as fit
+        _, p, s, sentence = candidates[0]
+        words = sentence.split()
+        budget -= count_tokens(f"Source: {passages[p]['source']}\n") + 1
+        while words and count_tokens(' '.join(words) + "…") > budget:
+            words = words[:-max(1, len(words) // 8)]
+        if words:
+            chosen[p] = {s: ' '.join(words) + "…"}
+
+    blocks = []
+    for p in sorted(chosen):
+        parts = []
+        previous = None
+        for s in sorted(chosen[p]):
+            if previous is not None:
+                parts.append(" " if s == previous + 1 else ELLIPSIS)
+            parts.append(chosen[p][s])
+            previous = s
+        blocks.append(f"Source: {passages[p]['source']}\n{''.join(parts)}")
+    context = CONTEXT_HEADER + "\n".join(blocks) if blocks else ""
+
+    tokens = count_tokens(context)
+    stats.update(passages=len(passages), sentences=sum(len(sentences) for sentences in chosen.values()),
+                 tokens=tokens, tokens_saved=raw_tokens - tokens)
+    return context, stats
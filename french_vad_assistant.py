@@ -4,25 +4,24 @@ French Voice Assistant with Cultural Knowledge
 A voice-activated French conversation assistant enhanced with knowledge from French literature and cinema.
 """
 
+import argparse
+import atexit
 import webrtcvad
-import collections
 import sys
 import signal
-import whisper
-from openai import OpenAI
-import pyaudio
-import wave
+import threading
 import os
 import time
 import numpy as np
-from scipy import signal as scipy_signal
 import textwrap
-from multi_document_rag import MultiDocumentRAG
+from lazy_loader import LazyResource
+from tracing import tracer
+from streaming_transcriber import StreamingTranscriber
+from voice_pipeline import VoicePipeline
+from context_builder import build_context
+from response_cache import context_id, prompt_version
+from llm_gateway import CircuitBreaker, CircuitOpenError, LLMGateway, create_client
 import config
-import importlib
-
-# Force reload config to pick up changes
-importlib.reload(config)
 
 # Suppress warnings for cleaner output
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -30,7 +29,6 @@ import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 # Configuration
-client = OpenAI(api_key=config.OPENAI_API_KEY)
 FRAME_DURATION = config.FRAME_DURATION
 SAMPLE_RATE = config.SAMPLE_RATE
 CHANNELS = config.CHANNELS
@@ -41,75 +39,170 @@ MODEL_SIZE = config.MODEL_SIZE
 # Prepare VAD - optimized for faster response
 vad = webrtcvad.Vad(2)  # 0-3 (aggressiveness) - moderately aggressive for quick detection
 
-# Whisper model
-model = whisper.load_model(MODEL_SIZE, device="cpu", download_root=None, in_memory=False)
+def load_whisper():
+    import whisper
+    return whisper.load_model(MODEL_SIZE, device="cpu", download_root=None, in_memory=False)
 
-# Initialize Multi-Document RAG system
-rag_system = None
-try:
-    if os.path.exists(config.DOCUMENTS_FOLDER):
-        print("Loading cultural knowledge...")
-        rag_system = MultiDocumentRAG()
-        rag_system.process_documents_folder(config.DOCUMENTS_FOLDER)
-        stats = rag_system.get_document_stats()
-        print(f"Ready! {len(stats)} cultural works loaded.")
-    else:
+def warm_up_whisper(whisper_model):
+    """Run one short decode so the first real turn doesn't pay for lazy initialization"""
+    with model_lock:
+        whisper_model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language="fr", fp16=False)
+
+def load_rag():
+    """Open the Multi-Document RAG system (None if there are no documents)"""
+    if not os.path.exists(config.DOCUMENTS_FOLDER):
         print(f"Cultural documents folder '{config.DOCUMENTS_FOLDER}' not found.")
         print("Run 'python setup_documents.py' to create the folder structure.")
-except Exception as e:
-    print(f"Error loading cultural knowledge: {e}")
-    print("Continuing without cultural context...")
+        return None
+    
+    try:
+        from model_registry import configured_rag
+        print("Loading cultural knowledge...")
+        # The process-wide index: PetitPrinceRAG and the server use the same model and vectors
+        rag = configured_rag()
+        if config.RAG_INDEX_POLICY == "rebuild":
+            rag.process_documents_folder(config.DOCUMENTS_FOLDER)
+        elif not rag.open_prebuilt(config.DOCUMENTS_FOLDER):
+            print("Run 'python build_index.py' to build it (or set RAG_INDEX_POLICY = \"rebuild\").")
+            print("Continuing without cultural context...")
+            return None
+        stats = rag.get_document_stats()
+        print(f"Ready! {len(stats)} cultural works loaded.")
+        return rag
+    except Exception as e:
+        print(f"Error loading cultural knowledge: {e}")
+        print("Continuing without cultural context...")
+        return None
+
+def load_response_cache():
+    from response_cache import ResponseCache
+    cache = ResponseCache(config.RESPONSE_CACHE_FILE, threshold=config.RESPONSE_CACHE_THRESHOLD,
+                          ttl=config.RESPONSE_CACHE_TTL, max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+                          cache_personal=config.RESPONSE_CACHE_PERSONAL)
+    atexit.register(cache.print_stats)
+    return cache
+
+def warm_up_rag(rag):
+    rag.model.encode(["Bonjour, comment ça va ?"])
+
+def load_llm_gateway():
+    client = create_client(config.OPENAI_API_KEY, config.OPENAI_BASE_URL,
+                           connect_timeout=config.LLM_CONNECT_TIMEOUT, read_timeout=config.LLM_READ_TIMEOUT,
+                           max_connections=config.LLM_MAX_CONNECTIONS)
+    return LLMGateway(client, max_retries=config.LLM_MAX_RETRIES, hedge=config.LLM_HEDGE,
+                      hedge_initial_delay=config.LLM_HEDGE_INITIAL_DELAY,
+                      hedge_min_delay=config.LLM_HEDGE_MIN_DELAY,
+                      breaker=CircuitBreaker(config.LLM_BREAKER_FAILURES, config.LLM_BREAKER_RESET),
+                      max_in_flight=config.LLM_MAX_CONNECTIONS)
+
+# Heavy resources load on background threads (start_background_loading) or on first use
+# Whisper decodes are serialized: whisper installs per-call hooks on the model
+model_lock = threading.Lock()
+whisper_model = LazyResource("whisper", load_whisper, warmup=warm_up_whisper)
+rag_system = LazyResource("cultural knowledge", load_rag, warmup=warm_up_rag)
+llm_gateway = LazyResource("openai client", load_llm_gateway)
+response_cache = LazyResource("response cache", load_response_cache)
+
+def start_background_loading():
+    """Load Whisper, the embedding model/index and the OpenAI client concurrently"""
+    for resource in (whisper_model, rag_system, llm_gateway):
+        resource.start()
+
+def print_startup_report():
+    """Per-component startup times"""
+    for resource in (whisper_model, rag_system, llm_gateway):
+        timing = resource.timing()
+        if timing['load_seconds'] is None:
+            print(f"  {resource.name}: still loading")
+            continue
+        line = f"  {resource.name}: load {timing['load_seconds']:.2f}s"
+        if timing['warmup_seconds'] is not None:
+            line += f", warm-up {timing['warmup_seconds']:.2f}s"
+        print(line + (" (failed)" if timing['failed'] else ""))
 
 class AudioBuffer:
-    def __init__(self, sample_rate, frame_duration_ms):
+    """VAD capture into a preallocated int16 ring; an utterance is a frame range, not a list of copies"""
+    
+    PRE_ROLL_FRAMES = 30  # context kept from before speech onset
+    
+    def __init__(self, sample_rate, frame_duration_ms, max_seconds=RECORD_SECONDS, vad_instance=None):
         self.sample_rate = sample_rate
+        self.vad = vad_instance or vad  # webrtcvad keeps state: concurrent streams need their own
         self.frame_duration_ms = frame_duration_ms
         self.frame_size = int(sample_rate * frame_duration_ms / 1000)
-        self.buffer = collections.deque(maxlen=30)  # Keep last 30 frames
-        self.speech_buffer = []
         self.is_recording = False
         self.silence_frames = 0
         self.max_silence_frames = MAX_SILENCE_MS // frame_duration_ms
+        # Hard limit: speech longer than max_seconds is cut off and endpointed
+        self.max_frames = self.PRE_ROLL_FRAMES + int(max_seconds * 1000 // frame_duration_ms)
+        self.truncated = False
+        
+        self.ring = np.zeros(self.max_frames * self.frame_size, dtype=np.int16)
+        self.ring_bytes = memoryview(self.ring).cast('B')
+        self.frame_bytes = self.frame_size * 2
+        self.float_buffer = np.empty(len(self.ring), dtype=np.float32)  # reused by get_audio_data(copy=False)
+        self.frames_written = 0  # total frames ever written; frame n lives in slot n % max_frames
+        self.speech_start = None  # first frame (pre-roll included) of the current/last utterance
+        self.speech_end = 0       # one past its last frame
 
     def add_frame(self, frame):
-        self.buffer.append(frame)
+        """Copy one frame into the ring and run VAD on it; True when the utterance has ended"""
+        if len(frame) != self.frame_bytes:
+            raise ValueError(f"Expected {self.frame_bytes}-byte frames, got {len(frame)}")
+        slot = (self.frames_written % self.max_frames) * self.frame_bytes
+        view = self.ring_bytes[slot:slot + self.frame_bytes]
+        view[:] = frame
+        self.frames_written += 1
         
         # Check for speech activity
-        is_speech = vad.is_speech(frame, self.sample_rate)
+        is_speech = self.vad.is_speech(view.toreadonly(), self.sample_rate)
         
         if is_speech:
             self.silence_frames = 0
             if not self.is_recording:
                 self.is_recording = True
-                self.speech_buffer = list(self.buffer)  # Start with recent context
-            else:
-                self.speech_buffer.append(frame)
-        else:
-            if self.is_recording:
-                self.silence_frames += 1
-                self.speech_buffer.append(frame)
-                
-                if self.silence_frames >= self.max_silence_frames:
-                    self.is_recording = False
-                    return True  # Speech ended
+                # Start with recent context: just remember where it begins
+                # (after a cut-off utterance, continue where it stopped instead)
+                floor = self.speech_end if self.truncated else 0
+                self.speech_start = max(floor, self.frames_written - self.PRE_ROLL_FRAMES)
+                self.truncated = False
+        elif self.is_recording:
+            self.silence_frames += 1
+        
+        if self.is_recording:
+            self.speech_end = self.frames_written
+            if self.silence_frames >= self.max_silence_frames:
+                self.is_recording = False
+                return True  # Speech ended
+            if self.speech_end - self.speech_start >= self.max_frames:
+                self.is_recording = False
+                self.truncated = True
+                return True  # Ring full: cut the utterance at the maximum length
         
         return False
 
-    def get_audio_data(self):
-        if not self.speech_buffer:
+    def get_audio_data(self, copy=True):
+        """The utterance as float32 in [-1, 1], converted straight from the ring.
+        copy=False returns a view of a buffer that the next call overwrites (for partial decodes)."""
+        if self.speech_start is None:
             return None
         
-        # Convert to numpy array
-        audio_data = b''.join(self.speech_buffer)
-        audio_array = np.frombuffer(audio_data, dtype=np.int16)
+        start, end = self.speech_start, self.speech_end
+        length = (end - start) * self.frame_size
+        out = np.empty(length, dtype=np.float32) if copy else self.float_buffer[:length]
         
-        # Normalize and convert to float
-        audio_float = audio_array.astype(np.float32) / 32768.0
+        # The range is contiguous modulo the ring size: at most two slices
+        first = (start % self.max_frames) * self.frame_size
+        head = min(length, len(self.ring) - first)
+        np.multiply(self.ring[first:first + head], 1 / 32768.0, out=out[:head], casting='unsafe')
+        if head < length:
+            np.multiply(self.ring[:length - head], 1 / 32768.0, out=out[head:], casting='unsafe')
         
-        return audio_float
+        return out
 
-def record_audio():
-    """Record audio using PyAudio with VAD"""
+def record_audio(transcriber=None):
+    """Record audio using PyAudio with VAD; a StreamingTranscriber decodes while we listen"""
+    import pyaudio  # only needed with a microphone; benchmarks and the server run headless
     audio = pyaudio.PyAudio()
     
     try:
@@ -122,20 +215,37 @@ def record_audio():
         )
         
         buffer = AudioBuffer(SAMPLE_RATE, FRAME_DURATION)
+        if transcriber is not None:
+            transcriber.start(lambda: buffer.get_audio_data(copy=False))
         
         print("Listening... (speak now)")
         
-        while True:
-            frame = stream.read(FRAME_DURATION * SAMPLE_RATE // 1000, exception_on_overflow=False)
+        with tracer.span("listen") as span:
+            timed = tracer.enabled
+            frames = 0
+            vad_seconds = 0.0
+            while True:
+                frame = stream.read(FRAME_DURATION * SAMPLE_RATE // 1000, exception_on_overflow=False)
+                
+                if timed:
+                    frames += 1
+                    started = time.perf_counter()
+                    ended = buffer.add_frame(frame)
+                    vad_seconds += time.perf_counter() - started
+                else:
+                    ended = buffer.add_frame(frame)
+                if ended:
+                    print("Processing speech...")
+                    break
             
-            if buffer.add_frame(frame):
-                print("Processing speech...")
-                break
-        
-        stream.stop_stream()
-        stream.close()
-        
-        return buffer.get_audio_data()
+            stream.stop_stream()
+            stream.close()
+            
+            audio_data = buffer.get_audio_data()
+            if timed and audio_data is not None:
+                span.set(frames=frames, vad_ms=vad_seconds * 1000,
+                         speech_seconds=len(audio_data) / SAMPLE_RATE)
+        return audio_data
         
     finally:
         audio.terminate()
@@ -146,59 +256,325 @@ def transcribe_audio(audio_data):
         return None
     
     try:
-        result = model.transcribe(audio_data, language="fr")
-        return result["text"].strip()
+        model = whisper_model.get()
+        audio_seconds = len(audio_data) / SAMPLE_RATE
+        with tracer.span("asr", streaming=False, audio_seconds=audio_seconds) as span:
+            with model_lock:
+                result = model.transcribe(audio_data, language="fr")
+            text = result["text"].strip()
+            span.set(chars=len(text))
+        return text
     except Exception as e:
         print(f"Transcription error: {e}")
         return None
 
+def print_partial(committed, tentative):
+    """Show the transcript while the user is still speaking"""
+    line = f"{committed} {tentative}".strip()
+    print(f"\r... {line[-100:]}", end="", flush=True)
+
+def create_streaming_transcriber(on_partial=print_partial):
+    """StreamingTranscriber configured from config.py (None while Whisper is still loading)"""
+    model = whisper_model.get_if_ready()
+    if model is None:
+        return None
+    return StreamingTranscriber(model, sample_rate=SAMPLE_RATE, language="fr",
+                                interval=config.STREAMING_INTERVAL,
+                                final_slack=MAX_SILENCE_MS / 1000, on_partial=on_partial,
+                                model_lock=model_lock)
+
 def get_cultural_context(user_input):
     """Get relevant cultural context from RAG system"""
-    if not rag_system:
-        return ""
+    return retrieve_context(user_input)[0]
+
+def retrieve_context(user_input):
+    """(cultural context, response cache key, context stats) for a question; the key is None
+    without RAG or cache. The stats travel with the prompt, since the pipelined runtime also
+    retrieves for partial transcripts while an earlier reply is being shown."""
+    try:
+        rag = rag_system.get()
+    except Exception:
+        return "", None, {}
+    if not rag:
+        return "", None, {}
     
     try:
-        relevant_chunks = rag_system.search(user_input, top_k=2)
-        if relevant_chunks:
-            context = "\n".join([f"Source: {chunk['source']}\n{chunk['text']}" for chunk in relevant_chunks])
-            return f"\n\nCultural Context:\n{context}"
+        hits = rag.search(user_input, top_k=config.RAG_TOP_K)
+        context, stats = build_cultural_context(user_input, hits, rag)
+        cache_key = None
+        if config.RESPONSE_CACHE_ENABLED:
+            # Usually served from the query cache: retrieval already encoded this question
+            cache_key = (rag.embed_queries([user_input])[0], context_id(hits))
+        return context, cache_key, stats
     except Exception as e:
         print(f"Error getting cultural context: {e}")
     
-    return ""
+    return "", None, {}
 
-def get_ai_response(user_input, cultural_context=""):
-    """Get AI response from OpenAI"""
+def prefetch_context(partial_text):
+    """Search for a partial transcript so the query embedding and hits are cached when the
+    final transcript matches it; no context is built and no response cache key is made"""
+    rag = rag_system.get_if_ready()
+    if not rag:
+        return
     try:
-        messages = [
-            {"role": "system", "content": config.SYSTEM_PROMPT},
-            {"role": "user", "content": user_input + cultural_context}
-        ]
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=150,
-            temperature=0.7
-        )
-        
-        return response.choices[0].message.content.strip()
+        rag.search(partial_text, top_k=config.RAG_TOP_K)
     except Exception as e:
-        print(f"AI response error: {e}")
-        return "Désolé, je ne peux pas répondre maintenant."
+        print(f"Error prefetching cultural context: {e}")
+
+def build_cultural_context(user_input, relevant_chunks, rag=None):
+    """(prompt suffix, token stats) for the retrieved chunks within RAG_CONTEXT_TOKENS"""
+    with tracer.span("rag.context", hits=len(relevant_chunks)) as span:
+        context, stats = build_context(user_input, relevant_chunks, config.RAG_CONTEXT_TOKENS, rag)
+        span.set(tokens=stats['tokens'], raw_tokens=stats['raw_tokens'], tokens_saved=stats['tokens_saved'])
+    return context, stats
+
+FALLBACK_RESPONSE = "Désolé, je ne peux pas répondre maintenant."
+LLM_MODEL = "gpt-3.5-turbo"
+# Cached replies are only reused with the prompt and model that produced them
+PROMPT_VERSION = prompt_version(config.SYSTEM_PROMPT, LLM_MODEL)
+
+def get_ai_response(user_input, cultural_context="", stream=None, on_token=None):
+    """(reply, timing) from OpenAI; with stream=True tokens are passed to on_token as they arrive.
+    timing is {'complete', 'streamed', 'ttft', 'total'} with times in seconds; when the call failed
+    or a stream broke off it is {'complete': False} and the reply is the fallback or the partial text
+    already shown, which must not be cached. It is returned rather than kept in a global because the
+    server answers several sessions at once."""
+    if stream is None:
+        stream = config.LLM_STREAMING
+    started = time.perf_counter()
+    first_token_at = None
+    parts = []
+    usage = None
+    
+    with tracer.span("llm", streamed=stream) as span:
+        try:
+            messages = [
+                {"role": "system", "content": config.SYSTEM_PROMPT},
+                {"role": "user", "content": user_input + cultural_context}
+            ]
+            
+            gateway = llm_gateway.get()
+            request = dict(model=LLM_MODEL, messages=messages, max_tokens=150, temperature=0.7)
+            
+            # The gateway retries transient failures and hedges slow first tokens (llm_gateway.py)
+            if not stream:
+                response = gateway.complete(**request)
+                text = response.choices[0].message.content.strip()
+                usage = response.usage
+            else:
+                for token in gateway.stream(**request):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(token)
+                    if on_token is not None:
+                        on_token(token)
+                text = "".join(parts).strip()
+            span.set(**gateway.last_request)
+            
+            finished = time.perf_counter()
+            timing = {
+                'complete': True,
+                'streamed': stream,
+                'ttft': (first_token_at or finished) - started,
+                'total': finished - started
+            }
+            if tracer.enabled:
+                prompt_chars = sum(len(message["content"]) for message in messages)
+                span.set(prompt_chars=prompt_chars, context_chars=len(cultural_context),
+                         ttft=timing['ttft'],
+                         # Streamed replies carry no usage block: ~4 characters per prompt token,
+                         # one content delta per completion token
+                         prompt_tokens=usage.prompt_tokens if usage else prompt_chars // 4,
+                         completion_tokens=usage.completion_tokens if usage else len(parts),
+                         tokens_estimated=usage is None)
+            return text, timing
+        except CircuitOpenError as e:
+            # The API kept failing: answer at once instead of waiting for another timeout
+            span.set(error=str(e), circuit_open=True)
+            return FALLBACK_RESPONSE, {'complete': False}
+        except Exception as e:
+            print(f"AI response error: {e}")
+            span.set(error=str(e))
+            # Tokens already shown to the student stay; otherwise fall back
+            if parts:
+                return "".join(parts).strip(), {'complete': False}
+            return FALLBACK_RESPONSE, {'complete': False}
 
 def print_response(text, width=70):
     """Print response with word wrapping"""
     wrapped = textwrap.fill(text, width=width)
     print(f"\nLucas: {wrapped}\n")
 
+class StreamPrinter:
+    """Print streamed tokens word by word, wrapping lines and preferring to break after sentences"""
+    
+    SENTENCE_END = ('.', '!', '?', '…', '."', '!"', '?"', '»')
+    
+    def __init__(self, width=70, prefix="Lucas: ", sentence_break_margin=20):
+        self.width = width
+        self.prefix = prefix
+        self.sentence_break_margin = sentence_break_margin  # break early after a sentence this close to the edge
+        self.pending = ""
+        self.column = 0
+        self.started = False
+    
+    def write(self, token):
+        if not self.started:
+            print(f"\n{self.prefix}", end="", flush=True)
+            self.started = True
+        self.pending += token
+        # Everything before the last whitespace is made of complete words
+        cut = max(self.pending.rfind(" "), self.pending.rfind("\n"))
+        if cut >= 0:
+            complete, self.pending = self.pending[:cut], self.pending[cut + 1:]
+            for word in complete.split():
+                self._emit(word)
+    
+    def close(self):
+        for word in self.pending.split():
+            self._emit(word)
+        self.pending = ""
+        if self.started:
+            print("\n", flush=True)
+    
+    def _emit(self, word):
+        if self.column and self.column + 1 + len(word) > self.width:
+            print(f"\n{' ' * len(self.prefix)}", end="")
+            self.column = 0
+        elif self.column:
+            print(" ", end="")
+            self.column += 1
+        print(word, end="", flush=True)
+        self.column += len(word)
+        if word.endswith(self.SENTENCE_END) and self.width - self.column < self.sentence_break_margin:
+            print(f"\n{' ' * len(self.prefix)}", end="")
+            self.column = 0
+
+def cached_response(user_input, cache_key):
+    """Stored reply to a similar earlier question with the same context, or None"""
+    if cache_key is None or not config.RESPONSE_CACHE_ENABLED:
+        return None
+    with tracer.span("llm.cache") as span:
+        try:
+            reply = response_cache.get().lookup(user_input, cache_key[0], cache_key[1], PROMPT_VERSION)
+        except Exception as e:
+            print(f"Response cache error: {e}")
+            return None
+        span.set(hit=int(reply is not None))
+    return reply
+
+def remember_response(user_input, cache_key, response):
+    """Store a fresh reply for later similar questions; only pass replies whose timing is complete
+    (fallback replies are never stored)"""
+    if cache_key is None or not config.RESPONSE_CACHE_ENABLED or not response or response == FALLBACK_RESPONSE:
+        return
+    try:
+        response_cache.get().store(user_input, cache_key[0], cache_key[1], PROMPT_VERSION, response)
+    except Exception as e:
+        print(f"Response cache error: {e}")
+
+def answer(user_input, cultural_context="", cache_key=None, context_stats=None):
+    """Get the reply and show it, streaming tokens to the terminal when enabled;
+    a cached reply to the same question (see response_cache.py) is shown without calling OpenAI.
+    context_stats is the size of this prompt's context, as returned by retrieve_context."""
+    started = time.perf_counter()
+    cached = cached_response(user_input, cache_key)
+    if cached is not None:
+        response = cached
+        print_response(response)
+        elapsed = time.perf_counter() - started
+        timing = {'complete': True, 'streamed': False, 'cached': True, 'ttft': elapsed, 'total': elapsed}
+    elif not config.LLM_STREAMING:
+        response, timing = get_ai_response(user_input, cultural_context, stream=False)
+        print_response(response)
+    else:
+        printer = StreamPrinter()
+        response, timing = get_ai_response(user_input, cultural_context, stream=True, on_token=printer.write)
+        if not printer.started:
+            printer.write(response)  # error fallback: nothing was streamed
+        printer.close()
+    if cached is None and timing['complete']:
+        remember_response(user_input, cache_key, response)
+    
+    if config.SHOW_LATENCY and context_stats and context_stats.get('hits'):
+        print(f"(context {context_stats['tokens']} tokens, {context_stats['tokens_saved']} saved)")
+    if config.SHOW_LATENCY and timing['complete']:
+        print(f"(first token {timing['ttft']:.2f}s, total {timing['total']:.2f}s)")
+    return response
+
+def open_input_stream():
+    """Open the microphone once; the pipelined runtime keeps it open for the whole session"""
+    import pyaudio
+    audio = pyaudio.PyAudio()
+    stream = audio.open(
+        format=pyaudio.paInt16,
+        channels=CHANNELS,
+        rate=SAMPLE_RATE,
+        input=True,
+        frames_per_buffer=FRAME_DURATION * SAMPLE_RATE // 1000
+    )
+    return audio, stream
+
+def print_transcript(text):
+    print(f"\nYou: {text}")
+
+def run_pipelined():
+    """Listen, transcribe, retrieve and answer concurrently over one persistent input stream"""
+    audio, stream = open_input_stream()
+    frame_size = FRAME_DURATION * SAMPLE_RATE // 1000
+    new_transcriber = None
+    if config.STREAMING_TRANSCRIPTION:
+        new_transcriber = lambda on_partial: create_streaming_transcriber(on_partial=on_partial)
+    
+    pipeline = VoicePipeline(
+        read_frame=lambda: stream.read(frame_size, exception_on_overflow=False),
+        new_buffer=lambda: AudioBuffer(SAMPLE_RATE, FRAME_DURATION),
+        transcribe=transcribe_audio,
+        get_context=retrieve_context,
+        respond=lambda text, retrieved: answer(text, *retrieved),
+        new_transcriber=new_transcriber,
+        on_transcript=print_transcript,
+        prefetch=prefetch_context,
+        queue_size=config.PIPELINE_QUEUE_SIZE
+    )
+    try:
+        pipeline.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop_stream()
+        stream.close()
+        audio.terminate()
+        if pipeline.dropped_frames:
+            print(f"Dropped {pipeline.dropped_frames} audio frames")
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     print("\nAu revoir!")
     sys.exit(0)
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="French voice assistant with cultural knowledge")
+    parser.add_argument('--sequential', action='store_true',
+                        help="one turn at a time instead of the pipelined runtime")
+    parser.add_argument('--no-streaming', action='store_true',
+                        help="transcribe after the user stops and wait for the full reply")
+    parser.add_argument('--trace', nargs='?', const=config.TRACE_FILE, metavar='FILE',
+                        help=f"write per-turn timing spans as JSON lines (default file: {config.TRACE_FILE})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main conversation loop"""
+    args = parse_args(argv)
+    if args.sequential:
+        config.PIPELINED_RUNTIME = False
+    if args.no_streaming:
+        config.STREAMING_TRANSCRIPTION = False
+        config.LLM_STREAMING = False
+    if args.trace or config.TRACE_ENABLED:
+        tracer.configure(True, args.trace or config.TRACE_FILE)
+    
     signal.signal(signal.SIGINT, signal_handler)
     
     print("=" * 60)
@@ -212,29 +588,48 @@ def main():
         print("Error: Please set your OpenAI API key in config.py or as environment variable")
         return
     
+    # Models load in the background; the microphone starts listening right away
+    start_background_loading()
+    
+    if config.PIPELINED_RUNTIME:
+        # Ctrl+C must reach run_pipelined so the stream gets closed
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        run_pipelined()
+        print("Startup times:")
+        print_startup_report()
+        print("Au revoir!")
+        return
+    
+    transcriber = None
+    
     while True:
         try:
-            # Record audio
-            audio_data = record_audio()
-            if audio_data is None:
-                continue
-            
-            # Transcribe
-            user_input = transcribe_audio(audio_data)
-            if not user_input:
-                print("Could not understand. Please try again.")
-                continue
-            
-            print(f"You: {user_input}")
-            
-            # Get cultural context
-            cultural_context = get_cultural_context(user_input)
-            
-            # Get AI response
-            response = get_ai_response(user_input, cultural_context)
-            
-            # Print response
-            print_response(response)
+            with tracer.turn():
+                if transcriber is None and config.STREAMING_TRANSCRIPTION:
+                    transcriber = create_streaming_transcriber()
+                
+                # Record audio (decoding already starts while the user speaks)
+                audio_data = record_audio(transcriber)
+                if audio_data is None:
+                    continue
+                
+                # Transcribe
+                if transcriber is not None:
+                    user_input = transcriber.finish(audio_data)
+                    print()
+                else:
+                    user_input = transcribe_audio(audio_data)
+                if not user_input:
+                    print("Could not understand. Please try again.")
+                    continue
+                
+                print(f"You: {user_input}")
+                
+                # Get cultural context
+                cultural_context, cache_key, context_stats = retrieve_context(user_input)
+                
+                # Get and print AI response
+                answer(user_input, cultural_context, cache_key, context_stats)
             
         except KeyboardInterrupt:
             break
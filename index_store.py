@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+On-Disk Index Store
+Versioned index directory read through memory maps instead of pickle:
+  header.json        format version, model name, dimension, dtype, chunk parameters, documents
+  embeddings.npy     normalized float32 matrix of every chunk, opened with mmap_mode='r'
+  texts.bin          UTF-8 text of every document back to back, each stored once
+  chunk_spans.npy    (chunk count, 2) byte offsets of each chunk inside its document's text
+Chunks are decoded from the mapped text only when read. Processes that open the same
+directory share the OS page cache. The header also records the size and SHA-256 of every
+file, which verify_index() checks.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import numpy as np
+from typing import Dict, List, Optional
+from chunking import ChunkSpans
+
+INDEX_FORMAT_VERSION = 2
+HEADER_FILE = "header.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+TEXTS_FILE = "texts.bin"
+SPANS_FILE = "chunk_spans.npy"
+
+
+def _open_blob(path: str):
+    """Memory-map a file read-only (empty files map to b'')"""
+    if os.path.getsize(path) == 0:
+        return b''
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def corpus_hash(manifest: Dict[str, Dict]) -> str:
+    """One hash for a document manifest ({path: {sha256, ...}}): changes when any file is added,
+    removed, renamed or edited"""
+    digest = hashlib.sha256()
+    for path in sorted(manifest):
+        digest.update(f"{path}\0{manifest[path].get('sha256', '')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def save_index(index_dir: str, documents: Dict[str, Dict], model_name: str,
+               chunk_size: int, overlap: int, extra: Optional[Dict] = None,
+               arrays: Optional[Dict[str, np.ndarray]] = None):
+    """Write documents ({doc_id: {title, path, chunks, embeddings}}, chunks being ChunkSpans) as an
+    index directory; arrays are extra {file name: array} files (e.g. an ANN index over the same rows)"""
+    from vector_codec import normalize_rows
+
+    tmp_dir = f"{index_dir}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    doc_entries = []
+    blocks = []
+    spans = []
+    row = 0
+    text_offset = 0
+    with open(os.path.join(tmp_dir, TEXTS_FILE), 'wb') as blob:
+        for doc_id, doc_info in documents.items():
+            chunks: ChunkSpans = doc_info['chunks']
+            blob.write(chunks.text)
+            if len(chunks):
+                blocks.append(normalize_rows(doc_info['embeddings']))
+                spans.append(np.asarray(chunks.spans, dtype=np.int64))
+            doc_entries.append({
+                'doc_id': doc_id,
+                'title': doc_info['title'],
+                'path': doc_info['path'],
+                'start': row,
+                'chunk_count': len(chunks),
+                'text_offset': text_offset,
+                'text_length': len(chunks.text)
+            })
+            row += len(chunks)
+            text_offset += len(chunks.text)
+
+    if blocks:
+        matrix = np.ascontiguousarray(np.vstack(blocks), dtype=np.float32)
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    np.save(os.path.join(tmp_dir, EMBEDDINGS_FILE), matrix, allow_pickle=False)
+    spans = np.vstack(spans) if spans else np.empty((0, 2), dtype=np.int64)
+    np.save(os.path.join(tmp_dir, SPANS_FILE), spans, allow_pickle=False)
+    for name, array in (arrays or {}).items():
+        np.save(os.path.join(tmp_dir, name), np.asarray(array), allow_pickle=False)
+
+    files = {name: {'bytes': os.path.getsize(os.path.join(tmp_dir, name)),
+                    'sha256': file_sha256(os.path.join(tmp_dir, name))}
+             for name in sorted(os.listdir(tmp_dir))}
+    header = {
+        'format_version': INDEX_FORMAT_VERSION,
+        'model_name': model_name,
+        'dimension': int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        'dtype': 'float32',
+        'normalized': True,
+        'chunk_size': chunk_size,
+        'overlap': overlap,
+        'chunk_count': row,
+        'documents': doc_entries,
+        'files': files
+    }
+    if extra:
+        header.update(extra)
+    with open(os.path.join(tmp_dir, HEADER_FILE), 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2, ensure_ascii=False)
+
+    # Swap directories; readers that still map the old files keep their inodes
+    old_dir = f"{index_dir}.old-{os.getpid()}"
+    if os.path.exists(index_dir):
+        os.rename(index_dir, old_dir)
+    os.rename(tmp_dir, index_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_header(index_dir: str) -> Optional[Dict]:
+    """Read the JSON header of an index directory, or None if there is none"""
+    path = os.path.join(index_dir, HEADER_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_index(index_dir: str):
+    """Open an index directory; returns (header, matrix, documents) backed by memory maps"""
+    header = read_header(index_dir)
+    if header is None:
+        raise FileNotFoundError(f"No index found in {index_dir}")
+    if header.get('format_version') != INDEX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported index format version: {header.get('format_version')}")
+
+    matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode='r', allow_pickle=False)
+    spans = np.load(os.path.join(index_dir, SPANS_FILE), mmap_mode='r', allow_pickle=False)
+    if len(spans) != header['chunk_count'] or (header['chunk_count'] and matrix.shape[0] != header['chunk_count']):
+        raise ValueError(f"Index in {index_dir} is inconsistent with its header")
+    blob = memoryview(_open_blob(os.path.join(index_dir, TEXTS_FILE)))
+
+    documents = {}
+    for entry in header['documents']:
+        start, count = entry['start'], entry['chunk_count']
+        text_start = entry['text_offset']
+        documents[entry['doc_id']] = {
+            'title': entry['title'],
+            'path': entry['path'],
+            'chunks': ChunkSpans(blob[text_start:text_start + entry['text_length']], spans[start:start + count]),
+            'embeddings': matrix[start:start + count],
+            'chunk_count': count
+        }
+    return header, matrix, documents
+
+
+def verify_index(index_dir: str) -> List[str]:
+    """Problems found in an index directory (empty when it is intact): file sizes and checksums
+    against the header, row counts, document ranges and vector norms"""
+    try:
+        header, matrix, _ = load_index(index_dir)
+    except (OSError, ValueError, KeyError) as e:
+        return [str(e)]
+
+    problems = []
+    files = header.get('files')
+    if not files:
+        problems.append("header has no file checksums (index written by an older version)")
+    for name, expected in (files or {}).items():
+        path = os.path.join(index_dir, name)
+        if not os.path.exists(path):
+            problems.append(f"{name} is missing")
+        elif os.path.getsize(path) != expected['bytes']:
+            problems.append(f"{name} is {os.path.getsize(path)} bytes, header says {expected['bytes']}")
+        elif file_sha256(path) != expected['sha256']:
+            problems.append(f"{name} does not match its checksum")
+
+    row = 0
+    for entry in header['documents']:
+        if entry['start'] != row:
+            problems.append(f"rows of {entry['doc_id']} start at {entry['start']}, expected {row}")
+        row = entry['start'] + entry['chunk_count']
+    if row != header['chunk_count']:
+        problems.append(f"documents cover {row} rows, header says {header['chunk_count']}")
+
+    if len(matrix):
+        if matrix.shape[1] != header['dimension']:
+            problems.append(f"vectors have {matrix.shape[1]} dimensions, header says {header['dimension']}")
+        for start in range(0, len(matrix), 65536):
+            norms = np.linalg.norm(np.asarray(matrix[start:start + 65536], dtype=np.float32), axis=1)
+            bad = np.flatnonzero(~np.isfinite(norms) | (np.abs(norms - 1.0) > 1e-3))
+            if len(bad):
+                problems.append(f"vector at row {start + bad[0]} is not unit length")
+                break
+    return problems
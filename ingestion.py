@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Streaming Document Ingestion
+PDF pages are extracted in a process pool, streamed page by page into the chunker,
+and chunks are embedded in batches on a background thread while other files are
+still being parsed. Extracted text is cached per file content hash so changing the
+chunk parameters never forces the PDFs to be parsed again.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import PyPDF2
+
+from chunking import ChunkSpans, span_text, stream_chunk_spans
+
+PAGE_SEPARATOR = "\f"
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    """Number of pages in a PDF file"""
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pdf_pages(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract text of pages [start, stop) (runs inside pool workers)"""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def token_lengths(model, texts: List[str]) -> List[int]:
+    """Token count per text from the model tokenizer, or word count if it has none"""
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is not None:
+        try:
+            return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
+        except Exception:
+            pass
+    return [len(text.split()) for text in texts]
+
+
+def set_encoder_threads(threads: Optional[int]):
+    """Limit the intra-op threads used by the encoder (no-op without torch)"""
+    if not threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def embed_texts(model, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Encode texts in buckets of similar token length; rows come back in input order"""
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    lengths = token_lengths(model, texts)
+    order = sorted(range(len(texts)), key=lambda i: lengths[i], reverse=True)
+    vectors = None
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        encoded = np.asarray(model.encode([texts[i] for i in bucket], batch_size=len(bucket)), dtype=np.float32)
+        if vectors is None:
+            vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        vectors[bucket] = encoded
+    return vectors
+
+
+class TextCache:
+    """Extracted document text stored per content hash"""
+
+    def __init__(self, cache_dir: str = "text_cache"):
+        self.cache_dir = cache_dir
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.txt")
+
+    def get(self, content_hash: Optional[str]) -> Optional[List[str]]:
+        if not content_hash:
+            return None
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().split(PAGE_SEPARATOR)
+
+    def put(self, content_hash: Optional[str], pages: List[str]):
+        if not content_hash:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(content_hash) + f".tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(PAGE_SEPARATOR.join(pages))
+        os.replace(tmp_path, self._path(content_hash))
+
+
+class IngestionPipeline:
+    """Extract -> chunk -> embed, overlapped across files and pages"""
+
+    def __init__(self, model, chunk_size: int = 300, overlap: int = 50, workers: Optional[int] = None,
+                 pages_per_task: int = 8, batch_size: int = 64, encoder_threads: Optional[int] = None,
+                 bucket_window: int = 1024, text_cache: Optional[TextCache] = None):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+        self.batch_size = batch_size
+        self.encoder_threads = encoder_threads
+        # Chunks gathered across documents before length-bucketed encoding (0 = whole corpus)
+        self.bucket_window = bucket_window
+        self.text_cache = text_cache or TextCache()
+        self.empty = set()  # paths that parsed fine but contain no text
+        self.stats = {}
+
+    def run(self, files: List[Tuple[str, Optional[str]]]) -> Dict[str, Dict]:
+        """Ingest [(path, content_hash)]; returns {path: {chunks, embeddings}} for files with text,
+        chunks being a ChunkSpans over the document's text"""
+        started = time.perf_counter()
+        page_total = 0
+        results: Dict[str, Dict] = {}
+        texts: Dict[str, bytes] = {}
+        embed_queue: "queue.Queue" = queue.Queue(maxsize=max(self.batch_size * 4, self.bucket_window))
+        embed_errors: List[Exception] = []
+
+        # Submit PDF page ranges for every uncached file up front so parsing runs ahead
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        sources = []
+        try:
+            for path, content_hash in files:
+                cached = self.text_cache.get(content_hash)
+                if cached is not None:
+                    sources.append((path, content_hash, cached, True))
+                elif path.lower().endswith('.pdf'):
+                    try:
+                        count = pdf_page_count(path)
+                    except Exception as e:
+                        print(f"Error processing {path}: {e}")
+                        continue
+                    futures = [pool.submit(extract_pdf_pages, path, start, min(start + self.pages_per_task, count))
+                               for start in range(0, count, self.pages_per_task)]
+                    sources.append((path, content_hash, futures, False))
+                elif path.lower().endswith('.txt'):
+                    try:
+                        with open(path, 'r', encoding='utf-8') as file:
+                            sources.append((path, content_hash, [file.read()], False))
+                    except Exception as e:
+                        print(f"Error processing {path}: {e}")
+                else:
+                    print(f"Unsupported file type: {path}")
+
+            embedder = threading.Thread(target=self._embed_worker, args=(embed_queue, results, embed_errors),
+                                        daemon=True)
+            embedder.start()
+
+            for path, content_hash, source, from_cache in sources:
+                print(f"Processing: {path}" + (" (cached text)" if from_cache else ""))
+                pages: List[str] = []
+                text = bytearray()
+                try:
+                    for span in stream_chunk_spans(self._iter_pages(source, pages), self.chunk_size,
+                                                   self.overlap, text):
+                        embed_queue.put((path, span, span_text(text, *span)))
+                except Exception as e:
+                    print(f"Error processing {path}: {e}")
+                    embed_queue.put((path, None, None))  # discard partial results
+                    continue
+                texts[path] = bytes(text)
+                page_total += len(pages)
+                if not from_cache:
+                    self.text_cache.put(content_hash, pages)
+                if not any(page.strip() for page in pages):
+                    print(f"No text extracted from: {path}")
+                    self.empty.add(path)
+
+            embed_queue.put(None)
+            embedder.join()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        if embed_errors:
+            raise embed_errors[0]
+        for path, doc in results.items():
+            doc['chunks'] = ChunkSpans(texts[path], np.asarray(doc.pop('spans'), dtype=np.int64).reshape(-1, 2))
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        chunk_total = sum(len(doc['chunks']) for doc in results.values())
+        self.stats = {
+            'files': len(files),
+            'pages': page_total,
+            'chunks': chunk_total,
+            'seconds': elapsed,
+            'pages_per_second': page_total / elapsed,
+            'chunks_per_second': chunk_total / elapsed
+        }
+        print(f"Ingested {len(results)} documents: {page_total} pages, {chunk_total} chunks in {elapsed:.1f}s "
+              f"({self.stats['pages_per_second']:.1f} pages/s, {self.stats['chunks_per_second']:.1f} chunks/s)")
+        return results
+
+    @staticmethod
+    def _iter_pages(source, collected: List[str]) -> Iterator[str]:
+        """Yield page texts in order, waiting on pool futures as needed"""
+        for item in source:
+            pages = item.result() if hasattr(item, 'result') else [item]
+            for page in pages:
+                collected.append(page)
+                yield page
+
+    def _embed_worker(self, embed_queue: "queue.Queue", results: Dict[str, Dict], errors: List[Exception]):
+        """Gather queued chunks across files, encode them length-bucketed and append spans and vectors
+        per file; the chunk strings are dropped once encoded"""
+        batch: List[Tuple[str, Tuple[int, int], str]] = []
+        failed = set()
+        set_encoder_threads(self.encoder_threads)
+
+        def flush():
+            if not batch:
+                return
+            try:
+                vectors = embed_texts(self.model, [text for _, _, text in batch], self.batch_size)
+            except Exception as e:
+                errors.append(e)
+                batch.clear()
+                return
+            for (path, span, _), vector in zip(batch, vectors):
+                if path in failed:
+                    continue
+                doc = results.setdefault(path, {'spans': [], 'embeddings': []})
+                doc['spans'].append(span)
+                doc['embeddings'].append(vector)
+            batch.clear()
+
+        while True:
+            item = embed_queue.get()
+            if item is None:
+                break
+            path, span, text = item
+            if text is None:
+                failed.add(path)
+                results.pop(path, None)
+                continue
+            batch.append(item)
+            if self.bucket_window and len(batch) >= self.bucket_window:
+                flush()
+        flush()
+
+        for path in failed:
+            results.pop(path, None)
+        for doc in results.values():
+            doc['embeddings'] = np.vstack(doc['embeddings'])
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Lazy Resource Handles
+Heavy objects (Whisper, the embedding model and index, the OpenAI client) are
+created on a background thread the first time they are needed, or earlier when
+start() is called, and warmed up with a dummy inference so the first real turn
+is not slow. Load and warm-up times are kept per component.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyResource:
+    def __init__(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._value = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> 'LazyResource':
+        """Begin loading in the background (no-op if already started)"""
+        with self._lock:
+            if self._thread is None and not self._ready.is_set():
+                self._thread = threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """The loaded object; waits for it, starting the load if nobody did yet"""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"{self.name} is still loading")
+        if self.error is not None:
+            raise RuntimeError(f"{self.name} failed to load: {self.error}") from self.error
+        return self._value
+
+    def get_if_ready(self) -> Any:
+        """The loaded object, or None while loading or after a failure"""
+        if self._ready.is_set() and self.error is None:
+            return self._value
+        return None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            self._value = self.loader()
+            self.load_seconds = time.perf_counter() - started
+            if self.warmup is not None and self._value is not None:
+                warm_started = time.perf_counter()
+                try:
+                    self.warmup(self._value)
+                except Exception as e:
+                    print(f"Warm-up of {self.name} failed: {e}")
+                self.warmup_seconds = time.perf_counter() - warm_started
+            print(f"[startup] {self.name} ready: load {self.load_seconds:.2f}s"
+                  + (f", warm-up {self.warmup_seconds:.2f}s" if self.warmup_seconds is not None else ""))
+        except BaseException as e:
+            self.error = e
+            self.load_seconds = time.perf_counter() - started
+            print(f"[startup] {self.name} failed after {self.load_seconds:.2f}s: {e}")
+        finally:
+            self._ready.set()
+
+    def timing(self) -> Dict[str, Optional[float]]:
+        return {'load_seconds': self.load_seconds, 'warmup_seconds': self.warmup_seconds,
+                'ready': self.is_ready, 'failed': self.error is not None}
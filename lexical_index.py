@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Lexical (BM25) Index
+Inverted index over the same chunk rows as the embedding matrix, for the exact
+names and rare words dense retrieval tends to miss (Roxane, Balsan, baobabs).
+Tokens are lower-cased and accent-folded, French elisions (l', d', qu'...) are
+split off, stop words are dropped and a plural -s is stripped, so "Baobabs" and
+"baobab" and "Élise" and "elise" match. Postings are stored as flat arrays and the
+vocabulary is a sorted array looked up with searchsorted, so a saved index is
+memory-mapped rather than rebuilt.
+"""
+
+import os
+import re
+import unicodedata
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+VOCAB_FILE = "bm25_vocab.npy"
+TERM_OFFSETS_FILE = "bm25_term_offsets.npy"
+POSTING_ROWS_FILE = "bm25_rows.npy"
+POSTING_TF_FILE = "bm25_tf.npy"
+ROW_LENGTHS_FILE = "bm25_lengths.npy"
+
+# Accent-folded, so "été" is listed as "ete"
+FRENCH_STOPWORDS = frozenset("""
+a ai aie aient aies ait alors as au aucun aussi autre aux avaient avais avait avant avec avez aviez avions avoir
+avons ayant bon c ca car ce ceci cela celle celles celui cependant ces cet cette ceux chaque ci comme comment d dans
+de des deja depuis devrait doit donc dont du elle elles en encore est et etaient etais etait etant ete etes etiez
+etions etre eu eux fait faire fois font hors ici il ils j je juste l la le les leur leurs lui m ma mais me meme memes
+mes moi mon n ne ni nos notre nous on ont ou par parce pas peu peut plus pour pourquoi qu quand que quel quelle
+quelles quels qui quoi s sa sans se sera ses si sien son sont sous soyez sur t ta tandis te tes toi ton tous tout
+toute toutes tres tu un une unes uns vers voici voila vos votre vous vu y
+""".split())
+
+ELISION = re.compile(r"\b(?:l|d|j|m|n|s|t|c|qu|jusqu|lorsqu|puisqu|quoiqu)'")
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold_accents(text: str) -> str:
+    """Lower-case and strip diacritics ("Élève" -> "eleve"); ligatures are expanded"""
+    text = text.lower().replace('œ', 'oe').replace('æ', 'ae')
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-insensitive French index terms of a text"""
+    text = fold_accents(text).replace('’', "'")
+    text = ELISION.sub(' ', text)
+    terms = []
+    for token in TOKEN.findall(text):
+        if token in FRENCH_STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]  # light plural stemming: baobabs -> baobab
+        terms.append(token)
+    return terms
+
+
+class BM25Index:
+    """Okapi BM25 over chunk rows; scores are also reported normalized to [0, 1]"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = np.empty(0, dtype='<U1')             # sorted terms; term id = position
+        self.term_offsets = np.zeros(1, dtype=np.int64)   # postings of term t: [offsets[t], offsets[t+1])
+        self.rows = np.empty(0, dtype=np.int32)           # posting -> chunk row
+        self.tf = np.empty(0, dtype=np.float32)           # posting -> term frequency in that row
+        self.lengths = np.empty(0, dtype=np.float32)      # row -> token count
+        self.average_length = 1.0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def build(self, texts: Iterable[str]):
+        """Index chunk texts given in row order"""
+        term_ids: Dict[str, int] = {}
+        posting_terms, posting_rows, posting_tf, lengths = [], [], [], []
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            lengths.append(len(terms))
+            counts: Dict[int, int] = {}
+            for term in terms:
+                term_id = term_ids.setdefault(term, len(term_ids))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            posting_terms.extend(counts.keys())
+            posting_rows.extend([row] * len(counts))
+            posting_tf.extend(counts.values())
+
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        self.average_length = max(float(self.lengths.mean()), 1.0) if len(lengths) else 1.0
+        if not term_ids:
+            self.vocab = np.empty(0, dtype='<U1')
+            self.term_offsets = np.zeros(1, dtype=np.int64)
+            self.rows = np.empty(0, dtype=np.int32)
+            self.tf = np.empty(0, dtype=np.float32)
+            return
+
+        # Renumber terms in sorted order and group postings by term
+        terms = np.array(list(term_ids.keys()))
+        sorted_ids = np.argsort(terms, kind='stable')
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[sorted_ids] = np.arange(len(terms))
+        posting_terms = rank[np.asarray(posting_terms, dtype=np.int64)]
+        order = np.argsort(posting_terms, kind='stable')
+
+        self.vocab = terms[sorted_ids]
+        self.rows = np.asarray(posting_rows, dtype=np.int32)[order]
+        self.tf = np.asarray(posting_tf, dtype=np.float32)[order]
+        self.term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(terms)), out=self.term_offsets[1:])
+
+    def term_id(self, term: str) -> int:
+        """Position of term in the vocabulary, or -1"""
+        position = int(np.searchsorted(self.vocab, term))
+        if position < len(self.vocab) and self.vocab[position] == term:
+            return position
+        return -1
+
+    def idf(self, df: np.ndarray) -> np.ndarray:
+        n = len(self)
+        return np.log1p((n - df + 0.5) / (df + 0.5))
+
+    def term_idf(self, term: str) -> float:
+        """idf of an index term; terms missing from the corpus get the highest possible idf"""
+        term_id = self.term_id(term)
+        df = 0 if term_id < 0 else self.term_offsets[term_id + 1] - self.term_offsets[term_id]
+        return float(self.idf(np.array(float(df))))
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, normalized scores) of every chunk sharing a term with the query.
+        A score of 1.0 means the chunk contains every query term (once in an average-length chunk,
+        which BM25 scores exactly idf); query terms missing from the corpus count as unmatched."""
+        terms = set(tokenize(query))
+        if not terms or len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        ids = np.array([self.term_id(term) for term in terms], dtype=np.int64)
+        known = ids[ids >= 0]
+        # Unknown terms weigh like the rarest possible term
+        ideal = (len(ids) - len(known)) * float(self.idf(np.array(0.0)))
+        if len(known) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        starts, stops = self.term_offsets[known], self.term_offsets[known + 1]
+        idfs = self.idf((stops - starts).astype(np.float32))
+        ideal += float(idfs.sum())
+
+        rows = np.concatenate([self.rows[start:stop] for start, stop in zip(starts, stops)])
+        tf = np.concatenate([self.tf[start:stop] for start, stop in zip(starts, stops)])
+        weights = np.repeat(idfs, stops - starts)
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[rows] / self.average_length)
+        contributions = weights * tf * (self.k1 + 1) / (tf + norm)
+
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+        return unique_rows, np.minimum(scores / ideal, 1.0)
+
+    def search(self, query: str, top_k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, normalized scores) of the top_k lexical matches, best first, optionally only among rows"""
+        matched, scores = self.score(query)
+        if rows is not None:
+            keep = np.isin(matched, rows)
+            matched, scores = matched[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        return matched[order], scores[order]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Files to store next to embeddings.npy"""
+        return {
+            VOCAB_FILE: self.vocab,
+            TERM_OFFSETS_FILE: self.term_offsets,
+            POSTING_ROWS_FILE: self.rows,
+            POSTING_TF_FILE: self.tf,
+            ROW_LENGTHS_FILE: self.lengths
+        }
+
+    @classmethod
+    def load(cls, index_dir: str, k1: float = 1.2, b: float = 0.75) -> Optional['BM25Index']:
+        """Open a saved BM25 index (memory-mapped), or None if the directory has none"""
+        if not os.path.exists(os.path.join(index_dir, VOCAB_FILE)):
+            return None
+        index = cls(k1=k1, b=b)
+        index.vocab = np.load(os.path.join(index_dir, VOCAB_FILE), mmap_mode='r', allow_pickle=False)
+        index.term_offsets = np.load(os.path.join(index_dir, TERM_OFFSETS_FILE), mmap_mode='r', allow_pickle=False)
+        index.rows = np.load(os.path.join(index_dir, POSTING_ROWS_FILE), mmap_mode='r', allow_pickle=False)
+        index.tf = np.load(os.path.join(index_dir, POSTING_TF_FILE), mmap_mode='r', allow_pickle=False)
+        index.lengths = np.load(os.path.join(index_dir, ROW_LENGTHS_FILE), allow_pickle=False)
+        index.average_length = max(float(index.lengths.mean()), 1.0) if len(index.lengths) else 1.0
+        return index
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+LLM Gateway
+Resilient access to the chat completions API for the voice loop:
+  - one pooled HTTP client with explicit connect/read/write deadlines
+  - bounded retries of transient failures with full-jitter exponential backoff
+  - optional hedging: when no first token arrived after the observed p95 time to
+    first token, a second identical request is sent and whichever answers first wins
+  - a circuit breaker that fails fast after repeated failures instead of making every
+    student wait for timeouts, probing again after a cool-down
+A streamed attempt only counts as answered once its first content token arrived,
+so a request that hangs after the headers is hedged and retried too.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold consecutive failures -> half-open after reset_seconds,
+    where a single probe request decides between closed and open again"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.probing or time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may go out now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.probing:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx are worth another attempt; 4xx request errors are not"""
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def create_client(api_key: str, base_url: Optional[str] = None, connect_timeout: float = 3.0,
+                  read_timeout: float = 10.0, max_connections: int = 16):
+    """OpenAI client on a pooled httpx client; the SDK's own retries are off, the gateway retries"""
+    import httpx
+    from openai import OpenAI
+    http_client = httpx.Client(
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                            keepalive_expiry=60.0))
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+
+
+class _Attempt:
+    """One request: the response object plus, for streams, the first content token and the rest"""
+
+    def __init__(self, response, first: Optional[str] = None, rest: Optional[Iterator] = None):
+        self.response = response
+        self.first = first
+        self.rest = rest
+
+    def close(self):
+        # Streams expose their httpx response (older SDKs have no Stream.close)
+        http_response = getattr(self.response, 'response', self.response)
+        close = getattr(http_response, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+def _close_when_done(future):
+    """Done-callback for a losing hedge: release its connection if it succeeded after all"""
+    if future.exception() is None:
+        future.result().close()
+
+
+class LLMGateway:
+    """Chat completions with deadlines, retries, hedging and a circuit breaker"""
+
+    def __init__(self, client, max_retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 2.0,
+                 hedge: bool = True, hedge_initial_delay: float = 1.5, hedge_min_delay: float = 0.3,
+                 hedge_quantile: float = 95.0, breaker: Optional[CircuitBreaker] = None,
+                 max_in_flight: int = 16, sleep: Callable[[float], None] = time.sleep):
+        self.client = client
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_initial_delay = hedge_initial_delay  # used until enough latencies were observed
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_quantile = hedge_quantile
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.latencies: deque = deque(maxlen=200)  # first-token (or full reply) seconds of winning attempts
+        # Attempts run here so a hung one can be raced by its hedge; hung attempts hold a worker
+        # until the read timeout, so allow for two per concurrent request
+        self.pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm")
+        self.counters = {'requests': 0, 'attempts': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0,
+                         'failures': 0, 'rejected_open': 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def last_request(self) -> Dict:
+        """{'attempts', 'hedged', 'hedge_won'} of the calling thread's latest request"""
+        return getattr(self._local, 'info', {})
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for a first token before sending the hedge request"""
+        if len(self.latencies) < 20:
+            return self.hedge_initial_delay
+        return max(self.hedge_min_delay, float(np.percentile(list(self.latencies), self.hedge_quantile)))
+
+    def _backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** retry)))
+
+    def _open(self, stream: bool, params: Dict) -> _Attempt:
+        """Send one request; streams are read up to their first content token"""
+        self._count('attempts')
+        response = self.client.chat.completions.create(stream=stream, **params)
+        if not stream:
+            return _Attempt(response)
+        chunks = iter(response)
+        try:
+            for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    return _Attempt(response, chunk.choices[0].delta.content, chunks)
+        except BaseException:
+            _Attempt(response).close()
+            raise
+        return _Attempt(response, "", iter(()))  # finished without content
+
+    def _race(self, stream: bool, params: Dict, info: Dict) -> Tuple[_Attempt, bool]:
+        """First attempt to answer, hedged after hedge_delay; returns (attempt, hedge won)"""
+        started = time.perf_counter()
+        primary = self.pool.submit(self._open, stream, params)
+        futures = [primary]
+        if self.hedge:
+            done, _ = wait(futures, timeout=self.hedge_delay())
+            if not done:
+                self._count('hedges')
+                info['hedged'] = True
+                futures.append(self.pool.submit(self._open, stream, params))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.add_done_callback(_close_when_done)
+                    self.latencies.append(time.perf_counter() - started)
+                    return future.result(), future is not primary
+                error = future.exception()
+        raise error
+
+    def _request(self, stream: bool, params: Dict) -> _Attempt:
+        self._count('requests')
+        info = self._local.info = {'attempts': 0, 'hedged': False, 'hedge_won': False}
+        for retry in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count('rejected_open')
+                raise CircuitOpenError("LLM circuit breaker is open")
+            info['attempts'] += 1
+            try:
+                attempt, hedge_won = self._race(stream, params, info)
+            except Exception as e:
+                self.breaker.record_failure()
+                if retry >= self.max_retries or not is_retryable(e):
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                self.sleep(self._backoff(retry))
+                continue
+            self.breaker.record_success()
+            if hedge_won:
+                self._count('hedge_wins')
+                info['hedge_won'] = True
+            return attempt
+
+    def complete(self, **params):
+        """Non-streamed chat completion (the SDK response object)"""
+        return self._request(False, params).response
+
+    def stream(self, **params) -> Iterator[str]:
+        """Content tokens of a streamed chat completion. Failures before the first token are retried
+        and hedged; once tokens were handed out a broken stream raises."""
+        attempt = self._request(True, params)
+        try:
+            if attempt.first:
+                yield attempt.first
+            for chunk in attempt.rest:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            attempt.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+        stats['breaker'] = self.breaker.state
+        stats['hedge_delay'] = self.hedge_delay()
+        return stats
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load Test Client for assistant_server.py
+Opens N sessions that each stream a recording in real time (looping it), collects
+the transcript/reply events and reports reply latency, refused uploads and how far
+the senders fell behind real time, for increasing N. The largest N that stays
+within the latency target is how many students one box can serve.
+
+    python mock_openai_server.py --port 8765 &
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python assistant_server.py &
+    python load_test_client.py --wav question.wav --sessions 1,2,4,8,16 --duration 60
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+
+import config
+from audio_replay import load_pcm16
+
+
+def synthetic_speech(seconds: float = 2.0, sample_rate: int = 16000) -> np.ndarray:
+    """Amplitude-modulated tone that webrtcvad accepts as speech (ASR output is meaningless)"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 3 * t) * 8000).astype(np.int16)
+
+
+class SessionClient:
+    def __init__(self, url: str, pcm: np.ndarray, chunk_ms: int):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.pcm = pcm
+        self.chunk_bytes = int(config.SAMPLE_RATE * chunk_ms / 1000) * 2
+        self.chunk_seconds = chunk_ms / 1000
+        self.reply_latencies: List[float] = []
+        self.transcript_latencies: List[float] = []
+        self.errors = 0
+        self.refused = 0
+        self.lag = 0.0
+        self.session_id = None
+
+    def _request(self, conn, method: str, path: str, body: bytes = None):
+        conn.request(method, path, body=body, headers={'Content-Type': 'application/octet-stream'})
+        response = conn.getresponse()
+        payload = json.loads(response.read() or b'{}')
+        return response.status, payload, response.getheader('Retry-After')
+
+    def run(self, duration: float):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        status, payload, _ = self._request(conn, "POST", "/sessions")
+        if status != 201:
+            self.errors += 1
+            return
+        self.session_id = payload['session_id']
+        poller = threading.Thread(target=self._poll, args=(duration + 30,), daemon=True)
+        poller.start()
+
+        data = self.pcm.tobytes()
+        started = time.perf_counter()
+        sent_seconds = 0.0
+        offset = 0
+        while sent_seconds < duration:
+            chunk = data[offset:offset + self.chunk_bytes]
+            offset = (offset + self.chunk_bytes) % len(data)
+            while True:
+                status, _, retry_after = self._request(conn, "POST", f"/sessions/{self.session_id}/audio", chunk)
+                if status != 429:
+                    break
+                self.refused += 1
+                time.sleep(float(retry_after or 0.2))
+            if status != 202:
+                self.errors += 1
+                break
+            sent_seconds += self.chunk_seconds
+            # Keep real-time pace; anything beyond schedule is lag caused by backpressure
+            ahead = sent_seconds - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+        self.lag = max(0.0, (time.perf_counter() - started) - sent_seconds)
+
+        # Let the last turns finish before closing the session
+        time.sleep(3.0)
+        self._request(conn, "DELETE", f"/sessions/{self.session_id}")
+        conn.close()
+        poller.join(timeout=1.0)
+
+    def _poll(self, max_seconds: float):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        deadline = time.perf_counter() + max_seconds
+        while time.perf_counter() < deadline:
+            try:
+                status, payload, _ = self._request(conn, "GET", f"/sessions/{self.session_id}/events?wait=5")
+            except (OSError, http.client.HTTPException):
+                return
+            if status != 200:
+                return
+            for event in payload['events']:
+                if event['type'] == 'reply':
+                    self.reply_latencies.append(event['latency'])
+                elif event['type'] == 'transcript':
+                    self.transcript_latencies.append(event['latency'])
+                elif event['type'] == 'error':
+                    self.errors += 1
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else float('nan')
+
+
+def run_level(url: str, pcm: np.ndarray, sessions: int, duration: float, chunk_ms: int) -> Dict:
+    clients = [SessionClient(url, pcm, chunk_ms) for _ in range(sessions)]
+    threads = [threading.Thread(target=client.run, args=(duration,), daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)  # stagger starts so utterances don't all end together
+    for thread in threads:
+        thread.join()
+
+    replies = [latency for client in clients for latency in client.reply_latencies]
+    transcripts = [latency for client in clients for latency in client.transcript_latencies]
+    return {
+        'sessions': sessions,
+        'turns': len(replies),
+        'transcript_p50': percentile(transcripts, 50),
+        'transcript_p95': percentile(transcripts, 95),
+        'reply_p50': percentile(replies, 50),
+        'reply_p95': percentile(replies, 95),
+        'refused_uploads': sum(client.refused for client in clients),
+        'errors': sum(client.errors for client in clients),
+        'max_lag': max(client.lag for client in clients)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find how many concurrent sessions the assistant server sustains")
+    parser.add_argument('--url', default=f"http://{config.SERVER_HOST}:{config.SERVER_PORT}")
+    parser.add_argument('--wav', help="recording streamed by every session (default: synthetic tone bursts)")
+    parser.add_argument('--sessions', default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=60.0, help="seconds of audio per session and level")
+    parser.add_argument('--chunk-ms', type=int, default=100, help="audio per upload request")
+    parser.add_argument('--slo', type=float, default=3.0, help="p95 endpoint-to-reply target in seconds")
+    parser.add_argument('--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    speech = load_pcm16(args.wav, config.SAMPLE_RATE) if args.wav else synthetic_speech()
+    silence = np.zeros(int(config.SAMPLE_RATE * (config.MAX_SILENCE_MS / 1000 + 1.0)), dtype=np.int16)
+    pcm = np.concatenate([speech, silence])
+
+    results = []
+    print(f"{'sessions':>8}{'turns':>7}{'asr p50':>9}{'asr p95':>9}{'reply p50':>11}{'reply p95':>11}"
+          f"{'429s':>7}{'errors':>8}{'lag s':>7}")
+    for level in [int(n) for n in args.sessions.split(',')]:
+        result = run_level(args.url, pcm, level, args.duration, args.chunk_ms)
+        results.append(result)
+        print(f"{level:>8}{result['turns']:>7}{result['transcript_p50']:>9.2f}{result['transcript_p95']:>9.2f}"
+              f"{result['reply_p50']:>11.2f}{result['reply_p95']:>11.2f}{result['refused_uploads']:>7}"
+              f"{result['errors']:>8}{result['max_lag']:>7.1f}")
+
+    fitting = [r['sessions'] for r in results
+               if r['turns'] and r['reply_p95'] <= args.slo and r['max_lag'] < 1.0 and not r['errors']]
+    if fitting:
+        print(f"\nUp to {max(fitting)} concurrent sessions stay within a {args.slo:.1f}s p95 reply latency")
+    else:
+        print(f"\nNo tested level stays within a {args.slo:.1f}s p95 reply latency")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'slo': args.slo, 'levels': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
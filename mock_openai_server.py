@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI-Compatible Server
+Local stand-in for /v1/chat/completions (streaming and non-streaming) with
+configurable latency and injected faults (slow tail, hung requests, error
+responses), so the voice loop and llm_gateway.py can be tested offline.
+
+    python mock_openai_server.py --port 8765 --ttft-ms 300 --token-ms 20
+    python mock_openai_server.py --tail-rate 0.05 --tail-ms 4000 --hang-rate 0.01 --error-rate 0.02
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+DEFAULT_REPLY = "Le Petit Prince vient d'une petite planète. Il aime beaucoup sa rose."
+
+
+class MockSettings:
+    def __init__(self, ttft_ms: float = 300.0, token_ms: float = 20.0, jitter_ms: float = 0.0,
+                 reply: str = DEFAULT_REPLY, seed: Optional[int] = None, tail_rate: float = 0.0,
+                 tail_ms: float = 3000.0, hang_rate: float = 0.0, hang_seconds: float = 300.0,
+                 error_rate: float = 0.0, error_status: int = 500):
+        self.ttft_ms = ttft_ms      # delay before the first token (or the whole non-streamed body)
+        self.token_ms = token_ms    # delay between streamed tokens
+        self.jitter_ms = jitter_ms  # uniform +/- jitter added to the first-token delay
+        self.reply = reply
+        self.tail_rate = tail_rate        # share of requests whose first token is tail_ms later
+        self.tail_ms = tail_ms
+        self.hang_rate = hang_rate        # share of requests that send nothing for hang_seconds
+        self.hang_seconds = hang_seconds
+        self.error_rate = error_rate      # share of requests answered with error_status
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.faults = {'tail': 0, 'hang': 0, 'error': 0}
+
+    def first_token_delay(self) -> float:
+        with self._lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.ttft_ms + jitter) / 1000.0
+
+    def draw_fault(self) -> Optional[str]:
+        """'hang', 'error', 'tail' or None for the next request"""
+        with self._lock:
+            roll = self.random.random()
+            for fault, rate in (('hang', self.hang_rate), ('error', self.error_rate), ('tail', self.tail_rate)):
+                if roll < rate:
+                    self.faults[fault] += 1
+                    return fault
+                roll -= rate
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    settings: MockSettings = MockSettings()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.settings._lock:
+            self.settings.connections += 1  # one per TCP connection: shows client-side pooling
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up: read timeout, or a losing hedge request was closed
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        settings = self.settings
+        with settings._lock:
+            settings.requests += 1
+        fault = settings.draw_fault()
+
+        prompt = " ".join(str(m.get('content', '')) for m in request.get('messages', []))
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        model = request.get('model', 'gpt-3.5-turbo')
+        created = int(time.time())
+        usage = {
+            'prompt_tokens': estimate_tokens(prompt),
+            'completion_tokens': estimate_tokens(settings.reply),
+            'total_tokens': estimate_tokens(prompt) + estimate_tokens(settings.reply)
+        }
+
+        if fault == 'hang':
+            time.sleep(settings.hang_seconds)
+            self.close_connection = True
+            return
+        if fault == 'error':
+            self._send_json(settings.error_status, {'error': {'message': "injected failure", 'type': "server_error"}})
+            return
+        time.sleep(settings.first_token_delay() + (settings.tail_ms / 1000.0 if fault == 'tail' else 0.0))
+
+        if not request.get('stream'):
+            time.sleep(settings.token_ms * max(0, len(settings.reply.split()) - 1) / 1000.0)
+            self._send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': settings.reply}}],
+                'usage': usage
+            })
+            return
+
+        # Chunked transfer encoding keeps the connection reusable after the stream
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_chunk(data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def send_event(delta: Dict, finish_reason=None):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                     'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+            write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+
+        words = settings.reply.split(' ')
+        send_event({'role': 'assistant', 'content': ''})
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(settings.token_ms / 1000.0)
+            send_event({'content': word if i == 0 else ' ' + word})
+        send_event({}, finish_reason='stop')
+        write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0,
+                      settings: Optional[MockSettings] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve on a background thread; returns (server, base_url for the OpenAI client)"""
+    handler = type('ConfiguredMockOpenAIHandler', (MockOpenAIHandler,), {'settings': settings or MockSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions server with fake latency")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ttft-ms', type=float, default=300.0)
+    parser.add_argument('--token-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--reply', default=DEFAULT_REPLY)
+    parser.add_argument('--tail-rate', type=float, default=0.0, help="share of requests delayed by --tail-ms")
+    parser.add_argument('--tail-ms', type=float, default=3000.0)
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="share of requests that never answer")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=500)
+    args = parser.parse_args()
+
+    settings = MockSettings(args.ttft_ms, args.token_ms, args.jitter_ms, args.reply, tail_rate=args.tail_rate,
+                            tail_ms=args.tail_ms, hang_rate=args.hang_rate, error_rate=args.error_rate,
+                            error_status=args.error_status)
+    server, base_url = start_mock_server(args.host, args.port, settings)
+    print(f"Mock OpenAI server on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
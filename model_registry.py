@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Model Registry
+Process-wide cache of embedding models, keyed by model name and device, and of the
+multi-document index built on them. Every component of a process that embeds text
+(MultiDocumentRAG, PetitPrinceRAG, the assistant server) gets the same
+SentenceTransformer and the same index instead of loading its own copy.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+_lock = threading.Lock()
+_models: Dict[Tuple[str, str], object] = {}
+_rags: Dict[Tuple[str, str], object] = {}
+# One lock per key so two threads asking for the same model wait for a single load
+_loading: Dict[Tuple, threading.Lock] = {}
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """The device a model would be loaded on ("cuda" when available unless one is given)"""
+    if device:
+        return device
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def _get_or_create(cache: Dict, key: Tuple, create):
+    with _lock:
+        if key in cache:
+            return cache[key]
+        load_lock = _loading.setdefault((id(cache),) + key, threading.Lock())
+    with load_lock:
+        with _lock:
+            if key in cache:
+                return cache[key]
+        value = create()
+        with _lock:
+            cache[key] = value
+        return value
+
+
+def get_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL, device: Optional[str] = None):
+    """The process's SentenceTransformer for model_name on device, loaded on first use"""
+    device = resolve_device(device)
+
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device=device)
+    return _get_or_create(_models, (model_name, device), load)
+
+
+def shared_rag(embedding_model: str = DEFAULT_EMBEDDING_MODEL, device: Optional[str] = None, **options):
+    """The process's MultiDocumentRAG for a model and device. options (chunk size, caches, search
+    settings) only apply when it is created; later callers get the existing instance."""
+    device = resolve_device(device)
+
+    def create():
+        from multi_document_rag import MultiDocumentRAG
+        return MultiDocumentRAG(embedding_model, device=device, **options)
+    return _get_or_create(_rags, (embedding_model, device), create)
+
+
+def configured_rag(device: Optional[str] = None):
+    """shared_rag() with the chunking, ingestion, search and storage settings of config.py, so the
+    assistant, PetitPrinceRAG and build_index.py open the same index directory"""
+    import config
+    return shared_rag(chunk_size=config.RAG_CHUNK_SIZE, overlap=config.RAG_OVERLAP, device=device,
+                      ingest_workers=config.INGEST_WORKERS,
+                      embed_batch_size=config.EMBED_BATCH_SIZE,
+                      embed_threads=config.EMBED_THREADS,
+                      bucket_window=config.EMBED_BUCKET_WINDOW,
+                      query_cache_size=config.RAG_QUERY_CACHE_SIZE,
+                      result_cache_size=config.RAG_RESULT_CACHE_SIZE,
+                      search_mode=config.RAG_SEARCH_MODE,
+                      ann_min_chunks=config.RAG_ANN_MIN_CHUNKS,
+                      nprobe=config.RAG_ANN_NPROBE,
+                      hybrid_weight=config.RAG_HYBRID_WEIGHT,
+                      lexical_fast_path=config.RAG_LEXICAL_FAST_PATH,
+                      lexical_fast_path_min_terms=config.RAG_LEXICAL_FAST_PATH_MIN_TERMS,
+                      lexical_min_score=config.RAG_LEXICAL_MIN_SCORE,
+                      vector_dtype=config.RAG_VECTOR_DTYPE,
+                      vector_dimension=config.RAG_VECTOR_DIM)
+
+
+def loaded_models() -> List[Tuple[str, str]]:
+    """(model name, device) of every model loaded so far"""
+    with _lock:
+        return sorted(_models)
@@ -4,143 +4,353 @@ Multi-Document RAG System for French Cultural Knowledge
 Handles multiple documents including PDFs and text files for cultural context.
 """
 
-import PyPDF2
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
 import os
 import json
-from typing import List, Tuple, Dict
+from typing import Iterable, List, Tuple, Dict, Optional
 from pathlib import Path
+from vector_index import VectorIndex
+from chunking import CHUNKER_VERSION, span_text
+from ann_index import IVFIndex
+from vector_codec import CODES_FILE, VectorCodec
+from lexical_index import BM25Index, tokenize
+from index_store import corpus_hash, file_sha256, save_index, load_index
+from ingestion import IngestionPipeline, TextCache
+from query_cache import LRUCache, normalize_query
+from model_registry import DEFAULT_EMBEDDING_MODEL, get_embedding_model
+from tracing import tracer
 
 class MultiDocumentRAG:
-    def __init__(self, embedding_model: str = "paraphrase-multilingual-MiniLM-L12-v2"):
-        self.model = SentenceTransformer(embedding_model)
-        self.documents = {}  # {doc_id: {title, chunks, embeddings}}
-        self.cache_file = "multi_document_embeddings.pkl"
+    def __init__(self, embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+                 chunk_size: int = 300, overlap: int = 50, ingest_workers: int = None,
+                 embed_batch_size: int = 64, embed_threads: int = None, bucket_window: int = 1024,
+                 query_cache_size: int = 256, result_cache_size: int = 256,
+                 search_mode: str = "auto", ann_min_chunks: int = 20000, nprobe: int = 8,
+                 hybrid_weight: float = 0.3, lexical_fast_path: Optional[float] = 0.9,
+                 lexical_fast_path_min_terms: int = 2, lexical_min_score: float = 0.6, device: Optional[str] = None,
+                 vector_dtype: str = "float32", vector_dimension: Optional[int] = None):
+        self.model_name = embedding_model
+        self.model = get_embedding_model(embedding_model, device)  # shared by every RAG in the process
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.ingest_workers = ingest_workers  # None = one PDF worker per core
+        self.embed_batch_size = embed_batch_size
+        self.embed_threads = embed_threads
+        self.bucket_window = bucket_window
+        self.text_cache = TextCache("text_cache")
+        self.documents = {}  # {doc_id: {title, chunks (ChunkSpans), embeddings}}
+        # All chunk vectors in one normalized matrix (optionally searched in compressed form),
+        # plus an IVF index for large corpora
+        self.index = VectorIndex(search_mode=search_mode, ann_min_chunks=ann_min_chunks, nprobe=nprobe,
+                                 storage_dtype=vector_dtype, storage_dimension=vector_dimension)
+        self.storage_stale = False  # the saved index uses other vector storage settings
+        # BM25 over the same rows, fused with the embedding scores
+        self.lexical = BM25Index()
+        self.hybrid_weight = hybrid_weight
+        self.lexical_fast_path = lexical_fast_path  # normalized BM25 score that skips the encoder
+        # A one-word question matches any chunk containing that word at 1.0
+        self.lexical_fast_path_min_terms = lexical_fast_path_min_terms
+        self.lexical_min_score = lexical_min_score
+        self.min_similarity = 0.3
+        self.index_dirty = False
+        self.index_version = 0  # bumped on every rebuild/reload; part of the result cache key
+        self.query_cache = LRUCache(query_cache_size)  # normalized query -> embedding
+        self.result_cache = LRUCache(result_cache_size)  # (query, top_k, index_version) -> results
+        self.manifest = {}  # {path: {size, mtime, sha256, doc_id}}
+        self.header = None  # header of the loaded index directory
+        self.cache_dir = "multi_document_index"
         self.metadata_file = "document_metadata.json"
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
-    
-    def extract_text_from_txt(self, txt_path: str) -> str:
-        """Extract text from text file"""
-        with open(txt_path, 'r', encoding='utf-8') as file:
-            return file.read().strip()
-    
-    def chunk_text(self, text: str, chunk_size: int = 300, overlap: int = 50) -> List[str]:
-        """Split text into overlapping chunks"""
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            if chunk.strip():
-                chunks.append(chunk)
-        
-        return chunks
-    
-    def process_document(self, file_path: str, doc_id: str = None) -> Dict:
-        """Process a single document and return document info"""
-        if doc_id is None:
-            doc_id = os.path.basename(file_path)
+    def process_documents_folder(self, folder_path: str):
+        """Process new or changed documents in a folder, reusing cached ones"""
+        if not os.path.exists(folder_path):
+            print(f"Folder not found: {folder_path}")
+            return
         
-        print(f"Processing: {file_path}")
+        # Start from the existing cache, if any
+        if self.load_cache():
+            print("Loaded existing embeddings from cache")
+        manifest = self.manifest
         
-        # Extract text based on file type
-        if file_path.lower().endswith('.pdf'):
-            text = self.extract_text_from_pdf(file_path)
-        elif file_path.lower().endswith('.txt'):
-            text = self.extract_text_from_txt(file_path)
-        else:
-            print(f"Unsupported file type: {file_path}")
-            return None
+        # Compare the folder against the manifest
+        new_manifest = self.fingerprint_folder(folder_path)
+        pending = []
+        for path, fingerprint in new_manifest.items():
+            entry = manifest.get(path)
+            doc_id = fingerprint['doc_id']
+            unchanged = (entry is not None
+                         and entry.get('sha256') == fingerprint['sha256']
+                         and (doc_id in self.documents or entry.get('empty', False)))
+            if not unchanged:
+                pending.append(path)
+            elif entry.get('empty'):
+                fingerprint['empty'] = True
         
-        if not text.strip():
-            print(f"No text extracted from: {file_path}")
-            return None
+        # Drop documents whose files were removed
+        live_ids = {entry['doc_id'] for entry in new_manifest.values()}
+        removed = [doc_id for doc_id in self.documents if doc_id not in live_ids]
+        for doc_id in removed:
+            print(f"Removing: {doc_id}")
+            del self.documents[doc_id]
+            self.index_dirty = True
         
-        # Create chunks
-        chunks = self.chunk_text(text)
+        # Re-extract and re-embed only what changed
+        if pending:
+            self.ingest_files(pending, new_manifest)
         
-        # Generate embeddings
-        embeddings = self.model.encode(chunks)
+        if pending or removed or new_manifest != manifest or self.storage_stale:
+            print(f"Index updated: {len(pending)} processed, {len(removed)} removed, "
+                  f"{len(self.documents)} documents total")
+            self.manifest = new_manifest
+            self.build_index()
+            self.save_cache()
+            self.save_metadata()
+            # Re-open the new files so vectors live in the shared page cache again
+            self.load_cache()
+    
+    def open_prebuilt(self, folder_path: str) -> bool:
+        """Open the index built ahead of time (build_index.py) without embedding anything.
+        False if there is none, or if it was built with other settings or from other files."""
+        if not self.load_cache():
+            print(f"No usable index in {self.cache_dir}")
+            return False
+        current = self.fingerprint_folder(folder_path) if os.path.exists(folder_path) else {}
+        if corpus_hash(current) != self.header.get('corpus_hash'):
+            added = [path for path in current if path not in self.manifest]
+            removed = [path for path in self.manifest if path not in current]
+            changed = [path for path in current if path in self.manifest
+                       and current[path]['sha256'] != self.manifest[path].get('sha256')]
+            print(f"Index in {self.cache_dir} is out of date: {len(added)} added, "
+                  f"{len(changed)} changed, {len(removed)} removed documents")
+            return False
+        return True
+    
+    def ingest_files(self, paths: List[str], manifest: Dict):
+        """Run the parallel extract/chunk/embed pipeline and store the results"""
+        pipeline = IngestionPipeline(self.model, self.chunk_size, self.overlap,
+                                     workers=self.ingest_workers, batch_size=self.embed_batch_size,
+                                     encoder_threads=self.embed_threads, bucket_window=self.bucket_window,
+                                     text_cache=self.text_cache)
+        try:
+            results = pipeline.run([(path, manifest[path]['sha256']) for path in paths])
+        except Exception as e:
+            print(f"Error processing documents: {e}")
+            results = {}
         
-        # Store document info
-        doc_info = {
-            'title': os.path.basename(file_path),
-            'path': file_path,
-            'chunks': chunks,
-            'embeddings': embeddings,
-            'chunk_count': len(chunks)
-        }
+        for path in paths:
+            doc_id = os.path.basename(path)
+            if path in pipeline.empty:
+                # Remember it so an image-only PDF is not re-parsed on every start
+                manifest[path]['empty'] = True
+                self.documents.pop(doc_id, None)
+                continue
+            if path not in results:
+                manifest.pop(path, None)
+                self.documents.pop(doc_id, None)
+                continue
+            chunks = results[path]['chunks']
+            self.documents[doc_id] = {
+                'title': os.path.basename(path),
+                'path': path,
+                'chunks': chunks,
+                'embeddings': results[path]['embeddings'],
+                'chunk_count': len(chunks)
+            }
+        self.index_dirty = True
+    
+    def scan_documents_folder(self, folder_path: str) -> List[str]:
+        """List supported document files in a folder"""
+        files = []
+        for file_path in sorted(Path(folder_path).rglob('*')):
+            if file_path.is_file() and file_path.suffix.lower() in ['.pdf', '.txt']:
+                files.append(str(file_path))
+        return files
+    
+    def fingerprint_folder(self, folder_path: str) -> Dict[str, Dict]:
+        """Manifest entries for the supported files of a folder, reusing known hashes"""
+        fingerprints = {}
+        for path in self.scan_documents_folder(folder_path):
+            try:
+                fingerprint = self.file_fingerprint(path, self.manifest.get(path))
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                continue
+            fingerprint['doc_id'] = os.path.basename(path)
+            fingerprints[path] = fingerprint
+        return fingerprints
+    
+    def file_fingerprint(self, path: str, previous: Dict = None) -> Dict:
+        """Size, mtime and content hash of a file; the hash is reused if size and mtime match"""
+        stat = os.stat(path)
+        fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        if (previous is not None and previous.get('size') == stat.st_size
+                and previous.get('mtime') == stat.st_mtime and previous.get('sha256')):
+            fingerprint['sha256'] = previous['sha256']
+            return fingerprint
         
-        self.documents[doc_id] = doc_info
-        return doc_info
+        fingerprint['sha256'] = file_sha256(path)
+        return fingerprint
     
-    def process_documents_folder(self, folder_path: str):
-        """Process all documents in a folder"""
-        if not os.path.exists(folder_path):
-            print(f"Folder not found: {folder_path}")
-            return
+    def build_index(self):
+        """Rebuild the consolidated embedding matrix and the BM25 index from self.documents"""
+        self.index.build(self.documents)
+        self.lexical.build(self.row_texts())
+        self.index_dirty = False
+        self.bump_index_version()
+    
+    def row_texts(self):
+        """Chunk texts in the row order of the embedding matrix"""
+        for doc_info in self.documents.values():
+            if len(doc_info['chunks']):
+                yield from doc_info['chunks']
+    
+    def bump_index_version(self):
+        """Invalidate cached results after the index changed"""
+        self.index_version += 1
+        self.result_cache.clear()
+    
+    def search(self, query: str, top_k: int = 3, doc_ids: Optional[Iterable[str]] = None,
+               min_similarity: Optional[float] = None) -> List[Dict]:
+        """Search for relevant chunks across all documents, or only the given ones"""
+        return self.search_batch([query], top_k=top_k, doc_ids=doc_ids, min_similarity=min_similarity)[0]
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Query embeddings, encoding only those not found in the query cache"""
+        keys = [normalize_query(query) for query in queries]
+        vectors = [self.query_cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            with tracer.span("rag.embed", queries=len(missing)):
+                encoded = self.model.encode([queries[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vector = np.asarray(vector, dtype=np.float32)
+                self.query_cache.put(keys[i], vector)
+                vectors[i] = vector
+        return np.vstack(vectors)
+    
+    def search_batch(self, queries: List[str], top_k: int = 3, doc_ids: Optional[Iterable[str]] = None,
+                     min_similarity: Optional[float] = None) -> List[List[Dict]]:
+        """Search several queries at once with one encoder pass and one matrix product.
+        doc_ids restricts the search to those documents' chunks (e.g. a single book);
+        min_similarity overrides self.min_similarity for these queries."""
+        if self.index_dirty:
+            self.build_index()
         
-        # Try to load existing cache
-        if self.load_cache():
-            print("Loaded existing embeddings from cache")
-            return
+        if not self.documents or len(self.index) == 0:
+            return [[] for _ in queries]
         
-        # Process all files in folder
-        for file_path in Path(folder_path).rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in ['.pdf', '.txt']:
-                try:
-                    self.process_document(str(file_path))
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+        doc_ids = None if doc_ids is None else tuple(sorted(set(doc_ids)))
+        with tracer.span("rag.search", queries=len(queries), top_k=top_k) as span:
+            all_results, cache_hits, lexical_only = self._search_batch(queries, top_k, doc_ids, min_similarity)
+            if tracer.enabled:
+                span.set(cache_hits=cache_hits, lexical_only=lexical_only,
+                         scores=[[round(r['score'], 4) for r in results] for results in all_results])
         
-        # Save cache
-        self.save_cache()
-        self.save_metadata()
-    
-    def search(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Search for relevant chunks across all documents"""
-        if not self.documents:
-            return []
+        # Hand out copies so callers can't mutate cached entries
+        return [[dict(result) for result in results] for results in all_results]
+    
+    def _search_batch(self, queries: List[str], top_k: int, doc_ids: Optional[Tuple[str, ...]] = None,
+                      min_similarity: Optional[float] = None) -> Tuple[List[List[Dict]], int, int]:
+        """Results per query, how many came from the result cache and how many from keywords alone"""
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+        # Serve repeated questions from the result cache
+        keys = [(normalize_query(query), top_k, self.index_version, doc_ids, min_similarity) for query in queries]
+        all_results = [self.result_cache.get(key) for key in keys]
+        pending = [i for i, results in enumerate(all_results) if results is None]
+        candidates = max(top_k * 4, 10)
+        rows = None if doc_ids is None else self.index.document_rows(doc_ids)
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in queries], len(queries) - len(pending), 0
         
-        # Encode query
-        query_embedding = self.model.encode([query])
+        # Keyword lookup first: confident matches on names and rare words skip the encoder
+        lexical = {}
+        to_encode = []
+        if self.hybrid_weight > 0 and len(self.lexical):
+            with tracer.span("rag.lexical", queries=len(pending)):
+                for i in pending:
+                    lexical[i] = self.lexical.search(queries[i], candidates, rows=rows)
+        for i in pending:
+            lex_rows, lex_scores = lexical.get(i, (None, None))
+            if (self.lexical_fast_path is not None and lex_rows is not None and len(lex_rows)
+                    and lex_scores[0] >= self.lexical_fast_path
+                    and len(set(tokenize(queries[i]))) >= self.lexical_fast_path_min_terms):
+                keep = lex_scores >= self.lexical_min_score
+                all_results[i] = [self._result(row, score, None, "lexical")
+                                  for row, score in zip(lex_rows[keep][:top_k], lex_scores[keep][:top_k])]
+                self.result_cache.put(keys[i], all_results[i])
+            else:
+                to_encode.append(i)
         
-        all_results = []
+        if to_encode:
+            query_embeddings = self.embed_queries([queries[i] for i in to_encode])
+            with tracer.span("rag.index", mode="ivf" if self.index.use_ann() else "exact"):
+                dense = self.index.search_rows(query_embeddings, top_k=candidates if lexical else top_k, rows=rows)
+            for j, i in enumerate(to_encode):
+                dense_rows, dense_scores = dense[j]
+                if i in lexical:
+                    ranked = self._fuse(query_embeddings[j], dense_rows, dense_scores, *lexical[i],
+                                        min_similarity)
+                else:
+                    ranked = [(row, float(score), float(score)) for row, score in zip(dense_rows, dense_scores)
+                              if score > min_similarity]
+                retriever = "hybrid" if i in lexical else "dense"
+                all_results[i] = [self._result(row, score, similarity, retriever)
+                                  for row, score, similarity in ranked[:top_k]]
+                self.result_cache.put(keys[i], all_results[i])
+        return all_results, len(queries) - len(pending), len(pending) - len(to_encode)
+    
+    def _fuse(self, query_embedding: np.ndarray, dense_rows: np.ndarray, dense_scores: np.ndarray,
+              lexical_rows: np.ndarray, lexical_scores: np.ndarray,
+              min_similarity: float) -> List[Tuple[int, float, float]]:
+        """(row, score, similarity) ranked by the weighted sum of embedding similarity and
+        normalized BM25 over both candidate sets.
+        A chunk qualifies through either retriever: similarity above min_similarity, or a
+        keyword match of at least lexical_min_score."""
+        dense = dict(zip(dense_rows.tolist(), dense_scores.tolist()))
+        keyword = dict(zip(lexical_rows.tolist(), lexical_scores.tolist()))
+        missing = [row for row in keyword if row not in dense]
+        if missing:
+            dense.update(zip(missing, self.index.row_similarities(query_embedding, np.asarray(missing)).tolist()))
         
-        # Search across all documents
-        for doc_id, doc_info in self.documents.items():
-            if 'embeddings' not in doc_info:
+        ranked = []
+        for row, similarity in dense.items():
+            score = keyword.get(row, 0.0)
+            if similarity <= min_similarity and score < self.lexical_min_score:
                 continue
-            
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, doc_info['embeddings'])[0]
-            
-            # Get top results for this document
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
-            
-            for idx in top_indices:
-                if similarities[idx] > 0.3:  # Minimum similarity threshold
-                    all_results.append({
-                        'text': doc_info['chunks'][idx],
-                        'source': doc_info['title'],
-                        'similarity': float(similarities[idx]),
-                        'doc_id': doc_id
-                    })
-        
-        # Sort by similarity and return top results
-        all_results.sort(key=lambda x: x['similarity'], reverse=True)
-        return all_results[:top_k]
+            ranked.append((row, (1 - self.hybrid_weight) * similarity + self.hybrid_weight * score, similarity))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+    
+    def _result(self, row: int, score: float, similarity: Optional[float], retriever: str) -> Dict:
+        """score ranks the results; similarity is the embedding cosine alone, None when only
+        the keyword index was consulted. retriever is "dense", "hybrid" or "lexical"."""
+        doc_id, chunk_idx = self.index.hit(row)
+        doc_info = self.documents[doc_id]
+        chunks = doc_info['chunks']
+        start, end = chunks.spans[chunk_idx]
+        return {
+            'text': chunks[chunk_idx],
+            'source': doc_info['title'],
+            'score': float(score),
+            'similarity': None if similarity is None else float(similarity),
+            'retriever': retriever,
+            'doc_id': doc_id,
+            'chunk': chunk_idx,
+            'span': (int(start), int(end))  # byte offsets in the document text
+        }
+    
+    def passage_text(self, doc_id: str, start: int, end: int) -> str:
+        """Text of a document between two byte offsets (e.g. several merged chunk spans)"""
+        return span_text(self.documents[doc_id]['chunks'].text, start, end)
+    
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters of the query embedding and result caches"""
+        return {
+            'query_embeddings': self.query_cache.stats(),
+            'results': self.result_cache.stats(),
+            'index_version': self.index_version
+        }
     
     def get_document_stats(self) -> List[Dict]:
         """Get statistics about loaded documents"""
@@ -154,40 +364,83 @@ class MultiDocumentRAG:
         return stats
     
     def save_cache(self):
-        """Save embeddings to cache file"""
+        """Save chunks and embeddings to the memory-mappable index directory"""
         try:
-            cache_data = {}
-            for doc_id, doc_info in self.documents.items():
-                cache_data[doc_id] = {
-                    'title': doc_info['title'],
-                    'path': doc_info['path'],
-                    'chunks': doc_info['chunks'],
-                    'embeddings': doc_info['embeddings'],
-                    'chunk_count': doc_info['chunk_count']
-                }
-            
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-            print(f"Cache saved to {self.cache_file}")
+            extra = {'manifest': self.manifest,
+                     'corpus_hash': corpus_hash(self.manifest),
+                     'chunker': {'version': CHUNKER_VERSION},
+                     'lexical': {'type': 'bm25', 'k1': self.lexical.k1, 'b': self.lexical.b,
+                                 'terms': len(self.lexical.vocab)}}
+            arrays = self.lexical.to_arrays()
+            if self.index.codec is not None:
+                # The float32 matrix stays the source for rebuilds; searches map only the codes
+                extra['vector_storage'] = self.index.codec.describe()
+                arrays[CODES_FILE] = self.index.embeddings
+                arrays.update(self.index.codec.to_arrays())
+            if self.index.ann is not None:
+                extra['ann'] = {'type': 'ivf', 'n_lists': self.index.ann.n_lists}
+                arrays.update(self.index.ann.to_arrays())
+            save_index(self.cache_dir, self.documents, self.model_name,
+                       self.chunk_size, self.overlap, extra=extra, arrays=arrays)
+            print(f"Cache saved to {self.cache_dir}")
         except Exception as e:
             print(f"Error saving cache: {e}")
     
     def load_cache(self) -> bool:
-        """Load embeddings from cache file"""
+        """Open the index directory with memory maps (no unpickling)"""
         try:
-            if not os.path.exists(self.cache_file):
+            if not os.path.exists(self.cache_dir):
                 return False
             
-            with open(self.cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
+            header, matrix, documents = load_index(self.cache_dir)
+            mismatch = self.settings_mismatch(header)
+            if mismatch:
+                print(f"Cache in {self.cache_dir} was built with a different {mismatch}, ignoring it")
+                return False
             
-            self.documents = cache_data
-            print(f"Cache loaded from {self.cache_file}")
+            self.header = header
+            self.documents = documents
+            self.manifest = header.get('manifest', {})
+            storage = header.get('vector_storage', {'dtype': "float32", 'dimension': None})
+            self.storage_stale = (storage['dtype'] != self.index.storage_dtype
+                                  or storage.get('dimension') != self.index.storage_dimension)
+            codec = codes = None
+            if self.index.compressed and not self.storage_stale:
+                codec = VectorCodec.load(self.cache_dir, storage)
+                codes = np.load(os.path.join(self.cache_dir, CODES_FILE), mmap_mode='r', allow_pickle=False)
+            elif self.storage_stale:
+                print(f"Index in {self.cache_dir} stores {storage['dtype']} vectors, "
+                      f"re-encoding as {self.index.storage_dtype}")
+            # IVF centroids live in the search space of the saved storage settings
+            ann = None
+            if 'ann' in header and not self.storage_stale:
+                ann = IVFIndex.load(self.cache_dir, nprobe=self.index.nprobe)
+            self.index.attach(matrix, documents, ann=ann, codec=codec, codes=codes)
+            params = header.get('lexical', {})
+            lexical = BM25Index.load(self.cache_dir, k1=params.get('k1', 1.2), b=params.get('b', 0.75))
+            if lexical is None or len(lexical) != len(self.index):
+                # Index written before keyword search existed: build it in memory
+                lexical = BM25Index()
+                lexical.build(self.row_texts())
+            self.lexical = lexical
+            self.index_dirty = False
+            self.bump_index_version()
+            print(f"Cache loaded from {self.cache_dir}")
             return True
         except Exception as e:
             print(f"Error loading cache: {e}")
             return False
     
+    def settings_mismatch(self, header: Dict) -> Optional[str]:
+        """Name of the first setting that makes the vectors of an index header unusable here, or None"""
+        if header['model_name'] != self.model_name:
+            return f"embedding model ({header['model_name']})"
+        if header['chunk_size'] != self.chunk_size or header['overlap'] != self.overlap:
+            return f"chunk size/overlap ({header['chunk_size']}/{header['overlap']})"
+        if header.get('chunker', {}).get('version') != CHUNKER_VERSION:
+            return f"chunker version ({header.get('chunker', {}).get('version')})"
+        return None
+    
     def save_metadata(self):
         """Save document metadata to JSON file"""
         try:
@@ -222,7 +475,7 @@ if __name__ == "__main__":
         for i, result in enumerate(results, 1):
             print(f"{i}. {result['text'][:100]}...")
             print(f"   Source: {result['source']}")
-            print(f"   Similarity: {result['similarity']:.3f}")
+            print(f"   Score: {result['score']:.3f} ({result['retriever']})")
             print()
     else:
         print("Documents folder not found. Run setup_documents.py first.")
\ No newline at end of file
@@ -1,98 +1,92 @@
 # petit_prince_rag.py
-import PyPDF2
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
 import os
-from typing import List, Tuple
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import config
+from chunking import ChunkSpans
+from model_registry import DEFAULT_EMBEDDING_MODEL, configured_rag, shared_rag
 
 class PetitPrinceRAG:
-    def __init__(self, embedding_model: str = "paraphrase-multilingual-MiniLM-L12-v2"):
-        self.model = SentenceTransformer(embedding_model)
-        self.chunks = []
-        self.embeddings = None
-        self.cache_file = "petit_prince_embeddings.pkl"
+    """Le Petit Prince passages from the process-wide multi-document index, restricted to the book.
+    No model or vectors of its own: the embedding model and index are the ones MultiDocumentRAG uses."""
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-        
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        
-        return text.strip()
+    MIN_SIMILARITY = 0.1  # the book's own cutoff, lower than the assistant's rag.min_similarity
     
-    def chunk_text(self, text: str, chunk_size: int = 300, overlap: int = 50) -> List[str]:
-        """Split text into overlapping chunks"""
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = " ".join(words[i:i + chunk_size])
-            if len(chunk.strip()) > 20:  # Only keep meaningful chunks
-                chunks.append(chunk.strip())
-        
-        return chunks
+    def __init__(self, embedding_model: str = DEFAULT_EMBEDDING_MODEL, rag=None):
+        self.model_name = embedding_model
+        # Same chunk and storage settings as the assistant, so both open the same index directory
+        if rag is None:
+            rag = configured_rag() if embedding_model == DEFAULT_EMBEDDING_MODEL else \
+                shared_rag(embedding_model, chunk_size=config.RAG_CHUNK_SIZE, overlap=config.RAG_OVERLAP,
+                           vector_dtype=config.RAG_VECTOR_DTYPE, vector_dimension=config.RAG_VECTOR_DIM)
+        self.rag = rag
+        self.model = self.rag.model
+        self.doc_id: Optional[str] = None
+    
+    @property
+    def chunks(self) -> ChunkSpans:
+        if self.doc_id not in self.rag.documents:
+            return ChunkSpans()
+        return self.rag.documents[self.doc_id]['chunks']
     
-    def create_embeddings(self, chunks: List[str]) -> np.ndarray:
-        """Create embeddings for text chunks"""
-        print("Creating embeddings... (this may take a moment)")
-        embeddings = self.model.encode(chunks, show_progress_bar=True)
-        return embeddings
+    @property
+    def embeddings(self):
+        if self.doc_id not in self.rag.documents:
+            return None
+        return self.rag.documents[self.doc_id]['embeddings']
     
     def setup_knowledge_base(self, pdf_path: str, force_refresh: bool = False):
-        """Setup the knowledge base from PDF"""
-        if os.path.exists(self.cache_file) and not force_refresh:
-            print("Loading cached embeddings...")
-            with open(self.cache_file, 'rb') as f:
-                data = pickle.load(f)
-                self.chunks = data['chunks']
-                self.embeddings = data['embeddings']
-            print(f"Loaded {len(self.chunks)} chunks from cache.")
-            return
-        
-        print("Extracting text from PDF...")
-        text = self.extract_text_from_pdf(pdf_path)
-        
-        print("Chunking text...")
-        self.chunks = self.chunk_text(text)
-        
-        print(f"Created {len(self.chunks)} chunks.")
-        
-        self.embeddings = self.create_embeddings(self.chunks)
+        """Find the book in the shared index. If it is missing or force_refresh is set, it is added
+        there with RAG_INDEX_POLICY = "rebuild" (only from inside DOCUMENTS_FOLDER, so the next folder
+        scan sees the same file); under "prebuilt" the user is sent to build_index.py."""
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
-        # Cache the results
-        print("Caching embeddings...")
-        with open(self.cache_file, 'wb') as f:
-            pickle.dump({
-                'chunks': self.chunks,
-                'embeddings': self.embeddings
-            }, f)
+        self.doc_id = os.path.basename(pdf_path)
+        rag = self.rag
+        if not rag.documents:
+            rag.load_cache()
+        if self.doc_id in rag.documents and not force_refresh:
+            print(f"Using {len(self.chunks)} chunks of {self.doc_id} from the shared index.")
+            return
+        if config.RAG_INDEX_POLICY == "prebuilt":
+            # Embedding happens ahead of time, never while the assistant starts
+            state = "to be refreshed" if self.doc_id in rag.documents else "missing from the index"
+            print(f"{self.doc_id} is {state}. Put it in '{config.DOCUMENTS_FOLDER}' and run "
+                  f"'python build_index.py' (or set RAG_INDEX_POLICY = \"rebuild\").")
+            return
         
-        print("Knowledge base setup complete!")
+        # Manifest keys are the paths process_documents_folder finds in the documents folder;
+        # any other key is pruned by the next scan and breaks the prebuilt corpus hash
+        folder = Path(config.DOCUMENTS_FOLDER)
+        try:
+            relative = Path(pdf_path).resolve().relative_to(folder.resolve())
+        except ValueError:
+            print(f"{pdf_path} is outside '{config.DOCUMENTS_FOLDER}'. Copy it there to add it to the index.")
+            return
+        path = str(folder / relative)
+        
+        print(f"Adding {path} to the shared index...")
+        manifest = dict(rag.manifest)
+        fingerprint = rag.file_fingerprint(path, manifest.get(path))
+        fingerprint['doc_id'] = self.doc_id
+        manifest[path] = fingerprint
+        rag.ingest_files([path], manifest)
+        rag.manifest = manifest
+        rag.build_index()
+        rag.save_cache()
+        rag.load_cache()
+        
+        print(f"Knowledge base setup complete! {len(self.chunks)} chunks.")
     
     def search_relevant_passages(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
         """Find most relevant passages for a query"""
         if self.embeddings is None:
             return []
         
-        query_embedding = self.model.encode([query])
-        similarities = cosine_similarity(query_embedding, self.embeddings)[0]
-        
-        # Get top-k most similar chunks
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
-        results = []
-        for idx in top_indices:
-            if similarities[idx] > 0.1:  # Only include reasonably similar passages
-                results.append((self.chunks[idx], similarities[idx]))
-        
-        return results
+        results = self.rag.search(query, top_k=top_k, doc_ids=[self.doc_id], min_similarity=self.MIN_SIMILARITY)
+        return [(result['text'], result['score']) for result in results]
     
     def get_context_for_query(self, query: str, max_context_length: int = 500) -> str:
         """Get relevant context from Le Petit Prince for a query"""
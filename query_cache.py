@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Query Caches
+Bounded LRU caches used to skip the sentence encoder and the index scan for
+questions that were already asked.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+_SPACES = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[\s\"'«»“”.,;:!?¿¡…-]+|[\s\"'«»“”.,;:!?¿¡…-]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a spoken query: NFC, lower case, single spaces, no edge punctuation"""
+    query = unicodedata.normalize('NFC', query).lower()
+    query = query.replace('’', "'")
+    query = _EDGE_PUNCTUATION.sub('', query)
+    return _SPACES.sub(' ', query).strip()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used mapping with hit/miss counters"""
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, self._MISSING)
+            if value is self._MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Semantic Response Cache
+Stores LLM replies in SQLite keyed by the question embedding, the ids and text hashes
+of the chunks the context was built from and a hash of the system prompt. A new question whose
+embedding is close enough to a stored one, with the same context chunks and the
+same prompt, gets the stored reply instead of an OpenAI call. Entries expire after
+a TTL and the least recently used are evicted beyond a size limit. Personal
+questions to Lucas ("Quand tu étais petit...") are left out unless enabled.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from query_cache import normalize_query
+
+# Second-person forms: the student is asking about Lucas himself
+PERSONAL_QUESTION = re.compile(r"\b(?:tu|toi|ton|ta|tes|te)\b|\bt'")
+
+
+def is_personal(question: str) -> bool:
+    """Whether a question is addressed to Lucas ("Qu'est-ce que tu aimais...", "t'as...")"""
+    return PERSONAL_QUESTION.search(normalize_query(question)) is not None
+
+
+def prompt_version(system_prompt: str, model: str = "") -> str:
+    """Short hash of everything besides the question that shapes the reply"""
+    return hashlib.sha256(f"{model}\n{system_prompt}".encode('utf-8')).hexdigest()[:16]
+
+
+def context_id(hits: Iterable[Dict]) -> str:
+    """Order-independent id of the retrieved chunks and their text ("" when nothing was retrieved).
+    The text is part of it, so replies built from a chunk stop matching once its document is
+    edited and re-indexed, even if the chunk keeps its position."""
+    keys = sorted(f"{hit['doc_id']}#{hit.get('chunk', '')}#"
+                  f"{hashlib.sha256(hit.get('text', '').encode('utf-8')).hexdigest()}" for hit in hits)
+    if not keys:
+        return ""
+    return hashlib.sha256("\n".join(keys).encode('utf-8')).hexdigest()[:16]
+
+
+class ResponseCache:
+    """Thread-safe persistent semantic cache with TTL and LRU eviction"""
+
+    def __init__(self, path: str = "response_cache.sqlite3", threshold: float = 0.92,
+                 ttl: Optional[float] = 7 * 24 * 3600, max_entries: int = 2000, cache_personal: bool = False):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_personal = cache_personal
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY,
+            context_id TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            question TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            response TEXT NOT NULL,
+            created REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_key ON responses (context_id, prompt_version)")
+        self._db.commit()
+        # (context_id, prompt_version) -> (row ids, normalized embedding matrix) for lookups
+        self._vectors: Dict[Tuple[str, str], Tuple[List[int], np.ndarray]] = {}
+        self.counters = {'lookups': 0, 'hits': 0, 'misses': 0, 'stores': 0, 'skipped_personal': 0,
+                         'expired': 0, 'evicted': 0}
+        self._expire()
+        self._load_vectors()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _load_vectors(self):
+        self._vectors = {}
+        rows = self._db.execute("SELECT id, context_id, prompt_version, embedding FROM responses ORDER BY id")
+        grouped: Dict[Tuple[str, str], Tuple[List[int], List[np.ndarray]]] = {}
+        for row_id, ctx, version, blob in rows:
+            ids, vectors = grouped.setdefault((ctx, version), ([], []))
+            ids.append(row_id)
+            vectors.append(np.frombuffer(blob, dtype=np.float32))
+        for key, (ids, vectors) in grouped.items():
+            self._vectors[key] = (ids, np.vstack(vectors))
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        cursor = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        if cursor.rowcount:
+            self._db.commit()
+            self.counters['expired'] += cursor.rowcount
+            self._load_vectors()
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question: str, embedding: np.ndarray, context: str, version: str) -> Optional[str]:
+        """Stored reply for a similar question with the same context and prompt, or None"""
+        if not self.cache_personal and is_personal(question):
+            with self._lock:
+                self.counters['skipped_personal'] += 1
+            return None
+        query = self._normalize(embedding)
+        with self._lock:
+            self.counters['lookups'] += 1
+            self._expire()
+            ids, matrix = self._vectors.get((context, version), ([], None))
+            if matrix is not None and matrix.shape[1] == query.shape[0]:
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    row = self._db.execute("SELECT response FROM responses WHERE id = ?", (ids[best],)).fetchone()
+                    if row is not None:
+                        self._db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE id = ?",
+                                         (time.time(), ids[best]))
+                        self._db.commit()
+                        self.counters['hits'] += 1
+                        return row[0]
+            self.counters['misses'] += 1
+            return None
+
+    def store(self, question: str, embedding: np.ndarray, context: str, version: str, response: str):
+        """Remember a reply (personal questions are skipped unless cache_personal is set)"""
+        if not response or (not self.cache_personal and is_personal(question)):
+            return
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO responses (context_id, prompt_version, question, embedding, response, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (context, version, question, vector.tobytes(), response, now, now))
+            self.counters['stores'] += 1
+            ids, matrix = self._vectors.get((context, version), ([], None))
+            if matrix is None or matrix.shape[1] != vector.shape[0]:
+                self._vectors[(context, version)] = ([cursor.lastrowid], vector.reshape(1, -1))
+            else:
+                self._vectors[(context, version)] = (ids + [cursor.lastrowid], np.vstack([matrix, vector]))
+
+            excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute("DELETE FROM responses WHERE id IN "
+                                 "(SELECT id FROM responses ORDER BY last_used LIMIT ?)", (excess,))
+                self.counters['evicted'] += excess
+                self._db.commit()
+                self._load_vectors()
+            else:
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._vectors = {}
+
+    def stats(self) -> Dict:
+        """Counters since start plus the hit rate over lookups"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        stats['hit_rate'] = stats['hits'] / stats['lookups'] if stats['lookups'] else 0.0
+        return stats
+
+    def print_stats(self):
+        stats = self.stats()
+        if not stats['lookups'] and not stats['skipped_personal']:
+            return
+        print(f"Response cache: {stats['hits']}/{stats['lookups']} hits ({stats['hit_rate']:.0%}), "
+              f"{stats['skipped_personal']} personal questions not cached, {stats['entries']} entries")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
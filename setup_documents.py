@@ -49,7 +49,7 @@ This folder should contain your French cultural documents for the assistant to r
 
 ## Setup Instructions:
 1. Add your legally obtained files to this folder
-2. Run 'python setup_documents.py' again to process them
+2. Run 'python build_index.py' to process them
 3. The assistant will automatically use this content for cultural context
 
 ## Note:
@@ -126,14 +126,14 @@ def main():
         for doc in existing_docs:
             print(f"  - {os.path.basename(doc)}")
         
-        print("\nTo process these documents, run:")
-        print("python multi_document_rag.py")
+        print("\nTo build the search index from these documents, run:")
+        print("python build_index.py")
     else:
         print(f"\nNo documents found in '{documents_folder}'")
         print("\nNext steps:")
         print("1. Add your French cultural documents to the 'Info for French' folder")
         print("2. Use legal sources like plot summaries, analyses, or your own notes")
-        print("3. Run this script again to process the documents")
+        print("3. Run 'python build_index.py' to build the search index")
         print("4. Start the assistant with: python french_vad_assistant.py")
     
     print(f"\nDocuments folder: {documents_folder}")
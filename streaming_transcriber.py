@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Streaming Whisper Transcription
+Decodes the growing utterance on a background thread while the user is still
+speaking. Segments that come out identical in two consecutive passes (and are not
+right at the edge of the audio) are committed; only the audio after the last
+committed segment is decoded again. When endpointing fires, only the short
+unstable tail is left to decode.
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from tracing import tracer
+
+
+class StreamingTranscriber:
+    def __init__(self, model, sample_rate: int = 16000, language: str = "fr", interval: float = 1.0,
+                 min_audio: float = 1.0, edge_margin: float = 1.0, final_slack: float = 1.2,
+                 on_partial: Optional[Callable[[str, str], None]] = None,
+                 model_lock: Optional[threading.Lock] = None):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.language = language
+        self.interval = interval          # seconds between background decodes
+        self.min_audio = min_audio        # don't decode windows shorter than this
+        self.edge_margin = edge_margin    # segments ending this close to the edge stay tentative
+        self.final_slack = final_slack    # trailing audio (endpoint silence) a last pass may miss
+        self.on_partial = on_partial      # called with (committed text, tentative text)
+        self.model_lock = model_lock or threading.Lock()  # share it when the model has other users
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._get_audio = None
+        self.reset()
+
+    def reset(self):
+        """Forget the previous utterance"""
+        self.committed: List[str] = []
+        self.committed_samples = 0
+        self.tentative: List[dict] = []
+        self.decoded_until = 0           # absolute sample count covered by the last pass
+        self.passes = 0
+
+    def start(self, get_audio: Callable[[], Optional[np.ndarray]]):
+        """Start decoding in the background; get_audio returns the utterance so far (float32) or None"""
+        self.stop()
+        self.reset()
+        self._get_audio = get_audio
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background worker (waits for an in-flight decode)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def finish(self, audio: Optional[np.ndarray]) -> Optional[str]:
+        """Stop streaming and return the full transcript of the final utterance"""
+        self.stop()
+        if audio is None:
+            return None
+
+        audio_seconds = len(audio) / self.sample_rate
+        with tracer.span("asr", streaming=True, audio_seconds=audio_seconds, passes=self.passes) as span:
+            try:
+                # The last pass already saw everything but the endpoint silence: reuse it
+                if self.passes and self.decoded_until >= len(audio) - int(self.final_slack * self.sample_rate):
+                    tail = [segment['text'] for segment in self.tentative]
+                    decoded_seconds = 0.0
+                else:
+                    window = audio[self.committed_samples:]
+                    segments = self._decode(window)
+                    tail = [segment['text'] for segment in segments]
+                    decoded_seconds = len(window) / self.sample_rate
+            except Exception as e:
+                print(f"Transcription error: {e}")
+                return None
+            text = self._join(self.committed + tail)
+            span.set(tail_seconds=decoded_seconds, chars=len(text))
+        return text
+
+    def text(self) -> str:
+        """Committed plus tentative text of the current utterance"""
+        with self._lock:
+            return self._join(self.committed + [segment['text'] for segment in self.tentative])
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            audio = self._get_audio()
+            if audio is None or len(audio) - self.committed_samples < self.min_audio * self.sample_rate:
+                continue
+            try:
+                self._step(audio)
+            except Exception as e:
+                print(f"Streaming transcription error: {e}")
+
+    def _step(self, audio: np.ndarray):
+        """Decode the uncommitted window and commit the prefix that agrees with the previous pass"""
+        offset = self.committed_samples
+        window = audio[offset:]
+        with tracer.span("asr.partial", audio_seconds=len(window) / self.sample_rate):
+            segments = self._decode(window)
+        edge = len(window) / self.sample_rate - self.edge_margin
+
+        stable = 0
+        for i, segment in enumerate(segments):
+            if (i < len(self.tentative) and segment['text'] == self.tentative[i]['text']
+                    and segment['end'] <= edge):
+                stable = i + 1
+            else:
+                break
+
+        with self._lock:
+            for segment in segments[:stable]:
+                self.committed.append(segment['text'])
+            if stable:
+                self.committed_samples = offset + int(segments[stable - 1]['end'] * self.sample_rate)
+            self.tentative = segments[stable:]
+            self.decoded_until = len(audio)
+            self.passes += 1
+
+        if self.on_partial is not None:
+            self.on_partial(self._join(self.committed), self._join([s['text'] for s in self.tentative]))
+
+    def _decode(self, window: np.ndarray) -> List[dict]:
+        if len(window) == 0:
+            return []
+        prompt = self._join(self.committed)[-200:] or None
+        with self.model_lock:
+            result = self.model.transcribe(window, language=self.language, initial_prompt=prompt,
+                                           condition_on_previous_text=False, temperature=0.0, fp16=False)
+        return [{'text': segment['text'].strip(), 'start': segment['start'], 'end': segment['end']}
+                for segment in result.get('segments', []) if segment['text'].strip()]
+
+    @staticmethod
+    def _join(parts: List[str]) -> str:
+        return " ".join(part for part in parts if part).strip()
@@ -0,0 +1,38 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_registry  # noqa: E402
+
+
+class TrigramModel:
+    """Hashed character trigrams: words sharing letters are close even when BM25 sees no match.
+    encoded lists every text passed to encode, to tell what was (re-)embedded."""
+    dimension = 256
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                word = f" {word} "
+                for j in range(len(word) - 2):
+                    vectors[i, zlib.crc32(word[j:j + 3].encode('utf-8')) % self.dimension] += 1.0
+        return vectors
+
+
+@pytest.fixture
+def trigram_model(monkeypatch):
+    """Registered as the "trigram" embedding model on cpu, so no model is downloaded"""
+    model = TrigramModel()
+    monkeypatch.setitem(model_registry._models, ("trigram", "cpu"), model)
+    return model
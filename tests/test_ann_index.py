@@ -0,0 +1,59 @@
+"""IVF search recall against exact search"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ann_index import IVFIndex
+from vector_codec import normalize_rows, top_k_indices
+
+TOP_K = 10
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    # Clustered like document embeddings: topics, with chunks spread around each
+    rng = np.random.default_rng(0)
+    topics = normalize_rows(rng.normal(size=(40, 48)))
+    vectors = normalize_rows(topics[rng.integers(0, 40, 4000)] + 0.6 * rng.normal(size=(4000, 48)) / np.sqrt(48))
+    queries = normalize_rows(topics[rng.integers(0, 40, 50)] + 0.6 * rng.normal(size=(50, 48)) / np.sqrt(48))
+    index = IVFIndex()
+    index.build(vectors, n_lists=64)
+    truth = top_k_indices(queries @ vectors.T, TOP_K)
+    return vectors, queries, index, truth
+
+
+def recall(index, vectors, queries, truth, nprobe):
+    found = index.search(vectors, queries, TOP_K, nprobe=nprobe)
+    return np.mean([len(set(rows.tolist()) & set(truth[i].tolist())) / TOP_K for i, (rows, _) in enumerate(found)])
+
+
+def test_every_row_is_in_exactly_one_list(corpus):
+    vectors, _, index, _ = corpus
+    assert sorted(index.order.tolist()) == list(range(len(vectors)))
+    assert index.list_offsets[-1] == len(vectors)
+
+
+def test_recall_grows_with_nprobe(corpus):
+    vectors, queries, index, truth = corpus
+    recalls = [recall(index, vectors, queries, truth, nprobe) for nprobe in (1, 4, 16)]
+    assert recalls == sorted(recalls)
+    assert recalls[2] >= 0.95
+    assert recall(index, vectors, queries, truth, index.n_lists) == 1.0
+
+
+def test_scores_are_exact_cosines_best_first(corpus):
+    vectors, queries, index, _ = corpus
+    for query, (rows, scores) in zip(queries, index.search(vectors, queries, TOP_K, nprobe=8)):
+        np.testing.assert_allclose(scores, vectors[rows] @ query, rtol=1e-5)
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_saved_index_finds_the_same_rows(corpus, tmp_path):
+    vectors, queries, index, _ = corpus
+    for name, array in index.to_arrays().items():
+        np.save(os.path.join(tmp_path, name), array)
+    loaded = IVFIndex.load(str(tmp_path))
+    for (rows, _), (expected, _) in zip(loaded.search(vectors, queries, TOP_K), index.search(vectors, queries, TOP_K)):
+        assert rows.tolist() == expected.tolist()
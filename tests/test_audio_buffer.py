@@ -0,0 +1,84 @@
+"""AudioBuffer ring: utterances read back in order across the wraparound, and length cut-off"""
+
+import numpy as np
+
+from french_vad_assistant import AudioBuffer
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+SPEECH = 10000  # frame values at or above this are speech to the fake VAD
+
+
+class FakeVad:
+    def is_speech(self, frame, sample_rate):
+        return np.frombuffer(frame, dtype=np.int16)[0] >= SPEECH
+
+
+class Feeder:
+    """Frames whose samples all hold their frame number (+ SPEECH when voiced)"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.count = 0
+        self.values = []
+
+    def feed(self, frames, speech):
+        ended = []
+        for _ in range(frames):
+            value = self.count + (SPEECH if speech else 0)
+            self.values.append(value)
+            self.count += 1
+            if self.buffer.add_frame(np.full(self.buffer.frame_size, value, dtype=np.int16).tobytes()):
+                ended.append(self.count)
+        return ended
+
+
+def frame_values(audio, frame_size):
+    """Frame values of get_audio_data output (one per frame)"""
+    samples = np.rint(np.asarray(audio) * 32768.0).astype(np.int32).reshape(-1, frame_size)
+    assert np.all(samples == samples[:, :1])
+    return samples[:, 0].tolist()
+
+
+def make_buffer(max_seconds=3):
+    return AudioBuffer(SAMPLE_RATE, FRAME_MS, max_seconds=max_seconds, vad_instance=FakeVad())
+
+
+def test_utterance_across_the_ring_end_reads_back_in_order():
+    buffer = make_buffer()
+    feeder = Feeder(buffer)
+    silence = buffer.max_frames + 7  # the write position has wrapped around
+    feeder.feed(silence, speech=False)
+    feeder.feed(15, speech=True)
+    ended = feeder.feed(buffer.max_silence_frames, speech=False)
+    assert len(ended) == 1
+
+    start = silence - AudioBuffer.PRE_ROLL_FRAMES + 1  # pre-roll includes the first speech frame's slot
+    expected = feeder.values[start:ended[0]]
+    assert (buffer.speech_start % buffer.max_frames) + len(expected) > buffer.max_frames  # two slices
+    assert frame_values(buffer.get_audio_data(), buffer.frame_size) == expected
+
+
+def test_long_utterance_is_cut_at_the_ring_size_and_continues():
+    buffer = make_buffer()
+    feeder = Feeder(buffer)
+    feeder.feed(3, speech=False)
+    cut = feeder.feed(buffer.max_frames - 3, speech=True)  # the pre-roll holds the 3 silent frames
+    assert cut == [buffer.max_frames] and buffer.truncated
+    assert frame_values(buffer.get_audio_data(), buffer.frame_size) == feeder.values[:buffer.max_frames]
+
+    # The rest of the speech starts right after the cut: no pre-roll repeated
+    feeder.feed(10, speech=True)
+    ended = feeder.feed(buffer.max_silence_frames, speech=False)
+    assert len(ended) == 1 and not buffer.truncated
+    assert frame_values(buffer.get_audio_data(), buffer.frame_size) == feeder.values[cut[0]:ended[0]]
+
+
+def test_reused_float_buffer_without_copy():
+    buffer = make_buffer()
+    feeder = Feeder(buffer)
+    feeder.feed(5, speech=True)
+    view = buffer.get_audio_data(copy=False)
+    copy = buffer.get_audio_data()
+    assert np.shares_memory(view, buffer.float_buffer) and not np.shares_memory(copy, buffer.float_buffer)
+    np.testing.assert_array_equal(view, copy)
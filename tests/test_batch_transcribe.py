@@ -0,0 +1,59 @@
+"""Resuming an interrupted batch transcription from its JSON lines output"""
+
+import json
+
+from batch_transcribe import file_fingerprint, load_completed, write_file_records
+
+
+def result(rel_path, texts, fingerprint):
+    return {'utterances': [{'file': rel_path, 'utterance': i, 'text': text} for i, text in enumerate(texts)],
+            'done': {'file': rel_path, 'done': True, **fingerprint, 'utterance_count': len(texts)}}
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_finished_files_are_skipped_on_rerun(tmp_path):
+    output = tmp_path / "transcripts.jsonl"
+    fingerprints = {"a.wav": {'size': 10, 'mtime': 1}, "b.wav": {'size': 20, 'mtime': 2}}
+    with open(output, 'w', encoding='utf-8') as out:
+        write_file_records(out, result("a.wav", ["Bonjour.", "Ça va ?"], fingerprints["a.wav"]))
+    completed = load_completed(str(output), fingerprints)
+    assert set(completed) == {"a.wav"}
+    assert completed["a.wav"]['utterance_count'] == 2
+    assert len(read_lines(output)) == 3  # nothing to drop, file untouched
+
+
+def test_interrupted_file_and_torn_line_are_dropped(tmp_path):
+    output = tmp_path / "transcripts.jsonl"
+    fingerprints = {"a.wav": {'size': 10, 'mtime': 1}, "b.wav": {'size': 20, 'mtime': 2}}
+    with open(output, 'w', encoding='utf-8') as out:
+        write_file_records(out, result("a.wav", ["Bonjour."], fingerprints["a.wav"]))
+        # b.wav was cut off before its done marker, in the middle of a line
+        out.write(json.dumps({'file': "b.wav", 'utterance': 0, 'text': "Il était"}) + "\n")
+        out.write('{"file": "b.wav", "utter')
+    completed = load_completed(str(output), fingerprints)
+    assert set(completed) == {"a.wav"}
+    assert [record['file'] for record in read_lines(output)] == ["a.wav", "a.wav"]
+
+    # The rerun appends b.wav after the kept records
+    with open(output, 'a', encoding='utf-8') as out:
+        write_file_records(out, result("b.wav", ["Il était une fois."], fingerprints["b.wav"]))
+    assert set(load_completed(str(output), fingerprints)) == {"a.wav", "b.wav"}
+    assert [r['text'] for r in read_lines(output) if 'text' in r] == ["Bonjour.", "Il était une fois."]
+
+
+def test_changed_recording_is_transcribed_again(tmp_path):
+    output = tmp_path / "transcripts.jsonl"
+    recording = tmp_path / "a.wav"
+    recording.write_bytes(b"\0" * 10)
+    with open(output, 'w', encoding='utf-8') as out:
+        write_file_records(out, result("a.wav", ["Bonjour."], file_fingerprint(recording)))
+        write_file_records(out, result("gone.wav", ["Au revoir."], {'size': 5, 'mtime': 3}))
+
+    recording.write_bytes(b"\0" * 12)
+    completed = load_completed(str(output), {"a.wav": file_fingerprint(recording)})
+    # Records of files no longer in the input directory are kept
+    assert set(completed) == {"gone.wav"}
+    assert {record['file'] for record in read_lines(output)} == {"gone.wav"}
@@ -0,0 +1,66 @@
+"""Sentence-aligned chunk spans and their UTF-8 byte offsets"""
+
+import numpy as np
+import pytest
+
+from chunking import ChunkSpans, chunk_spans, span_text, stream_chunk_spans
+
+SENTENCES = ["Le petit prince habite sur une planète à peine plus grande qu'une maison.",
+             "Il arrache les baobabs chaque matin.",
+             "«Dessine-moi un mouton!»",
+             "Le renard lui apprend à apprivoiser.",
+             "L'essentiel est invisible pour les yeux…",
+             "Il retourne enfin vers sa rose."]
+TEXT = " ".join(SENTENCES * 4)
+
+
+def test_spans_are_utf8_byte_offsets():
+    chunks = chunk_spans(TEXT, chunk_size=20, overlap=5)
+    data = TEXT.encode('utf-8')
+    for (start, end), chunk in zip(chunks.spans, chunks):
+        assert data[start:end].decode('utf-8') == chunk
+        assert span_text(chunks.text, start, end) == chunk
+    # Accented letters take two bytes, so offsets run ahead of character positions
+    assert chunks.spans[-1][1] == len(data) > len(TEXT)
+
+
+def test_chunks_cover_the_text_within_the_word_limit():
+    chunks = chunk_spans(TEXT, chunk_size=20, overlap=5)
+    assert chunks.spans[0][0] == 0 and chunks.spans[-1][1] == len(TEXT.encode('utf-8'))
+    for (_, end), (next_start, _) in zip(chunks.spans, chunks.spans[1:]):
+        assert next_start <= end + 1  # overlapping or adjacent, nothing skipped
+    assert all(len(chunk.split()) <= 20 for chunk in chunks)
+
+
+def test_chunks_end_and_start_on_sentence_boundaries():
+    chunks = chunk_spans(TEXT, chunk_size=20, overlap=5)
+    starts = tuple(sentence.split()[0] for sentence in SENTENCES)
+    for chunk in chunks[:-1]:
+        assert chunk.endswith(('.', '!', '»', '…'))
+    for chunk in chunks[1:]:
+        assert chunk.startswith(starts)
+
+
+def test_overlap_follows_the_requested_size():
+    words = " ".join(f"mot{i}." for i in range(100))  # every word ends a sentence
+    chunks = chunk_spans(words, chunk_size=10, overlap=3)
+    for chunk, following in zip(chunks, chunks[1:]):
+        assert chunk.split()[-3:] == following.split()[:3]
+
+
+def test_pages_stream_into_the_same_chunks():
+    pages = [" ".join(SENTENCES[:3]), "  ".join(SENTENCES[3:]) + "\n", "", " ".join(SENTENCES)]
+    whole = chunk_spans(" ".join(pages), chunk_size=12, overlap=4)
+    text = bytearray()
+    streamed = list(stream_chunk_spans(pages, chunk_size=12, overlap=4, text=text))
+    assert bytes(text) == whole.text
+    np.testing.assert_array_equal(np.asarray(streamed).reshape(-1, 2), whole.spans)
+
+
+def test_chunk_spans_reads_like_a_list():
+    chunks = chunk_spans(TEXT, chunk_size=20, overlap=5)
+    assert chunks[-1] == chunks[len(chunks) - 1]
+    assert chunks[1:3] == [chunks[1], chunks[2]]
+    with pytest.raises(IndexError):
+        chunks[len(chunks)]
+    assert len(ChunkSpans()) == 0 and chunk_spans("").spans.shape == (0, 2)
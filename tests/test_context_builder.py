@@ -0,0 +1,73 @@
+"""Prompt context under a token budget: merged hits, relevant sentences first, reading order kept"""
+
+import pytest
+
+from context_builder import CONTEXT_HEADER, build_context, count_tokens, format_hits
+
+DOCUMENT = ("Coco Chanel naît à Saumur en 1883. Elle grandit dans un orphelinat à Aubazine. "
+            "Elle ouvre une boutique de chapeaux rue Cambon en 1910. Le parfum Chanel N°5 sort en 1921. "
+            "Pendant la guerre elle vit au Ritz. Elle rouvre sa maison de couture en 1954.")
+
+
+class FakeRag:
+    """Only what build_context reads: document text by byte span"""
+
+    def passage_text(self, doc_id, start, end):
+        return DOCUMENT.encode('utf-8')[start:end].decode('utf-8')
+
+
+def hit(start_sentence, end_sentence, score=0.5):
+    """A hit covering whole sentences of DOCUMENT, with its byte span"""
+    sentences = DOCUMENT.split(". ")
+    prefix = ". ".join(sentences[:start_sentence]) + (". " if start_sentence else "")
+    text = ". ".join(sentences[start_sentence:end_sentence]) + ("." if end_sentence < len(sentences) else "")
+    start = len(prefix.encode('utf-8'))
+    return {'source': "chanel.txt", 'doc_id': "chanel.txt", 'text': text, 'score': score,
+            'span': (start, start + len(text.encode('utf-8')))}
+
+
+@pytest.mark.parametrize("max_tokens", range(15, 125, 5))
+@pytest.mark.parametrize("query", ["Quand sort le parfum Chanel N°5 ?", "Saumur Ritz"])
+def test_context_stays_within_budget(query, max_tokens):
+    hits = [hit(0, 3, 0.6), hit(2, 6, 0.5)]
+    context, stats = build_context(query, hits, max_tokens, FakeRag())
+    assert context.startswith(CONTEXT_HEADER)
+    assert count_tokens(context) <= max_tokens
+    assert stats['tokens'] == count_tokens(context)
+    assert stats['tokens_saved'] == stats['raw_tokens'] - stats['tokens']
+
+
+def test_relevant_sentences_are_kept_in_reading_order():
+    hits = [hit(0, 3, 0.6), hit(2, 6, 0.5)]
+    context, stats = build_context("parfum N°5 boutique chapeaux", hits, 50, FakeRag())
+    assert "boutique de chapeaux" in context and "parfum Chanel N°5" in context
+    assert context.index("boutique") < context.index("parfum")
+    assert "Ritz" not in context
+    assert stats['passages'] == 1  # overlapping hits were merged
+
+
+def test_overlapping_hits_are_sent_once():
+    hits = [hit(0, 3), hit(2, 6)]
+    context, _ = build_context("Chanel", hits, 1000, FakeRag())
+    assert context.count("rue Cambon") == 1
+    assert context.count("Source: chanel.txt") == 1
+
+
+def test_skipped_sentences_are_marked():
+    context, _ = build_context("Saumur Ritz", [hit(0, 6)], 40, FakeRag())
+    assert "Saumur" in context and "Ritz" in context and "[…]" in context
+
+
+def test_budget_below_one_sentence_truncates_the_best():
+    context, stats = build_context("Saumur", [hit(0, 6)], 18, FakeRag())
+    assert context.endswith("…") and count_tokens(context) <= 18
+    assert "Saumur" in context
+    assert stats['sentences'] == 1
+
+
+def test_no_budget_sends_the_hits_unchanged():
+    hits = [hit(0, 3), hit(2, 6)]
+    context, stats = build_context("Chanel", hits, None, FakeRag())
+    assert context == format_hits(hits) and stats['tokens_saved'] == 0
+    assert build_context("Chanel", [], 50) == ("", {'hits': 0, 'passages': 0, 'sentences': 0, 'tokens': 0,
+                                                 'raw_tokens': 0, 'tokens_saved': 0})
@@ -0,0 +1,79 @@
+"""Incremental rebuilds: only added or changed documents are re-embedded, removed ones are dropped"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from multi_document_rag import MultiDocumentRAG
+
+TEXTS = {
+    "cyrano.txt": "Cyrano écrit les lettres de Christian pour Roxane. Les cadets partent au siège d'Arras.",
+    "prince.txt": "Le petit prince arrache les baobabs. Le renard demande à être apprivoisé.",
+    "chanel.txt": "Coco Chanel ouvre une boutique de chapeaux rue Cambon à Paris en 1910.",
+}
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch, trigram_model):
+    monkeypatch.chdir(tmp_path)  # index, text cache and metadata files
+    folder = Path("documents")
+    folder.mkdir()
+    for name in ("cyrano.txt", "prince.txt"):
+        (folder / name).write_text(TEXTS[name], encoding='utf-8')
+    return folder
+
+
+def index_folder(folder, model):
+    """A fresh RAG (as on the next start) updated from the folder; returns it and what was embedded"""
+    model.encoded.clear()
+    rag = MultiDocumentRAG("trigram", chunk_size=8, overlap=2, device="cpu", search_mode="exact")
+    rag.process_documents_folder(str(folder))
+    return rag, "".join(model.encoded)
+
+
+def test_first_build_embeds_everything(folder, trigram_model):
+    rag, embedded = index_folder(folder, trigram_model)
+    assert set(rag.documents) == {"cyrano.txt", "prince.txt"}
+    assert set(rag.manifest) == {str(folder / "cyrano.txt"), str(folder / "prince.txt")}
+    assert "Roxane" in embedded and "baobabs" in embedded
+
+
+def test_unchanged_folder_embeds_nothing(folder, trigram_model):
+    index_folder(folder, trigram_model)
+    # A new mtime alone is not a change: the content hash decides
+    os.utime(folder / "cyrano.txt", (1, 1))
+    rag, embedded = index_folder(folder, trigram_model)
+    assert embedded == ""
+    assert rag.manifest[str(folder / "cyrano.txt")]['mtime'] == 1
+
+
+def test_added_file_is_the_only_one_embedded(folder, trigram_model):
+    before, _ = index_folder(folder, trigram_model)
+    kept = np.array(before.documents["cyrano.txt"]['embeddings'])
+    (folder / "chanel.txt").write_text(TEXTS["chanel.txt"], encoding='utf-8')
+    rag, embedded = index_folder(folder, trigram_model)
+    assert "Chanel" in embedded and "Roxane" not in embedded and "baobabs" not in embedded
+    assert set(rag.documents) == {"cyrano.txt", "prince.txt", "chanel.txt"}
+    np.testing.assert_array_equal(rag.documents["cyrano.txt"]['embeddings'], kept)
+    assert rag.search("boutique de chapeaux Cambon", top_k=1)[0]['doc_id'] == "chanel.txt"
+
+
+def test_changed_file_is_re_embedded(folder, trigram_model):
+    index_folder(folder, trigram_model)
+    (folder / "prince.txt").write_text("Le petit prince rencontre un businessman qui compte les étoiles.",
+                                       encoding='utf-8')
+    rag, embedded = index_folder(folder, trigram_model)
+    assert "businessman" in embedded and "Roxane" not in embedded
+    assert "baobabs" not in " ".join(rag.documents["prince.txt"]['chunks'])
+
+
+def test_removed_file_is_dropped(folder, trigram_model):
+    index_folder(folder, trigram_model)
+    (folder / "cyrano.txt").unlink()
+    rag, embedded = index_folder(folder, trigram_model)
+    assert embedded == ""
+    assert set(rag.documents) == {"prince.txt"}
+    assert set(rag.manifest) == {str(folder / "prince.txt")}
+    assert all(hit['doc_id'] == "prince.txt" for hit in rag.search("Roxane Cyrano lettres", top_k=3))
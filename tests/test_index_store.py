@@ -0,0 +1,73 @@
+"""Index directory verification and the corpus hash that ties a prebuilt index to its documents"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from index_store import EMBEDDINGS_FILE, TEXTS_FILE, corpus_hash, verify_index
+from multi_document_rag import MultiDocumentRAG
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch, trigram_model):
+    monkeypatch.chdir(tmp_path)
+    folder = Path("documents")
+    folder.mkdir()
+    (folder / "cyrano.txt").write_text("Cyrano écrit les lettres de Christian pour Roxane. " * 4, encoding='utf-8')
+    (folder / "prince.txt").write_text("Le petit prince arrache les baobabs chaque matin. " * 4, encoding='utf-8')
+    rag = MultiDocumentRAG("trigram", chunk_size=8, overlap=2, device="cpu")
+    rag.process_documents_folder(str(folder))
+    return rag, folder
+
+
+def test_corpus_hash_follows_paths_and_contents():
+    manifest = {"docs/a.txt": {'sha256': "1", 'mtime': 5}, "docs/b.txt": {'sha256': "2"}}
+    assert corpus_hash(manifest) == corpus_hash(dict(reversed(list(manifest.items()))))
+    assert corpus_hash(manifest) == corpus_hash({path: {'sha256': e['sha256']} for path, e in manifest.items()})
+    assert corpus_hash(manifest) != corpus_hash({**manifest, "docs/b.txt": {'sha256': "3"}})
+    assert corpus_hash(manifest) != corpus_hash({"docs/a.txt": {'sha256': "1"}, "docs/c.txt": {'sha256': "2"}})
+    assert corpus_hash(manifest) != corpus_hash({"docs/a.txt": {'sha256': "1"}})
+
+
+def test_fresh_index_verifies(built):
+    rag, _ = built
+    assert verify_index(rag.cache_dir) == []
+    assert rag.header['corpus_hash'] == corpus_hash(rag.manifest)
+
+
+def test_corrupted_file_is_reported(built):
+    rag, _ = built
+    path = os.path.join(rag.cache_dir, TEXTS_FILE)
+    data = bytearray(open(path, 'rb').read())
+    data[0] ^= 0xFF
+    open(path, 'wb').write(bytes(data))
+    assert f"{TEXTS_FILE} does not match its checksum" in verify_index(rag.cache_dir)
+
+
+def test_truncated_or_missing_file_is_reported(built):
+    rag, _ = built
+    path = os.path.join(rag.cache_dir, EMBEDDINGS_FILE)
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 4)
+    problems = verify_index(rag.cache_dir)
+    assert problems
+    os.remove(path)
+    assert verify_index(rag.cache_dir)
+
+
+def test_prebuilt_index_opens_only_for_the_same_documents(built, trigram_model):
+    _, folder = built
+    rag = MultiDocumentRAG("trigram", chunk_size=8, overlap=2, device="cpu")
+    assert rag.open_prebuilt(str(folder))
+
+    (folder / "prince.txt").write_text("Le renard demande au petit prince de l'apprivoiser.", encoding='utf-8')
+    rag = MultiDocumentRAG("trigram", chunk_size=8, overlap=2, device="cpu")
+    assert not rag.open_prebuilt(str(folder))
+
+
+def test_prebuilt_index_needs_the_same_chunk_settings(built, trigram_model):
+    _, folder = built
+    rag = MultiDocumentRAG("trigram", chunk_size=16, overlap=2, device="cpu")
+    assert not rag.open_prebuilt(str(folder))
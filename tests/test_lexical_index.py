@@ -0,0 +1,70 @@
+"""BM25 scoring, normalization and French accent folding in the lexical index"""
+
+import math
+import os
+
+import numpy as np
+
+from lexical_index import BM25Index, fold_accents, tokenize
+
+ROWS = ["Le baobab pousse sur la planète du petit prince.",
+        "Roxane lit les lettres de Cyrano.",
+        "Les baobabs envahissent la planète.",
+        "Élise et Cœur d'Œdipe à l'école"]
+
+
+def test_fold_accents():
+    assert fold_accents("Élève Noël à l'hôpital") == "eleve noel a l'hopital"
+    assert fold_accents("Cœur ÆSOPE") == "coeur aesope"
+
+
+def test_tokenize_folds_elides_and_stems():
+    assert tokenize("L'Élève d'Œdipe aime les baobabs") == ["eleve", "oedipe", "aime", "baobab"]
+    assert tokenize("jusqu’à l’aube qu’Arthur") == ["aube", "arthur"]
+    assert tokenize("Le bus passe") == ["bus", "passe"]  # short words and -ss keep their s
+
+
+def test_scores_match_okapi_bm25():
+    index = BM25Index(k1=1.2, b=0.75)
+    index.build(ROWS)
+    rows, scores = index.score("baobab")
+    assert rows.tolist() == [0, 2]
+
+    # Unnormalized BM25 of the single term, divided by its idf (the score of an ideal match)
+    n, df = len(ROWS), 2
+    idf = math.log1p((n - df + 0.5) / (df + 0.5))
+    lengths = [len(tokenize(text)) for text in ROWS]
+    average = sum(lengths) / n
+    expected = [idf * 2.2 / (1 + 1.2 * (0.25 + 0.75 * lengths[row] / average)) / idf for row in (0, 2)]
+    np.testing.assert_allclose(scores, np.minimum(expected, 1.0), rtol=1e-5)
+
+
+def test_rarer_terms_weigh_more_and_unknown_terms_count_as_missed():
+    index = BM25Index()
+    index.build(ROWS)
+    assert index.term_idf("roxane") > index.term_idf("planete")
+    rows, scores = index.score("Roxane")
+    assert rows.tolist() == [1] and 0 < scores[0] <= 1.0
+    _, with_unknown = index.score("Roxane zeppelin")
+    assert with_unknown[0] < scores[0] / 2
+    assert len(index.score("zeppelin")[0]) == 0
+
+
+def test_accented_query_matches_unaccented_text():
+    index = BM25Index()
+    index.build(ROWS)
+    assert index.search("ELISE ecole", top_k=3)[0].tolist() == [3]
+    assert index.search("planète", top_k=3, rows=np.array([2, 3]))[0].tolist() == [2]
+
+
+def test_saved_index_scores_the_same(tmp_path):
+    index = BM25Index()
+    index.build(ROWS)
+    for name, array in index.to_arrays().items():
+        np.save(os.path.join(tmp_path, name), array)
+    loaded = BM25Index.load(str(tmp_path))
+    for query in ["baobab planète", "Cyrano", "Œdipe"]:
+        expected_rows, expected_scores = index.score(query)
+        rows, scores = loaded.score(query)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores)
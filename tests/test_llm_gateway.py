@@ -0,0 +1,128 @@
+"""LLMGateway retries, hedging and circuit breaker against a fake chat completions client"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import llm_gateway
+from llm_gateway import CircuitBreaker, CircuitOpenError, LLMGateway
+
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeClient:
+    """chat.completions.create runs the next scripted behaviour: an exception to raise,
+    a callable to run, or a reply (a list of tokens when streamed)"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **params):
+        with self._lock:
+            step = self.script[min(self.calls, len(self.script) - 1)]
+            self.calls += 1
+        if isinstance(step, BaseException):
+            raise step
+        if callable(step):
+            step = step()
+        return iter([chunk(token) for token in step]) if stream else step
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_gateway.time, "monotonic", clock)
+    return clock
+
+
+def gateway(client, **kwargs):
+    kwargs.setdefault('hedge', False)
+    return LLMGateway(client, sleep=lambda seconds: None, **kwargs)
+
+
+def test_breaker_opens_then_half_open_probe_decides(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()          # the probe
+    assert not breaker.allow()      # only one at a time
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 2
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_transient_errors_are_retried(clock):
+    client = FakeClient(ConnectionError("reset"), TimeoutError("slow"), "réponse")
+    llm = gateway(client, max_retries=2)
+    assert llm.complete(model="m", messages=[]) == "réponse"
+    assert client.calls == 3
+    assert llm.last_request['attempts'] == 3
+    assert llm.stats()['retries'] == 2 and llm.stats()['breaker'] == "closed"
+
+
+def test_request_errors_are_not_retried(clock):
+    client = FakeClient(ValueError("bad request"), "réponse")
+    llm = gateway(client, max_retries=2)
+    with pytest.raises(ValueError):
+        llm.complete(model="m", messages=[])
+    assert client.calls == 1
+
+
+def test_open_breaker_fails_fast(clock):
+    client = FakeClient(ConnectionError("down"))
+    llm = gateway(client, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=30))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            llm.complete(model="m", messages=[])
+    with pytest.raises(CircuitOpenError):
+        llm.complete(model="m", messages=[])
+    assert client.calls == 2
+    assert llm.stats()['rejected_open'] == 1
+
+
+def test_slow_first_token_is_hedged():
+    release = threading.Event()
+
+    def hung():
+        release.wait(5)
+        return ["trop", " tard"]
+
+    client = FakeClient(hung, ["Bonjour", " Lucas"])
+    llm = gateway(client, hedge=True, hedge_initial_delay=0.05)
+    try:
+        assert "".join(llm.stream(model="m", messages=[])) == "Bonjour Lucas"
+        assert llm.last_request['hedged'] and llm.last_request['hedge_won']
+        assert llm.stats()['hedges'] == 1 and llm.stats()['hedge_wins'] == 1
+    finally:
+        release.set()
+        llm.pool.shutdown(wait=True)
+
+
+def test_fast_reply_is_not_hedged():
+    client = FakeClient(["Bonjour"])
+    llm = gateway(client, hedge=True, hedge_initial_delay=1.0)
+    assert list(llm.stream(model="m", messages=[])) == ["Bonjour"]
+    assert client.calls == 1 and not llm.last_request['hedged']
@@ -0,0 +1,106 @@
+"""Search over MultiDocumentRAG with a small deterministic embedding model (no downloads)"""
+
+from pathlib import Path
+
+import pytest
+
+import config
+from multi_document_rag import MultiDocumentRAG
+from petit_prince_rag import PetitPrinceRAG
+
+CYRANO = ("Cyrano a un grand nez. Il aime sa cousine Roxane en secret. "
+          "Christian est beau mais il ne sait pas parler d'amour. "
+          "Cyrano écrit les lettres de Christian pour Roxane. "
+          "Les cadets de Gascogne partent au siège d'Arras. ")
+PRINCE = ("Le petit prince habite sur une petite planète avec une rose. "
+          "Il arrache les baobabs chaque matin. "
+          "Le renard demande au petit prince de l'apprivoiser. "
+          "On ne voit bien qu'avec le coeur, l'essentiel est invisible pour les yeux. ")
+
+
+@pytest.fixture
+def make_rag(tmp_path, monkeypatch, trigram_model):
+    monkeypatch.chdir(tmp_path)  # index, text cache and metadata files
+    folder = tmp_path / "documents"
+    folder.mkdir()
+    (folder / "cyrano.txt").write_text(CYRANO * 3, encoding='utf-8')
+    (folder / "prince.txt").write_text(PRINCE * 3, encoding='utf-8')
+
+    def make(hybrid_weight=0.3):
+        rag = MultiDocumentRAG("trigram", chunk_size=20, overlap=5, device="cpu",
+                               hybrid_weight=hybrid_weight, search_mode="exact")
+        rag.min_similarity = 0.1
+        rag.process_documents_folder("documents")
+        return rag
+    return make
+
+
+@pytest.mark.parametrize("hybrid_weight", [0.3, 0.0])
+def test_search_without_keyword_match(make_rag, hybrid_weight):
+    rag = make_rag(hybrid_weight)
+    # "renardeau" and "apprivoisement" are not BM25 terms of either document
+    results = rag.search("renardeau apprivoisement", top_k=3)
+    assert results
+    assert results[0]['doc_id'] == "prince.txt"
+
+
+@pytest.mark.parametrize("hybrid_weight", [0.3, 0.0])
+def test_search_batch_matches_single_searches(make_rag, hybrid_weight):
+    rag = make_rag(hybrid_weight)
+    queries = ["renardeau apprivoisement", "Roxane"]
+    batched = rag.search_batch(queries, top_k=3)
+    rag.result_cache.clear()
+    single = [rag.search(query, top_k=3) for query in queries]
+    assert [[r['doc_id'] for r in results] for results in batched] == \
+        [[r['doc_id'] for r in results] for results in single]
+    assert batched[0] and batched[0][0]['doc_id'] == "prince.txt"
+    assert batched[1] and batched[1][0]['doc_id'] == "cyrano.txt"
+
+
+@pytest.mark.parametrize("hybrid_weight", [0.3, 0.0])
+@pytest.mark.parametrize("query", ["Roxane", "renardeau apprivoisement", "Cyrano écrit les lettres"])
+def test_search_restricted_to_documents(make_rag, hybrid_weight, query):
+    rag = make_rag(hybrid_weight)
+    results = rag.search(query, top_k=5, doc_ids=["prince.txt"])
+    assert all(result['doc_id'] == "prince.txt" for result in results)
+    batched = rag.search_batch([query, "Roxane"], top_k=5, doc_ids=["cyrano.txt"])
+    assert all(result['doc_id'] == "cyrano.txt" for results in batched for result in results)
+
+
+def test_book_added_under_the_folder_scan_path(make_rag, tmp_path, monkeypatch, capsys):
+    rag = make_rag()
+    monkeypatch.setattr(config, "DOCUMENTS_FOLDER", "documents")
+    monkeypatch.setattr(config, "RAG_INDEX_POLICY", "rebuild")
+    book = PetitPrinceRAG(rag=rag)
+    book.setup_knowledge_base(str(tmp_path / "documents" / ".." / "documents" / "prince.txt"), force_refresh=True)
+    assert set(rag.manifest) == {str(Path("documents") / "cyrano.txt"), str(Path("documents") / "prince.txt")}
+    capsys.readouterr()
+    rag.process_documents_folder("documents")
+    assert "Index updated" not in capsys.readouterr().out  # nothing to re-embed or prune
+
+    outside = tmp_path / "elsewhere.txt"
+    outside.write_text(PRINCE, encoding='utf-8')
+    book.setup_knowledge_base(str(outside), force_refresh=True)
+    assert str(outside) not in rag.manifest
+
+
+def test_book_search_uses_its_own_threshold(make_rag):
+    rag = make_rag(hybrid_weight=0.0)
+    book = PetitPrinceRAG(rag=rag)
+    book.doc_id = "prince.txt"
+    rag.min_similarity = 0.99
+    assert rag.search("renardeau apprivoisement", top_k=2, doc_ids=["prince.txt"]) == []
+    assert book.search_relevant_passages("renardeau apprivoisement", top_k=2)
+
+
+def test_similarity_is_cosine_only(make_rag):
+    rag = make_rag()
+    # One keyword normalizes to a perfect BM25 match, but still goes through the encoder
+    single = rag.search("Qui est Cyrano ?", top_k=3)
+    assert single and all(r['retriever'] == "hybrid" for r in single)
+    assert all(r['similarity'] is not None and r['similarity'] < 1.0 for r in single)
+
+    rag.result_cache.clear()
+    keywords = rag.search("Cyrano lettres Christian Roxane", top_k=3)
+    assert keywords and keywords[0]['retriever'] == "lexical"
+    assert keywords[0]['similarity'] is None and keywords[0]['score'] >= rag.lexical_fast_path
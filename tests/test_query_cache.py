@@ -0,0 +1,65 @@
+"""LRU eviction and query normalization of the query caches, and their use by the RAG search"""
+
+from query_cache import LRUCache, normalize_query
+
+
+def test_least_recently_used_key_is_evicted():
+    cache = LRUCache(max_size=2)
+    cache.put("renard", 1)
+    cache.put("rose", 2)
+    assert cache.get("renard") == 1  # "rose" is now the oldest
+    cache.put("baobab", 3)
+    assert cache.get("rose") is None
+    assert cache.get("renard") == 1 and cache.get("baobab") == 3
+    assert len(cache) == 2
+
+
+def test_put_refreshes_an_existing_key():
+    cache = LRUCache(max_size=2)
+    cache.put("renard", 1)
+    cache.put("rose", 2)
+    cache.put("renard", 10)
+    cache.put("baobab", 3)
+    assert cache.get("renard") == 10 and cache.get("rose", "absent") == "absent"
+
+
+def test_zero_size_disables_the_cache():
+    cache = LRUCache(max_size=0)
+    cache.put("renard", 1)
+    assert len(cache) == 0 and cache.get("renard") is None
+
+
+def test_stats_count_hits_and_misses():
+    cache = LRUCache(max_size=4)
+    cache.put("renard", 1)
+    cache.get("renard")
+    cache.get("renard")
+    cache.get("rose")
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (2, 1, 1)
+    assert abs(stats['hit_rate'] - 2 / 3) < 1e-9
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['hits'] == 2
+
+
+def test_spoken_variants_share_a_key():
+    assert normalize_query("  Qui est  Roxane ? ") == normalize_query("qui est roxane") == "qui est roxane"
+    assert normalize_query("« L’essentiel… »") == "l'essentiel"
+    assert normalize_query("Cafe\u0301") == normalize_query("Caf\u00e9")  # decomposed accent
+
+
+def test_repeated_question_skips_the_encoder(tmp_path, monkeypatch, trigram_model):
+    from multi_document_rag import MultiDocumentRAG
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "documents").mkdir()
+    (tmp_path / "documents" / "prince.txt").write_text("Le renard demande au petit prince de l'apprivoiser. " * 3,
+                                                        encoding='utf-8')
+    rag = MultiDocumentRAG("trigram", chunk_size=8, overlap=2, device="cpu", hybrid_weight=0.0,
+                           result_cache_size=0)
+    rag.process_documents_folder("documents")
+    trigram_model.encoded.clear()
+    rag.search("Que demande le renard ?", top_k=2)
+    rag.search("que demande le renard", top_k=2)
+    assert trigram_model.encoded == ["Que demande le renard ?"]
+    assert rag.query_cache.stats()['hits'] == 1
@@ -0,0 +1,114 @@
+"""ResponseCache TTL, LRU eviction and context keys, and what answer() stores in it"""
+
+import numpy as np
+import pytest
+
+import config
+import french_vad_assistant as assistant
+import response_cache
+from response_cache import ResponseCache, context_id
+
+QUESTION = "Pourquoi le renard veut-il être apprivoisé ?"
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def vector(seed):
+    return np.random.default_rng(seed).normal(size=16).astype(np.float32)
+
+
+def test_similar_question_hits_only_with_same_context_and_prompt(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.store(QUESTION, vector(1), "ctx", "v1", "Parce qu'il veut un ami.")
+    nearby = vector(1) + 0.01 * vector(2)
+    assert cache.lookup("Pourquoi le renard veut-il être apprivoisé", nearby, "ctx", "v1") == "Parce qu'il veut un ami."
+    assert cache.lookup(QUESTION, vector(1), "other", "v1") is None
+    assert cache.lookup(QUESTION, vector(1), "ctx", "v2") is None
+    assert cache.lookup(QUESTION, vector(3), "ctx", "v1") is None
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.store(QUESTION, vector(1), "ctx", "v1", "Parce qu'il veut un ami.")
+    clock.now += 59
+    assert cache.lookup(QUESTION, vector(1), "ctx", "v1") is not None
+    clock.now += 2
+    assert cache.lookup(QUESTION, vector(1), "ctx", "v1") is None
+    assert cache.stats()['expired'] == 1
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.store("Question une ?", vector(1), "ctx", "v1", "un")
+    clock.now += 1
+    cache.store("Question deux ?", vector(2), "ctx", "v1", "deux")
+    clock.now += 1
+    assert cache.lookup("Question une ?", vector(1), "ctx", "v1") == "un"  # now the most recent
+    clock.now += 1
+    cache.store("Question trois ?", vector(3), "ctx", "v1", "trois")
+    assert len(cache) == 2
+    assert cache.stats()['evicted'] == 1
+    assert cache.lookup("Question deux ?", vector(2), "ctx", "v1") is None
+    assert cache.lookup("Question une ?", vector(1), "ctx", "v1") == "un"
+    assert cache.lookup("Question trois ?", vector(3), "ctx", "v1") == "trois"
+
+
+def test_personal_questions_are_not_cached(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.store("Qu'est-ce que tu aimais lire ?", vector(1), "ctx", "v1", "Le Petit Prince.")
+    assert len(cache) == 0
+
+
+def test_context_id_follows_chunk_text_not_order():
+    hits = [{'doc_id': "prince.pdf", 'chunk': 3, 'text': "Le renard"},
+            {'doc_id': "cyrano.pdf", 'chunk': 1, 'text': "Roxane"}]
+    assert context_id(hits) == context_id(list(reversed(hits)))
+    edited = [dict(hits[0], text="Le renard et la rose"), hits[1]]
+    assert context_id(edited) != context_id(hits)
+    assert context_id([]) == ""
+
+
+class BrokenStreamGateway:
+    """Streams two tokens, then the connection drops"""
+    last_request = {}
+
+    def stream(self, **request):
+        yield "Parce qu'il "
+        yield "veut "
+        raise ConnectionError("connection reset")
+
+
+class Loaded:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def test_partial_streamed_reply_is_not_cached(tmp_path, clock, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(assistant, "response_cache", Loaded(cache))
+    monkeypatch.setattr(assistant, "llm_gateway", Loaded(BrokenStreamGateway()))
+    monkeypatch.setattr(config, "LLM_STREAMING", True)
+    monkeypatch.setattr(config, "RESPONSE_CACHE_ENABLED", True)
+
+    reply = assistant.answer(QUESTION, cache_key=(vector(1), "ctx"))
+    assert reply == "Parce qu'il veut"
+    assert len(cache) == 0
+    text, timing = assistant.get_ai_response(QUESTION, stream=True)
+    assert timing == {'complete': False}
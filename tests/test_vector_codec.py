@@ -0,0 +1,66 @@
+"""Round-trip error bounds of the float16, int8 and PCA vector codecs"""
+
+import numpy as np
+import pytest
+
+from vector_codec import VectorCodec, normalize_rows, storage_report, top_k_indices
+
+
+@pytest.fixture
+def vectors():
+    return normalize_rows(np.random.default_rng(0).normal(size=(500, 64)))
+
+
+def test_float16_round_trip(vectors):
+    codec = VectorCodec("float16").fit(vectors)
+    decoded = codec.decode(codec.encode(vectors))
+    # Unit-norm components are below 1, where float16 keeps 11 significant bits
+    assert np.abs(decoded - vectors).max() <= 2.0 ** -11
+
+
+def test_int8_round_trip_within_half_a_step(vectors):
+    codec = VectorCodec("int8").fit(vectors)
+    codes = codec.encode(vectors)
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    error = np.abs(codec.decode(codes) - vectors)
+    assert np.all(error <= codec.scale / 2 + 1e-7)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_scores_on_codes_match_decoded_rows(vectors, dtype):
+    codec = VectorCodec(dtype).fit(vectors)
+    codes = codec.encode(vectors)
+    queries = normalize_rows(np.random.default_rng(1).normal(size=(5, 64)))
+    scores = codec.scores(codes, codec.prepare(queries), block_size=128)
+    np.testing.assert_allclose(scores, codec.transform(queries) @ codec.decode(codes).T, atol=1e-5)
+    # ... and stay within the quantization error of the exact cosine
+    bound = 2.0 ** -11 * np.abs(queries).sum(axis=1) if dtype == "float16" else np.abs(queries) @ (codec.scale / 2)
+    assert np.all(np.abs(scores - queries @ vectors.T) <= bound[:, None] + 1e-5)
+
+
+def test_pca_is_lossless_on_low_rank_data():
+    rng = np.random.default_rng(2)
+    vectors = normalize_rows(rng.normal(size=(300, 8)) @ rng.normal(size=(8, 64)))
+    codec = VectorCodec("float32", dimension=8).fit(vectors)
+    codes = codec.encode(vectors)
+    assert codes.shape == (300, 8)
+    # Centered directions are kept exactly, so cosines in the projected space match them
+    centered = normalize_rows(vectors - codec.mean)
+    np.testing.assert_allclose(codes @ codes.T, centered @ centered.T, atol=1e-4)
+
+
+def test_pca_with_int8_keeps_neighbours():
+    # Embeddings concentrate in fewer directions than they have dimensions
+    rng = np.random.default_rng(3)
+    vectors = normalize_rows(rng.normal(size=(500, 16)) @ rng.normal(size=(16, 64))
+                             + 0.05 * rng.normal(size=(500, 64)))
+    report = storage_report(vectors, vectors[:20], [{'dtype': "int8", 'dimension': 24}], top_k=5, repeats=1)
+    assert report[0]['recall@5'] == 1.0
+    assert report[1]['dimension'] == 24 and report[1]['recall@5'] >= 0.9
+    assert report[1]['bytes'] < report[0]['bytes'] / 4
+
+
+def test_top_k_indices_sorted_best_first():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [0.4, 0.3, 0.2, 0.1]])
+    assert top_k_indices(scores, 2).tolist() == [[1, 3], [0, 1]]
+    assert top_k_indices(scores, 10).tolist() == [[1, 3, 2, 0], [0, 1, 2, 3]]
@@ -0,0 +1,31 @@
+"""Retrieval stage of the pipelined runtime: partial transcripts only prefetch"""
+
+import threading
+
+from voice_pipeline import VoicePipeline
+
+
+def test_partials_prefetch_and_finals_build_context():
+    contexts, prefetched = [], []
+    prefetch_done = threading.Event()
+
+    def prefetch(text):
+        prefetched.append(text)
+        prefetch_done.set()
+
+    pipeline = VoicePipeline(read_frame=None, new_buffer=None, transcribe=None,
+                             get_context=lambda text: contexts.append(text) or f"context for {text}",
+                             respond=None, prefetch=prefetch)
+    worker = threading.Thread(target=pipeline._retrieve, daemon=True)
+    worker.start()
+    try:
+        pipeline._on_partial("Pourquoi le renard", "veut-il")
+        assert prefetch_done.wait(2)
+        pipeline.transcripts.put(("Pourquoi le renard veut-il être apprivoisé ?", None))
+        text, context, _ = pipeline.prompts.get(timeout=2)
+    finally:
+        pipeline._stop.set()
+        worker.join(2)
+    assert prefetched == ["Pourquoi le renard veut-il"]
+    assert contexts == [text]
+    assert context == f"context for {text}"
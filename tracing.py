@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Per-Turn Tracing
+Timed spans for every stage of a conversation turn (listening, Whisper, retrieval,
+LLM) with stage-specific attributes such as retrieval scores and token counts;
+spans that carry audio_seconds also get a real-time factor (rtf). Finished turns
+are appended to a JSONL file and a per-stage summary is printed on exit. While disabled, span() hands back a shared no-op object,
+so instrumented code pays one attribute check per call.
+
+    with tracer.turn():
+        with tracer.span("asr") as span:
+            text = decode(audio)
+            span.set(audio_seconds=3.2, chars=len(text))
+"""
+
+import atexit
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'turn', 'started', 'duration')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.turn = None
+        self.started = 0.0
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.turn = self.tracer.current_turn()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish_span(self, self.turn)
+        return False
+
+
+class Turn:
+    def __init__(self, number: int):
+        self.number = number
+        self.wall_start = time.time()
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.attrs: Dict = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, duration: float, attrs: Dict):
+        with self._lock:
+            self.spans.append({'name': name, 'offset': round(started - self.started, 6),
+                               'duration': round(duration, 6), **attrs})
+
+    def to_record(self) -> Dict:
+        return {'turn': self.number,
+                'started': self.wall_start,
+                'duration': round(time.perf_counter() - self.started, 6),
+                **self.attrs,
+                'spans': sorted(self.spans, key=lambda span: span['offset'])}
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.turns = 0
+        self.durations: Dict[str, List[float]] = {}  # span name -> durations (seconds)
+        self.metrics: Dict[str, List[float]] = {}    # "span.attr" -> numeric attribute values
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._atexit = False
+
+    def configure(self, enabled: bool, path: Optional[str] = None, summary_on_exit: bool = True):
+        """Turn tracing on or off; turns are appended to path as JSON lines"""
+        self.enabled = enabled
+        self.path = path
+        if enabled and summary_on_exit and not self._atexit:
+            atexit.register(self.print_summary)
+            self._atexit = True
+
+    # Turns
+    def start_turn(self) -> Optional[Turn]:
+        """A new turn that can be carried across threads (None while disabled)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.turns += 1
+            return Turn(self.turns)
+
+    @contextmanager
+    def activate(self, turn: Optional[Turn]):
+        """Make turn the current one on this thread, so spans attach to it"""
+        previous = getattr(self._local, 'turn', None)
+        self._local.turn = turn
+        try:
+            yield turn
+        finally:
+            self._local.turn = previous
+
+    def current_turn(self) -> Optional[Turn]:
+        return getattr(self._local, 'turn', None)
+
+    def finish_turn(self, turn: Optional[Turn], **attrs):
+        """Write the turn's record; further spans for it are ignored"""
+        if turn is None:
+            return
+        turn.attrs.update(attrs)
+        self._write(turn.to_record())
+
+    @contextmanager
+    def turn(self, **attrs):
+        """Start, activate and finish a turn on the calling thread"""
+        turn = self.start_turn()
+        if turn is None:
+            yield None
+            return
+        try:
+            with self.activate(turn):
+                yield turn
+        finally:
+            self.finish_turn(turn, **attrs)
+
+    # Spans
+    def span(self, name: str, **attrs):
+        """Context manager timing one stage; attributes can be added with .set()"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name: str, duration: float, turn: Optional[Turn] = None, **attrs):
+        """Add a span measured elsewhere (e.g. listening time accumulated frame by frame)"""
+        if not self.enabled:
+            return
+        span = Span(self, name, attrs)
+        span.started = time.perf_counter() - duration
+        span.duration = duration
+        self._finish_span(span, turn if turn is not None else self.current_turn())
+
+    def _finish_span(self, span: Span, turn: Optional[Turn]):
+        audio_seconds = span.attrs.get('audio_seconds')
+        if audio_seconds and 'rtf' not in span.attrs:
+            span.attrs['rtf'] = span.duration / audio_seconds  # processing time per second of audio
+        with self._lock:
+            self.durations.setdefault(span.name, []).append(span.duration)
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.metrics.setdefault(f"{span.name}.{key}", []).append(float(value))
+        if turn is not None:
+            turn.add(span.name, span.started, span.duration, span.attrs)
+
+    def _write(self, record: Dict):
+        if not self.path:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Error writing trace: {e}")
+
+    # Summary
+    def summary(self) -> Dict[str, Dict]:
+        """Per-span count and p50/p95 duration, plus the mean of each numeric attribute"""
+        with self._lock:
+            durations = {name: list(values) for name, values in self.durations.items()}
+            metrics = {name: list(values) for name, values in self.metrics.items()}
+        result = {}
+        for name, values in durations.items():
+            data = np.asarray(values)
+            result[name] = {'count': len(values),
+                            'p50': float(np.percentile(data, 50)),
+                            'p95': float(np.percentile(data, 95)),
+                            'total': float(data.sum())}
+        for key, values in metrics.items():
+            name, attr = key.rsplit('.', 1)
+            result.setdefault(name, {})[f"mean_{attr}"] = float(np.mean(values))
+        return result
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"\nTrace summary ({self.turns} turns" + (f", details in {self.path})" if self.path else ")"))
+        for name, stats in sorted(summary.items()):
+            if 'count' not in stats:
+                continue
+            extras = ", ".join(f"{key[5:]} {value:.3g}" for key, value in stats.items()
+                               if key.startswith('mean_'))
+            print(f"  {name:<14} n={stats['count']:<4} p50 {stats['p50'] * 1000:7.1f}ms "
+                  f"p95 {stats['p95'] * 1000:7.1f}ms" + (f"  ({extras})" if extras else ""))
+
+
+# Process-wide tracer; enabled by the assistant from config.TRACE_ENABLED
+tracer = Tracer()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Compressed Vector Storage
+Optional lossy form of the chunk embedding matrix used for search: a PCA projection
+to fewer dimensions and/or float16 or int8 scalar quantization (one scale per
+dimension). Queries are scored directly against the compressed rows; int8 scales
+are folded into the query, so no decoded copy of the matrix is ever kept. The
+float32 embeddings stay on disk for rebuilds and are not touched by searches.
+storage_report() measures recall@k and latency against exact float32 search.
+"""
+
+import os
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+CODES_FILE = "vectors_compressed.npy"
+MEAN_FILE = "codec_mean.npy"
+COMPONENTS_FILE = "codec_components.npy"
+SCALE_FILE = "codec_scale.npy"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copy of vectors scaled to unit L2 norm"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores per row, sorted best first"""
+    n = scores.shape[1]
+    k = min(top_k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(n), (scores.shape[0], 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1)
+
+
+class VectorCodec:
+    """Unit float32 vectors -> PCA-projected (optional), re-normalized, float16/int8 codes"""
+
+    def __init__(self, dtype: str = "float32", dimension: Optional[int] = None):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown vector storage dtype: {dtype}")
+        self.dtype = dtype
+        self.dimension = dimension  # PCA output dimension (None = keep the model's)
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None  # (dimension, input dimension)
+        self.scale: Optional[np.ndarray] = None       # int8 step per output dimension
+
+    @property
+    def is_identity(self) -> bool:
+        return self.dtype == "float32" and self.dimension is None
+
+    def describe(self) -> Dict:
+        """Settings as stored in the index header"""
+        return {'dtype': self.dtype, 'dimension': self.dimension}
+
+    def matches(self, dtype: str, dimension: Optional[int]) -> bool:
+        return self.dtype == dtype and self.dimension == dimension
+
+    def fit(self, vectors: np.ndarray, sample_size: int = 50000, seed: int = 0) -> 'VectorCodec':
+        """Learn the projection and int8 scales from (a sample of) the unit-norm vectors"""
+        rng = np.random.default_rng(seed)
+        if len(vectors) > sample_size:
+            sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))],
+                                dtype=np.float32)
+        else:
+            sample = np.asarray(vectors, dtype=np.float32)
+
+        self.mean = self.components = self.scale = None
+        if self.dimension is not None and len(sample) and self.dimension < sample.shape[1]:
+            self.mean = sample.mean(axis=0)
+            _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+            if len(vt) < self.dimension:
+                raise ValueError(f"PCA to {self.dimension} dimensions needs at least that many vectors")
+            self.components = np.ascontiguousarray(vt[:self.dimension], dtype=np.float32)
+        if self.dtype == "int8" and len(sample):
+            largest = np.abs(self.transform(sample)).max(axis=0)
+            largest[largest == 0] = 1.0
+            self.scale = (largest / 127.0).astype(np.float32)
+        return self
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """float32 unit rows in the search space (projected and re-normalized when PCA is on)"""
+        vectors = normalize_rows(vectors)
+        if self.components is None:
+            return vectors
+        return normalize_rows((vectors - self.mean) @ self.components.T)
+
+    def encode(self, vectors: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Compressed rows, built block by block (vectors may be memory-mapped)"""
+        out_dim = self.components.shape[0] if self.components is not None else vectors.shape[1]
+        codes = np.empty((len(vectors), out_dim), dtype=self.dtype)
+        for start in range(0, len(vectors), block_size):
+            block = self.transform(vectors[start:start + block_size])
+            if self.dtype == "int8":
+                block = np.clip(np.rint(block / self.scale), -127, 127)
+            codes[start:start + len(block)] = block
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Approximate float32 search-space rows (e.g. to train IVF centroids)"""
+        decoded = np.asarray(codes, dtype=np.float32)
+        return decoded * self.scale if self.dtype == "int8" else decoded
+
+    def prepare(self, queries: np.ndarray) -> np.ndarray:
+        """Queries in the form that is multiplied with the codes"""
+        queries = self.transform(queries)
+        return queries * self.scale if self.dtype == "int8" else queries
+
+    def scores(self, codes: np.ndarray, prepared: np.ndarray, block_size: int = 1024) -> np.ndarray:
+        """(queries, rows) similarities. float16/int8 rows are widened into one reused float32 buffer
+        a block at a time, small enough to stay in cache while it is multiplied."""
+        if codes.dtype == np.float32:
+            return prepared @ codes.T
+        scores = np.empty((len(prepared), len(codes)), dtype=np.float32)
+        buffer = np.empty((min(block_size, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), block_size):
+            block = codes[start:start + block_size]
+            widened = buffer[:len(block)]
+            np.copyto(widened, block, casting='unsafe')
+            if len(prepared) == 1:
+                np.dot(widened, prepared[0], out=scores[0, start:start + len(block)])
+            else:
+                scores[:, start:start + len(block)] = prepared @ widened.T
+        return scores
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Files to store next to embeddings.npy (the codes themselves are stored by the caller)"""
+        arrays = {}
+        if self.components is not None:
+            arrays[MEAN_FILE] = self.mean
+            arrays[COMPONENTS_FILE] = self.components
+        if self.scale is not None:
+            arrays[SCALE_FILE] = self.scale
+        return arrays
+
+    @classmethod
+    def load(cls, index_dir: str, settings: Dict) -> 'VectorCodec':
+        codec = cls(settings['dtype'], settings.get('dimension'))
+        if os.path.exists(os.path.join(index_dir, COMPONENTS_FILE)):
+            codec.mean = np.load(os.path.join(index_dir, MEAN_FILE), allow_pickle=False)
+            codec.components = np.load(os.path.join(index_dir, COMPONENTS_FILE), allow_pickle=False)
+        if os.path.exists(os.path.join(index_dir, SCALE_FILE)):
+            codec.scale = np.load(os.path.join(index_dir, SCALE_FILE), allow_pickle=False)
+        return codec
+
+
+def storage_report(matrix: np.ndarray, queries: np.ndarray, settings: Sequence[Dict],
+                   top_k: int = 10, repeats: int = 3) -> List[Dict]:
+    """Recall@k against exact float32 search, per-query latency and matrix size for each
+    {'dtype', 'dimension'} in settings; the float32 baseline comes first"""
+    matrix = normalize_rows(matrix)
+    queries = normalize_rows(queries)
+    truth = top_k_indices(queries @ matrix.T, top_k)
+
+    rows = []
+    for setting in [{'dtype': "float32", 'dimension': None}] + list(settings):
+        codec = VectorCodec(setting['dtype'], setting.get('dimension')).fit(matrix)
+        codes = codec.encode(matrix)
+        latencies = []
+        for _ in range(repeats):
+            for query in queries:
+                started = time.perf_counter()
+                top_k_indices(codec.scores(codes, codec.prepare(query)), top_k)
+                latencies.append(time.perf_counter() - started)
+        found = top_k_indices(codec.scores(codes, codec.prepare(queries)), top_k)
+        recall = np.mean([len(set(found[i]) & set(truth[i])) / truth.shape[1] for i in range(len(queries))])
+        latencies = np.asarray(latencies)
+        rows.append({
+            'dtype': codec.dtype,
+            'dimension': codes.shape[1],
+            'bytes': int(codes.nbytes + sum(array.nbytes for array in codec.to_arrays().values())),
+            f'recall@{top_k}': float(recall),
+            'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'latency_p95_ms': float(np.percentile(latencies, 95) * 1000)
+        })
+    return rows
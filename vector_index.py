@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Consolidated Vector Index
+Keeps every chunk embedding in one contiguous, pre-normalized float32 matrix so a
+query is a single matrix product plus a partial top-k selection. The searched
+matrix can instead be a compressed form (PCA and/or float16/int8, see vector_codec.py).
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from ann_index import IVFIndex
+from vector_codec import VectorCodec, normalize_rows, top_k_indices
+
+SEARCH_MODES = ("auto", "exact", "ivf")
+
+
+class VectorIndex:
+    """All chunk vectors of all documents in a single matrix with a doc-id/offset table"""
+
+    def __init__(self, search_mode: str = "auto", ann_min_chunks: int = 20000, nprobe: int = 8,
+                 ann_lists: Optional[int] = None, storage_dtype: str = "float32",
+                 storage_dimension: Optional[int] = None):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {search_mode}")
+        self.storage_dtype = storage_dtype          # float32, float16 or int8 rows
+        self.storage_dimension = storage_dimension  # PCA-projected dimension (None = model's)
+        self.codec: Optional[VectorCodec] = None    # set when the searched matrix is compressed
+        self.embeddings = np.empty((0, 0), dtype=np.float32)  # searched matrix (codes when compressed)
+        self.doc_ids: List[str] = []           # position -> doc_id
+        self.chunk_doc = np.empty(0, dtype=np.int32)     # row -> position in doc_ids
+        self.chunk_offset = np.empty(0, dtype=np.int32)  # row -> chunk index inside its document
+        self.search_mode = search_mode
+        self.ann_min_chunks = ann_min_chunks  # "auto" switches to IVF at this many chunks
+        self.nprobe = nprobe
+        self.ann_lists = ann_lists
+        self.ann: Optional[IVFIndex] = None
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1] if self.embeddings.ndim == 2 else 0
+
+    @property
+    def compressed(self) -> bool:
+        return self.storage_dtype != "float32" or self.storage_dimension is not None
+
+    def nbytes(self) -> int:
+        """Size of the searched matrix"""
+        return int(self.embeddings.nbytes)
+
+    def compress(self, matrix: np.ndarray):
+        """Fit a codec on a normalized float32 matrix and search its codes instead"""
+        self.codec = VectorCodec(self.storage_dtype, self.storage_dimension).fit(matrix)
+        self.embeddings = self.codec.encode(matrix)
+
+    def build(self, documents: Dict[str, Dict]):
+        """Build the matrix from the {doc_id: {embeddings, ...}} mapping"""
+        blocks = []
+        doc_rows = []
+        offsets = []
+        self.doc_ids = []
+
+        for doc_id, doc_info in documents.items():
+            embeddings = doc_info.get('embeddings')
+            if embeddings is None or len(embeddings) == 0:
+                continue
+            position = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            blocks.append(np.asarray(embeddings, dtype=np.float32))
+            doc_rows.append(np.full(len(embeddings), position, dtype=np.int32))
+            offsets.append(np.arange(len(embeddings), dtype=np.int32))
+
+        self.ann = None
+        self.codec = None
+        if not blocks:
+            self.embeddings = np.empty((0, 0), dtype=np.float32)
+            self.chunk_doc = np.empty(0, dtype=np.int32)
+            self.chunk_offset = np.empty(0, dtype=np.int32)
+            return
+
+        self.embeddings = np.ascontiguousarray(normalize_rows(np.vstack(blocks)))
+        if self.compressed:
+            self.compress(self.embeddings)
+        self.chunk_doc = np.concatenate(doc_rows)
+        self.chunk_offset = np.concatenate(offsets)
+        if self.use_ann():
+            self.build_ann()
+
+    def attach(self, matrix: np.ndarray, documents: Dict[str, Dict], ann: Optional[IVFIndex] = None,
+               codec: Optional[VectorCodec] = None, codes: Optional[np.ndarray] = None):
+        """Use an already normalized matrix (e.g. memory-mapped) whose rows follow documents' order.
+        codec/codes are a saved compressed form of it; without them a compressed index encodes the
+        matrix in memory."""
+        self.doc_ids = []
+        doc_rows = []
+        offsets = []
+        for doc_id, doc_info in documents.items():
+            count = doc_info['chunk_count']
+            if count == 0:
+                continue
+            doc_rows.append(np.full(count, len(self.doc_ids), dtype=np.int32))
+            offsets.append(np.arange(count, dtype=np.int32))
+            self.doc_ids.append(doc_id)
+        self.embeddings = matrix
+        self.codec = None
+        if codes is not None and codec is not None:
+            self.embeddings, self.codec = codes, codec
+        elif self.compressed and len(matrix):
+            self.compress(matrix)
+        self.chunk_doc = np.concatenate(doc_rows) if doc_rows else np.empty(0, dtype=np.int32)
+        self.chunk_offset = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int32)
+        self.ann = ann
+        if self.ann is None and self.use_ann():
+            self.build_ann()
+
+    def use_ann(self, mode: Optional[str] = None) -> bool:
+        """Whether queries go through the IVF index for the given (or configured) mode"""
+        mode = mode or self.search_mode
+        return mode == "ivf" or (mode == "auto" and len(self) >= self.ann_min_chunks)
+
+    def build_ann(self):
+        """Train the IVF index over the current matrix"""
+        self.ann = IVFIndex(nprobe=self.nprobe)
+        if len(self):
+            # Centroids live in the search space, so compressed rows are decoded for training
+            vectors = self.embeddings if self.codec is None else self.codec.decode(self.embeddings)
+            self.ann.build(vectors, n_lists=self.ann_lists)
+
+    def document_rows(self, doc_ids: Iterable[str]) -> np.ndarray:
+        """Matrix rows of the given documents' chunks"""
+        wanted = set(doc_ids)
+        positions = [position for position, doc_id in enumerate(self.doc_ids) if doc_id in wanted]
+        return np.flatnonzero(np.isin(self.chunk_doc, positions))
+
+    def search_rows(self, query_embeddings: np.ndarray, top_k: int = 3, mode: Optional[str] = None,
+                    nprobe: Optional[int] = None,
+                    rows: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return (rows, similarities) per query, best first, without any threshold.
+        rows restricts the search to a subset of the matrix, which is scanned exactly."""
+        queries = normalize_rows(query_embeddings)
+        if len(self) == 0 or (rows is not None and len(rows) == 0):
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in range(queries.shape[0])]
+
+        if rows is not None:
+            scores = self._scores(queries, self.embeddings[rows])
+            best = top_k_indices(scores, top_k)
+            return [(rows[indices], scores[row, indices]) for row, indices in enumerate(best)]
+
+        if self.use_ann(mode):
+            if self.ann is None:
+                self.build_ann()
+            if self.codec is None:
+                return self.ann.search(self.embeddings, queries, top_k, nprobe=nprobe)
+            prepared = self.codec.prepare(queries)
+            return self.ann.search(self.embeddings, self.codec.transform(queries), top_k, nprobe=nprobe,
+                                   scorer=lambda rows, i: self.codec.scores(self.embeddings[rows], prepared[i:i + 1])[0])
+        scores = self._scores(queries, self.embeddings)
+        best = top_k_indices(scores, top_k)
+        return [(indices, scores[row, indices]) for row, indices in enumerate(best)]
+
+    def _scores(self, queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """(queries, rows) similarities of normalized queries to rows of the searched matrix"""
+        if self.codec is None:
+            return queries @ matrix.T
+        return self.codec.scores(matrix, self.codec.prepare(queries))
+
+    def row_similarities(self, query_embedding: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Similarity of one query to the given rows, computed like search_rows scores them"""
+        query = normalize_rows(query_embedding)
+        return np.asarray(self._scores(query, self.embeddings[rows])[0])
+
+    def hit(self, row: int) -> Tuple[str, int]:
+        """(doc_id, chunk index inside that document) of a matrix row"""
+        return self.doc_ids[self.chunk_doc[row]], int(self.chunk_offset[row])
+
+    def search(self, query_embeddings: np.ndarray, top_k: int = 3, min_similarity: float = 0.3,
+               mode: Optional[str] = None, nprobe: Optional[int] = None) -> List[List[Tuple[str, int, float]]]:
+        """Return [(doc_id, chunk_index, similarity)] per query, best first"""
+        results = []
+        for indices, similarities in self.search_rows(query_embeddings, top_k, mode=mode, nprobe=nprobe):
+            hits = []
+            for idx, similarity in zip(indices, similarities):
+                if similarity > min_similarity:
+                    hits.append((*self.hit(idx), float(similarity)))
+            results.append(hits)
+        return results
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Pipelined Voice Runtime
+One long-lived input stream feeds a frame queue; VAD endpointing, Whisper decoding,
+RAG lookup and the LLM call each run on their own thread, connected by bounded
+queues. Listening continues while the previous reply is still being generated,
+and retrieval is warmed up from partial transcripts before the user stops talking.
+Each utterance's trace turn travels through the queues with it.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from tracing import tracer
+
+
+class VoicePipeline:
+    def __init__(self, read_frame: Callable[[], bytes], new_buffer: Callable[[], object],
+                 transcribe: Callable, get_context: Callable[[str], str], respond: Callable[[str, str], str],
+                 on_reply: Optional[Callable[[str], None]] = None, new_transcriber: Optional[Callable] = None,
+                 on_transcript: Optional[Callable[[str], None]] = None,
+                 prefetch: Optional[Callable[[str], None]] = None, queue_size: int = 4,
+                 frame_queue_size: int = 400):
+        self.read_frame = read_frame            # blocking read of one VAD frame from the open stream
+        self.new_buffer = new_buffer            # -> AudioBuffer
+        self.transcribe = transcribe            # audio -> text (used without streaming)
+        self.get_context = get_context          # text -> cultural context (and whatever belongs with it)
+        self.respond = respond                  # (text, context) -> reply; context exactly as retrieved for text
+        self.on_reply = on_reply
+        self.new_transcriber = new_transcriber  # on_partial -> StreamingTranscriber (or None if not ready)
+        self.on_transcript = on_transcript
+        self.prefetch = prefetch                # partial text -> None; warms retrieval caches only
+
+        self.frames: "queue.Queue" = queue.Queue(maxsize=frame_queue_size)
+        self.utterances: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.transcripts: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.prompts: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.partials: "queue.Queue" = queue.Queue(maxsize=1)  # only the latest partial matters
+
+        self.dropped_frames = 0
+        self._utterance_id = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start every stage on its own daemon thread"""
+        self._stop.clear()
+        for name, target in [("capture", self._capture), ("endpoint", self._endpoint),
+                             ("transcribe", self._transcribe), ("retrieve", self._retrieve),
+                             ("respond", self._respond)]:
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_forever(self):
+        """Run until Ctrl+C"""
+        self.start()
+        try:
+            while not self._stop.is_set():
+                time.sleep(0.2)
+        finally:
+            self.stop()
+
+    def _get(self, q: "queue.Queue", timeout: float = 0.1):
+        try:
+            return q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _put(self, q: "queue.Queue", item) -> bool:
+        """Blocking put that still notices shutdown (backpressure for downstream stages)"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _capture(self):
+        """Read frames from the persistent stream; never block the audio device"""
+        while not self._stop.is_set():
+            try:
+                frame = self.read_frame()
+            except Exception as e:
+                print(f"Audio capture error: {e}")
+                time.sleep(0.1)
+                continue
+            try:
+                self.frames.put_nowait(frame)
+            except queue.Full:
+                self.dropped_frames += 1
+
+    def _endpoint(self):
+        """VAD endpointing; starts streaming decode at speech onset"""
+        buffer = self.new_buffer()
+        transcriber = None
+        turn = None
+        onset = 0.0
+        print("Listening... (speak now)")
+
+        while not self._stop.is_set():
+            frame = self._get(self.frames)
+            if frame is None:
+                continue
+
+            was_recording = buffer.is_recording
+            ended = buffer.add_frame(frame)
+
+            if buffer.is_recording and not was_recording:
+                turn = tracer.start_turn()
+                onset = time.perf_counter()
+                if self.new_transcriber is not None:
+                    self._utterance_id += 1
+                    transcriber = self.new_transcriber(self._on_partial)
+                    if transcriber is not None:
+                        transcriber.start(self._live_audio(buffer, self._utterance_id))
+
+            if ended:
+                print("Processing speech...")
+                audio = buffer.get_audio_data()
+                if audio is not None:
+                    tracer.record("listen", time.perf_counter() - onset, turn=turn,
+                                  speech_seconds=len(audio) / buffer.sample_rate,
+                                  queued_frames=self.frames.qsize())
+                    self._put(self.utterances, (audio, transcriber, turn))
+                else:
+                    tracer.finish_turn(turn, dropped=True)
+                transcriber = None
+                turn = None
+
+    def _live_audio(self, buffer, utterance_id: int) -> Callable:
+        """Audio source for one utterance's streaming transcriber; dries up at endpoint"""
+        def get_audio():
+            if self._utterance_id != utterance_id or not buffer.is_recording:
+                return None
+            return buffer.get_audio_data(copy=False)
+        return get_audio
+
+    def _on_partial(self, committed: str, tentative: str):
+        """Hand the newest partial transcript to the retrieval stage for prefetching"""
+        text = f"{committed} {tentative}".strip()
+        if not text:
+            return
+        try:
+            self.partials.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self.partials.put_nowait(text)
+        except queue.Full:
+            pass
+
+    def _transcribe(self):
+        while not self._stop.is_set():
+            item = self._get(self.utterances)
+            if item is None:
+                continue
+            audio, transcriber, turn = item
+            with tracer.activate(turn):
+                text = transcriber.finish(audio) if transcriber is not None else self.transcribe(audio)
+            if not text:
+                print("Could not understand. Please try again.")
+                tracer.finish_turn(turn, dropped=True)
+                continue
+            if self.on_transcript is not None:
+                self.on_transcript(text)
+            self._put(self.transcripts, (text, turn))
+
+    def _retrieve(self):
+        """Final transcripts first; otherwise prefetch retrieval for the latest partial. Context
+        assembly waits for the final transcript, whose text it depends on."""
+        while not self._stop.is_set():
+            item = self._get(self.transcripts, timeout=0.05)
+            if item is not None:
+                text, turn = item
+                with tracer.activate(turn):
+                    context = self.get_context(text)
+                self._put(self.prompts, (text, context, turn))
+                continue
+            partial = self._get(self.partials, timeout=0.05)
+            if partial is not None and self.prefetch is not None:
+                self.prefetch(partial)
+
+    def _respond(self):
+        while not self._stop.is_set():
+            item = self._get(self.prompts)
+            if item is None:
+                continue
+            text, context, turn = item
+            with tracer.activate(turn):
+                reply = self.respond(text, context)
+            tracer.finish_turn(turn)
+            if self.on_reply is not None:
+                self.on_reply(reply)